@@ -0,0 +1,143 @@
+"""
+On-disk store of compiled PDFs keyed by the sha256 of their LaTeX source.
+
+Users click download repeatedly for the same document; serving the stored
+file skips the compile entirely, and the hash doubles as the ETag so
+browsers can revalidate GET /pdf/{hash} with If-None-Match and get a 304.
+
+The directory is created on the first put, not at import. Each process
+keeps a running total of the bytes it has stored; the directory is only
+listed (and the least recently served files evicted) once that total
+passes max_bytes or every PDF_ARTIFACT_SCAN_EVERY puts, which also picks up
+files other worker processes added.
+"""
+import asyncio
+import hashlib
+import os
+import shutil
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+PDF_ARTIFACT_DIR = os.getenv(
+    "PDF_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "pdf_artifacts")
+)
+PDF_ARTIFACT_MAX_BYTES = int(os.getenv("PDF_ARTIFACT_MAX_BYTES", str(512 * 1024 * 1024)))
+PDF_ARTIFACT_SCAN_EVERY = int(os.getenv("PDF_ARTIFACT_SCAN_EVERY", "100"))
+
+
+class _KeyLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+def latex_source_hash(latex_code: str) -> str:
+    return hashlib.sha256(latex_code.encode("utf-8")).hexdigest()
+
+
+class PDFArtifactStore:
+    """Directory of <hash>.pdf files, evicting least recently served files past max_bytes"""
+
+    def __init__(self, directory: str = PDF_ARTIFACT_DIR, max_bytes: int = PDF_ARTIFACT_MAX_BYTES):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._compile_locks: Dict[str, _KeyLock] = {}
+        self.hits = 0
+        self.misses = 0
+        self._created = False
+        # Bytes stored as of the last scan plus what this process put since; None until the first scan
+        self._bytes: Optional[int] = None
+        self._puts_since_scan = 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the stored PDF, or None. Serving a file marks it as recently used."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, source_path: str) -> str:
+        """Copy a compiled PDF into the store atomically and return its stored path"""
+        if not self._created:
+            os.makedirs(self.directory, exist_ok=True)
+            self._created = True
+        path = self.path_for(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_path, temp_path)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._puts_since_scan += 1
+            if self._bytes is not None:
+                self._bytes += size
+            scan = (self._bytes is None or self._bytes > self.max_bytes
+                    or self._puts_since_scan >= PDF_ARTIFACT_SCAN_EVERY)
+        if scan:
+            self._evict()
+        return path
+
+    @asynccontextmanager
+    async def compile_lock(self, key: str):
+        """
+        Hold the per-source lock, so concurrent requests for the same LaTeX
+        compile it once. The lock is dropped when its last user (holder or
+        waiter) is done, never while someone still waits on it.
+        """
+        entry = self._compile_locks.get(key)
+        if entry is None:
+            entry = self._compile_locks[key] = _KeyLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                self._compile_locks.pop(key, None)
+
+    def _evict(self):
+        with self._lock:
+            files = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".pdf"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._bytes = total
+            self._puts_since_scan = 0
+
+    def stats(self) -> Dict[str, int]:
+        files = [entry for entry in os.scandir(self.directory)
+                 if entry.name.endswith(".pdf")] if os.path.isdir(self.directory) else []
+        return {
+            "files": len(files),
+            "bytes": sum(entry.stat().st_size for entry in files),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+pdf_artifacts = PDFArtifactStore()
@@ -0,0 +1,257 @@
+"""
+Caching primitives shared by the backend.
+
+LRUCache is a thread-safe in-process tier with TTL and entry-count eviction.
+SQLiteCache is an optional on-disk tier in WAL mode, so several uvicorn
+worker processes on one host can share entries. LLMResponseCache layers the
+two in front of call_gpt.
+
+STATE_DIR is where the persistent stores (LLM rate limit buckets, JD
+analyses, the job queue) default to. Under LLM_BACKEND=fake it is a
+separate subdirectory, so load tests against the stub never leave canned
+analyses or stub rate limit usage behind for the real API.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+STATE_DIR = os.path.join(os.path.dirname(__file__), "..", ".cache")
+if os.getenv("LLM_BACKEND", "openai").lower() == "fake":
+    STATE_DIR = os.path.join(STATE_DIR, "fake")
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with an optional TTL (seconds)"""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        """Like get, but without counting a hit/miss or refreshing recency"""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or (entry[0] is not None and entry[0] <= time.time()):
+            return default
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SQLiteCache:
+    """
+    Key/value cache stored in a SQLite database in WAL mode.
+    Values must be JSON-serialisable. Expired rows are dropped on read, and
+    every evict_every writes (1% of max_entries) expired rows are purged and
+    the least recently used rows evicted down to max_entries, so a write
+    does not pay for counting the table. Between sweeps the table may hold
+    up to evict_every rows per writing process more than max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50000, ttl: Optional[float] = None,
+                 table: str = "cache"):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.table = table
+        self.evict_every = max(1, max_entries // 100)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """
+        The connection, opened on first use rather than at construction: a
+        module-level cache must not carry an open SQLite handle into worker
+        processes forked after import (gunicorn --preload)
+        """
+        if self._connection is None:
+            with self._connection_lock:
+                if self._connection is None:
+                    self._connection = self._connect()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table}(accessed_at)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_expires ON {self.table}(expires_at)")
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.misses += 1
+                return default
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now)
+            )
+            self._writes += 1
+            if self._writes >= self.evict_every:
+                self._writes = 0
+                self._evict()
+
+    def _evict(self):
+        self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                           (time.time(),))
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)", (excess,)
+            )
+            self.evictions += excess
+
+    def invalidate(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM responses keyed on (backend, model, prompt
+    template version, prompt hash). Lookups go memory first, then disk (if
+    configured); disk hits are promoted into memory. backend names the API
+    that answered (e.g. "openai:<base url>"), so replies from a stub or
+    another OpenAI-compatible server never answer for a different one.
+    """
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None, backend: str = ""):
+        self.memory = memory
+        self.disk = disk
+        self.backend = backend
+
+    @staticmethod
+    def make_key(model: str, template_version: str, prompt: str, backend: str = "") -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{backend}|{model}|{template_version}|{prompt_hash}"
+
+    def get(self, model: str, template_version: str, prompt: str) -> Optional[str]:
+        key = self.make_key(model, template_version, prompt, self.backend)
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, model: str, template_version: str, prompt: str, response: str):
+        key = self.make_key(model, template_version, prompt, self.backend)
+        self.memory.set(key, response)
+        if self.disk is not None:
+            self.disk.set(key, response)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        disk = self.disk.stats() if self.disk is not None else None
+        hits = memory["hits"] + (disk["hits"] if disk else 0)
+        # Every memory miss either hit disk or went to the API
+        misses = disk["misses"] if disk else memory["misses"]
+        return {"hits": hits, "misses": misses, "memory": memory, "disk": disk}
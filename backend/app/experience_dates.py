@@ -0,0 +1,149 @@
+"""
+Date-range tokenizer and interval merging for experience calculation.
+
+One precompiled pattern finds every employment date range in a single pass
+over the text, in year forms ("2019-2023", "2019 – Present") and
+month/year forms ("Jan 2020 – Mar 2022", "01/2020 to 03/2022",
+"September 2018 - now"). Each range becomes a half-open interval of month
+indexes (year * 12 + month):
+
+- a month/year start counts from that month, a bare year from January;
+- a month/year end includes that month; a bare end year means "until
+  that year started", so "2020-2023" is exactly three years, as before;
+- Present / current / now / today run through the current month.
+
+A range counts as professional experience when its line, or the title line
+above it if its own line does not say, names a professional role and not
+an internship, part-time, academic or student position. Overlapping and
+adjacent intervals are merged before summing, so concurrent roles are
+counted once.
+"""
+import re
+from datetime import date
+from typing import List, NamedTuple, Optional, Tuple
+
+MONTHS = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_YEAR = r"(?:19|20)\d{2}"
+
+
+def _date(prefix: str) -> str:
+    return (rf"(?:(?P<{prefix}_month_name>{_MONTH})\s*,?\s*|(?P<{prefix}_month_number>0?[1-9]|1[0-2])\s*[/.]\s*)?"
+            rf"(?P<{prefix}_year>{_YEAR})")
+
+
+DATE_RANGE_RE = re.compile(
+    rf"(?<![\w/.])(?P<start>{_date('start')})"
+    r"\s*(?:-|–|—|to|until|till|through|thru)\s*"
+    rf"(?P<end>{_date('end')}|(?P<open_end>present|current|now|today|date))(?![\w/])",
+    re.IGNORECASE
+)
+
+EXCLUDED_ROLE_RE = re.compile(
+    r"\b(?:intern|interns|internship|internships|part[- ]time|academic|student|research assistant|teaching assistant)\b",
+    re.IGNORECASE
+)
+PROFESSIONAL_ROLE_RE = re.compile(
+    r"\b(?:engineer|developer|manager|analyst|consultant|specialist|lead|senior|junior|architect|scientist|"
+    r"administrator|designer|director|programmer)",
+    re.IGNORECASE
+)
+
+EARLIEST_YEAR = 1960
+
+
+class DateRange(NamedTuple):
+    start: int  # month index, inclusive
+    end: int    # month index, exclusive
+    text: str
+
+
+def month_index(year: int, month: int) -> int:
+    """Months since year 0 for a 0-based month"""
+    return year * 12 + month
+
+
+def _month(match: re.Match, prefix: str) -> Optional[int]:
+    name = match.group(f"{prefix}_month_name")
+    if name:
+        return MONTHS[name[:3].lower()]
+    number = match.group(f"{prefix}_month_number")
+    return int(number) - 1 if number else None
+
+
+def _interval(match: re.Match, today: date) -> Optional[Tuple[int, int]]:
+    current = month_index(today.year, today.month - 1) + 1
+    start_month = _month(match, "start")
+    start = month_index(int(match.group("start_year")), start_month or 0)
+    if match.group("open_end"):
+        end = current
+    else:
+        end_month = _month(match, "end")
+        end_year = int(match.group("end_year"))
+        end = month_index(end_year, end_month) + 1 if end_month is not None else month_index(end_year, 0)
+    if start < month_index(EARLIEST_YEAR, 0) or start >= current or end < start:
+        return None
+    return start, min(end, current)
+
+
+def _line_bounds(text: str, position: int) -> Tuple[int, int]:
+    start = text.rfind("\n", 0, position) + 1
+    end = text.find("\n", position)
+    return start, len(text) if end == -1 else end
+
+
+def _previous_line(text: str, line_start: int) -> str:
+    """The nearest non-blank line above the one starting at line_start"""
+    end = line_start - 1
+    while end > 0:
+        start = text.rfind("\n", 0, end) + 1
+        line = text[start:end]
+        if line.strip():
+            return line
+        end = start - 1
+    return ""
+
+
+def _is_professional(text: str, match: re.Match, line_start: int, line_end: int) -> bool:
+    line = text[line_start:match.start()] + text[match.end():line_end]
+    if EXCLUDED_ROLE_RE.search(line):
+        return False
+    if PROFESSIONAL_ROLE_RE.search(line):
+        return True
+    # Dates on their own line (or next to the company): the title is usually just above
+    title = _previous_line(text, line_start)
+    return not EXCLUDED_ROLE_RE.search(title) and PROFESSIONAL_ROLE_RE.search(title) is not None
+
+
+def professional_date_ranges(text: str, today: date = None) -> List[DateRange]:
+    """Date ranges of professional roles, in text order"""
+    today = today or date.today()
+    ranges = []
+    for match in DATE_RANGE_RE.finditer(text):
+        interval = _interval(match, today)
+        if interval is None:
+            continue
+        line_start, line_end = _line_bounds(text, match.start())
+        if _is_professional(text, match, line_start, line_end):
+            ranges.append(DateRange(interval[0], interval[1], match.group(0)))
+    return ranges
+
+
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Union of half-open intervals as sorted, disjoint intervals"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def experience_months(text: str, today: date = None) -> int:
+    """Months covered by at least one professional role"""
+    ranges = professional_date_ranges(text, today)
+    return sum(end - start for start, end in merge_intervals([(r.start, r.end) for r in ranges]))
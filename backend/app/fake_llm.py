@@ -0,0 +1,305 @@
+"""
+Deterministic OpenAI-compatible stub server for offline load tests and benchmarks.
+
+Serves POST /v1/chat/completions (plain and streamed) with canned replies
+that parse like real ones. Each prompt is matched to its app.prompts
+template by the template's opening words:
+
+- experience_years: a number
+- skills: a comma-separated list
+- job_requirements / job_analysis: the JSON objects the templates ask for
+- resume_fields: a sample candidate's fields as JSON
+- ats_resume: the structured resume data from the prompt, echoed as JSON
+- latex_resume: that data rendered with the local LaTeX template
+
+Point the app at it with LLM_BACKEND=fake (see app.utils) and start it with
+
+    python -m app.fake_llm --port 8765
+
+Replies are delayed by a first-token latency drawn from a distribution
+plus a per-token delay (also the gap between streamed chunks), and a
+fraction of requests fail with an injected error. Every draw comes from a
+random generator seeded with FAKE_LLM_SEED, the prompt and how often that
+prompt was seen before, so a run is reproducible whatever the request
+interleaving. Configuration:
+
+- FAKE_LLM_LATENCY: constant, uniform, normal or lognormal (default)
+- FAKE_LLM_LATENCY_MS: median first-token latency (default 300)
+- FAKE_LLM_LATENCY_SPREAD: sigma for lognormal, relative +/- range for
+  uniform, relative standard deviation for normal (default 0.5)
+- FAKE_LLM_TOKEN_DELAY_MS: per completion token (default 5)
+- FAKE_LLM_ERROR_RATE: fraction of requests that fail (default 0)
+- FAKE_LLM_ERRORS: comma-separated status codes to inject, "timeout" for a
+  request that hangs for FAKE_LLM_HANG_SECONDS (default "429,500,503")
+- FAKE_LLM_RETRY_AFTER_MS: retry-after-ms header of injected 429s (default 200)
+- FAKE_LLM_SEED (default 0)
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.local_pipeline import render_latex_resume
+from app.prompts import TEMPLATES, count_tokens
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+SAMPLE_FIELDS = {
+    "name": "Jane Doe",
+    "email": "jane.doe@example.com",
+    "phone": "(555) 123-4567",
+    "location": "Austin, TX",
+    "summary": "Backend engineer building data services in Python and AWS.",
+    "experience": [
+        {"company": "Example Corp", "title": "Senior Software Engineer", "start": "Jan 2020", "end": "Present",
+         "bullets": ["Built REST APIs with FastAPI and PostgreSQL on Kubernetes"]},
+        {"company": "Sample Inc", "title": "Software Engineer", "start": "Jun 2016", "end": "Dec 2019",
+         "bullets": ["Moved batch jobs to Docker and CI/CD pipelines"]},
+    ],
+    "education": [{"degree": "B.S. Computer Science", "institution": "University of Texas", "year": "2016"}],
+    "skills": ["Python", "JavaScript", "React", "AWS", "Docker", "SQL"],
+    "projects": [{"name": "Resume Tailor", "description": "Matches resumes to job descriptions with NLP"}],
+}
+
+SAMPLE_REQUIREMENTS = {
+    "required_years": 5,
+    "required_skills": ["Python", "AWS", "Kubernetes"],
+    "preferred_skills": ["React", "Terraform"],
+    "required_education": "Bachelor's",
+    "experience_level": "senior",
+    "industry": "tech",
+}
+
+SAMPLE_SKILLS = ["Python", "AWS", "Kubernetes", "Docker", "React", "Terraform", "SQL", "CI/CD", "Communication"]
+
+
+def _structured_data(prompt: str, until: str) -> dict:
+    """The compact JSON resume data a generation prompt carries, or the sample fields"""
+    match = re.search(r"STRUCTURED RESUME DATA:\n(.*?)\n\s*" + until, prompt, re.DOTALL)
+    try:
+        data = json.loads(match.group(1)) if match else None
+    except ValueError:
+        data = None
+    return data if isinstance(data, dict) else SAMPLE_FIELDS
+
+
+def _ats_reply(prompt: str) -> str:
+    fields = dict(_structured_data(prompt, "JOB DESCRIPTION:"))
+    skills = list(fields.get("skills") or [])
+    fields["skills"] = skills + [skill for skill in SAMPLE_REQUIREMENTS["required_skills"] if skill not in skills]
+    return json.dumps(fields, ensure_ascii=False)
+
+
+def _latex_reply(prompt: str) -> str:
+    return render_latex_resume(_structured_data(prompt, "CRITICAL:"))
+
+
+CANNED_REPLIES = {
+    "experience_years": lambda prompt: "5",
+    "skills": lambda prompt: ", ".join(SAMPLE_SKILLS),
+    "job_requirements": lambda prompt: json.dumps(SAMPLE_REQUIREMENTS),
+    "job_analysis": lambda prompt: json.dumps({"skills": SAMPLE_SKILLS, **SAMPLE_REQUIREMENTS}),
+    "resume_fields": lambda prompt: json.dumps(SAMPLE_FIELDS),
+    "ats_resume": _ats_reply,
+    "latex_resume": _latex_reply,
+}
+
+
+def _opening(text: str) -> str:
+    """A template's first line up to its first placeholder, which every prompt built from it starts with"""
+    return text.strip().splitlines()[0].split("{")[0]
+
+
+_OPENINGS = [(_opening(template.text), name) for name, template in TEMPLATES.items()]
+
+
+def prompt_type(prompt: str) -> Optional[str]:
+    """Name of the app.prompts template the prompt was built from, if any"""
+    prompt = prompt.lstrip()
+    return next((name for opening, name in _OPENINGS if prompt.startswith(opening)), None)
+
+
+def canned_reply(prompt: str) -> Tuple[str, str]:
+    """(prompt type, reply text); prompts from no known template get "OK" """
+    kind = prompt_type(prompt)
+    return kind or "unknown", CANNED_REPLIES[kind](prompt) if kind else "OK"
+
+
+@dataclass
+class FakeLLMConfig:
+    latency: str = "lognormal"
+    latency_ms: float = 300.0
+    latency_spread: float = 0.5
+    token_delay_ms: float = 5.0
+    error_rate: float = 0.0
+    errors: List[str] = field(default_factory=lambda: ["429", "500", "503"])
+    retry_after_ms: int = 200
+    hang_seconds: float = 120.0
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{self.latency}', "
+                             f"expected one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMConfig":
+        return cls(
+            latency=os.getenv("FAKE_LLM_LATENCY", "lognormal").lower(),
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "300")),
+            latency_spread=float(os.getenv("FAKE_LLM_LATENCY_SPREAD", "0.5")),
+            token_delay_ms=float(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "5")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            errors=[error.strip() for error in os.getenv("FAKE_LLM_ERRORS", "429,500,503").split(",")
+                    if error.strip()],
+            retry_after_ms=int(os.getenv("FAKE_LLM_RETRY_AFTER_MS", "200")),
+            hang_seconds=float(os.getenv("FAKE_LLM_HANG_SECONDS", "120")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """First-token latency in seconds"""
+        median, spread = self.latency_ms / 1000, self.latency_spread
+        if self.latency == "uniform":
+            return rng.uniform(median * (1 - spread), median * (1 + spread))
+        if self.latency == "normal":
+            return max(0.0, rng.gauss(median, median * spread))
+        if self.latency == "lognormal":
+            return rng.lognormvariate(0, spread) * median
+        return median
+
+    def sample_error(self, rng: random.Random) -> Optional[str]:
+        if self.errors and rng.random() < self.error_rate:
+            return rng.choice(self.errors)
+        return None
+
+
+ERROR_TYPES = {
+    429: ("rate_limit_exceeded", "Rate limit reached (injected by the fake LLM server)"),
+    500: ("server_error", "The server had an error (injected by the fake LLM server)"),
+    503: ("server_error", "The engine is currently overloaded (injected by the fake LLM server)"),
+}
+
+
+def _error_response(status: int, retry_after_ms: int) -> JSONResponse:
+    code, message = ERROR_TYPES.get(status, ("server_error", f"Injected error {status}"))
+    headers = {"retry-after-ms": str(retry_after_ms)} if status == 429 else None
+    return JSONResponse({"error": {"message": message, "type": code, "code": code}},
+                        status_code=status, headers=headers)
+
+
+def _split_tokens(text: str) -> List[str]:
+    """Stream pieces: words with their trailing whitespace"""
+    return re.findall(r"\s*\S+\s*", text) or [text]
+
+
+def create_app(config: FakeLLMConfig = None) -> FastAPI:
+    config = config or FakeLLMConfig.from_env()
+    fake = FastAPI(title="Fake LLM server")
+    seen: Counter = Counter()
+    seen_lock = threading.Lock()
+    fake.state.config = config
+    fake.state.requests = Counter()
+
+    def request_rng(prompt: str) -> random.Random:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with seen_lock:
+            attempt = seen[digest]
+            seen[digest] += 1
+        return random.Random(f"{config.seed}:{digest}:{attempt}")
+
+    @fake.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = "\n".join(str(message.get("content") or "") for message in body.get("messages", []))
+        model = body.get("model", "fake")
+        rng = request_rng(prompt)
+        kind, content = canned_reply(prompt)
+        latency = config.sample_latency(rng)
+        error = config.sample_error(rng)
+        fake.state.requests[kind] += 1
+
+        if error is not None:
+            logger.debug("Injecting %s error into a %s request", error, kind)
+        if error == "timeout":
+            await asyncio.sleep(config.hang_seconds)
+        if error is not None:
+            await asyncio.sleep(latency)
+            return _error_response(int(error) if error.isdigit() else 504, config.retry_after_ms)
+
+        pieces = _split_tokens(content)
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = count_tokens(content)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        token_delay = config.token_delay_ms / 1000
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency + token_delay * completion_tokens)
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        # The per-token delay is spread over the pieces so streaming takes as long as the plain reply
+        piece_delay = token_delay * completion_tokens / len(pieces)
+
+        def chunk(choices: list, **extra) -> str:
+            data = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": choices, **extra}
+            return f"data: {json.dumps(data)}\n\n"
+
+        def delta(content: dict, finish_reason=None) -> str:
+            return chunk([{"index": 0, "delta": content, "finish_reason": finish_reason}])
+
+        async def events():
+            await asyncio.sleep(latency)
+            yield delta({"role": "assistant", "content": ""})
+            for piece in pieces:
+                await asyncio.sleep(piece_delay)
+                yield delta({"content": piece})
+            yield delta({}, "stop")
+            if include_usage:
+                yield chunk([], usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @fake.get("/stats")
+    def stats():
+        return {"requests": dict(fake.state.requests)}
+
+    return fake
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fake OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    import uvicorn
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Persistent store of job description analyses.
+
+Popular postings are pasted by many candidates, so the skills and
+requirements extracted from a job description are stored under a
+fingerprint of its normalized text. Later /tailor calls for the same posting
+reuse them instead of paying for the LLM calls again. The fingerprint
+includes the version of the analysis prompt, so editing the template stops
+serving analyses made with the old one. Expired rows are deleted and the
+table is capped at JD_STORE_MAX_ENTRIES, least recently used first.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.cache import STATE_DIR
+from app.prompts import JOB_ANALYSIS
+
+JD_STORE_PATH = os.getenv("JD_STORE_PATH", os.path.join(STATE_DIR, "jd_analysis.sqlite"))
+# Analyses older than this are re-extracted on next use (default 30 days)
+JD_STORE_TTL = float(os.getenv("JD_STORE_TTL_SECONDS", str(30 * 24 * 3600)))
+JD_STORE_MAX_ENTRIES = int(os.getenv("JD_STORE_MAX_ENTRIES", "10000"))
+
+BULLET_PATTERN = re.compile(r'^[ \t]*(?:[•·▪●◦‣►▸\-–—*]|\d+[.)])[ \t]+', re.MULTILINE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_job_description(text: str) -> str:
+    """Lowercase, drop bullet glyphs and collapse whitespace so trivial edits share a fingerprint"""
+    text = BULLET_PATTERN.sub('', text)
+    text = WHITESPACE_PATTERN.sub(' ', text)
+    return text.strip().lower()
+
+
+def job_description_fingerprint(text: str, version: str = "") -> str:
+    """Fingerprint of the normalized posting, for analyses made with this prompt version"""
+    key = f"{version}\n{normalize_job_description(text)}" if version else normalize_job_description(text)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class JDAnalysisStore:
+    """SQLite-backed (WAL) store of job description analyses with usage counts"""
+
+    def __init__(self, path: str = JD_STORE_PATH, ttl: Optional[float] = JD_STORE_TTL,
+                 max_entries: int = JD_STORE_MAX_ENTRIES, version: str = ""):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = version
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jd_analysis ("
+            "fingerprint TEXT PRIMARY KEY, job_description TEXT NOT NULL, analysis TEXT NOT NULL, "
+            "hits INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "last_used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jd_analysis_hits ON jd_analysis(hits)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jd_analysis_last_used ON jd_analysis(last_used_at)")
+        with self._lock:
+            self._prune()
+
+    def _fingerprint(self, job_description: str) -> str:
+        return job_description_fingerprint(job_description, self.version)
+
+    def _prune(self):
+        """Delete expired rows, then the least recently used ones beyond max_entries (lock held)"""
+        if self.ttl:
+            self._conn.execute("DELETE FROM jd_analysis WHERE updated_at <= ?", (time.time() - self.ttl,))
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM jd_analysis WHERE fingerprint NOT IN ("
+                "SELECT fingerprint FROM jd_analysis ORDER BY last_used_at DESC LIMIT ?)", (self.max_entries,)
+            )
+
+    def get(self, job_description: str) -> Optional[Dict[str, Any]]:
+        """Return the stored analysis for this posting (counting the use), or None"""
+        fingerprint = self._fingerprint(job_description)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT analysis, updated_at FROM jd_analysis WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if row is None:
+                return None
+            analysis, updated_at = row
+            if self.ttl and updated_at + self.ttl <= now:
+                return None
+            self._conn.execute(
+                "UPDATE jd_analysis SET hits = hits + 1, last_used_at = ? WHERE fingerprint = ?",
+                (now, fingerprint)
+            )
+        return json.loads(analysis)
+
+    def put(self, job_description: str, analysis: Dict[str, Any]) -> str:
+        fingerprint = self._fingerprint(job_description)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jd_analysis (fingerprint, job_description, analysis, hits, created_at, updated_at, last_used_at) "
+                "VALUES (?, ?, ?, 0, ?, ?, ?) "
+                "ON CONFLICT(fingerprint) DO UPDATE SET analysis = excluded.analysis, updated_at = excluded.updated_at",
+                (fingerprint, job_description, json.dumps(analysis), now, now, now)
+            )
+            self._prune()
+        return fingerprint
+
+    def contains(self, job_description: str) -> bool:
+        fingerprint = self._fingerprint(job_description)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM jd_analysis WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        return row is not None and not (self.ttl and row[0] + self.ttl <= time.time())
+
+    def popular(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most frequently reused postings, most popular first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint, job_description, hits, created_at, last_used_at FROM jd_analysis "
+                "ORDER BY hits DESC, last_used_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {
+                "fingerprint": fingerprint,
+                "job_description": job_description,
+                "hits": hits,
+                "created_at": created_at,
+                "last_used_at": last_used_at,
+            }
+            for fingerprint, job_description, hits, created_at, last_used_at in rows
+        ]
+
+    def invalidate(self, fingerprint: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jd_analysis WHERE fingerprint = ?", (fingerprint,)
+            ).rowcount > 0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_jd_store() -> JDAnalysisStore:
+    """Process-wide store, opened on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JDAnalysisStore(version=JOB_ANALYSIS.id)
+        return _store
@@ -0,0 +1,337 @@
+"""
+Durable job queue for long-running tailoring work.
+
+/tailor can hold a connection open for 30+ seconds, which trips proxy
+timeouts. The job API instead records the request in a local SQLite queue,
+answers immediately with a job id, and lets a fixed pool of asyncio workers
+run the pipeline. Clients poll the job or subscribe to its status events and
+fetch the result when it is done.
+
+The queue survives restarts: jobs that were queued or running when the
+process stopped are picked up again on the next start. Several processes
+may share the database: a worker claims a job with a conditional UPDATE, so
+only one of them runs it, and keeps a heartbeat on the jobs it runs. Only
+running jobs whose heartbeat is older than JOB_LEASE_SECONDS (their process
+died) are requeued, at start and periodically after. Submissions beyond
+JOB_MAX_QUEUE waiting jobs are refused with QueueFull so callers can back
+off, and shutdown stops taking work and gives in-flight jobs
+JOB_DRAIN_TIMEOUT_SECONDS to finish. Finished jobs are deleted once they
+are older than JOB_RESULT_TTL_SECONDS, checked at start and every
+JOB_PRUNE_INTERVAL_SECONDS while running.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.cache import STATE_DIR
+from app.rate_limit import BACKGROUND, llm_priority
+from app.tracing import start_trace
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(STATE_DIR, "jobs.sqlite"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "100"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL_SECONDS", str(24 * 3600)))
+JOB_DRAIN_TIMEOUT = float(os.getenv("JOB_DRAIN_TIMEOUT_SECONDS", "30"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_PRUNE_INTERVAL = float(os.getenv("JOB_PRUNE_INTERVAL_SECONDS", "600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is full or shutting down"""
+
+
+class JobQueue:
+    """SQLite-backed job queue drained by a pool of asyncio workers"""
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, workers: int = JOB_WORKERS,
+                 max_queue: int = JOB_MAX_QUEUE, result_ttl: float = JOB_RESULT_TTL,
+                 lease_seconds: float = JOB_LEASE_SECONDS):
+        self.path = path
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.prune_interval = JOB_PRUNE_INTERVAL
+        # Identifies this process's claims in a database shared with other workers
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, Callable[[dict], Awaitable[Any]]] = {}
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_lock = threading.Lock()
+        self._ready: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._accepting = False
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """
+        The database connection, opened on first use (normally start() in the
+        app lifespan) so that importing the module-level job_queue before
+        forking workers leaves no SQLite handle to be shared across the fork
+        """
+        if self._connection is None:
+            with self._connection_lock:
+                if self._connection is None:
+                    self._connection = self._connect()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+            "payload TEXT NOT NULL, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at)")
+        return conn
+
+    def register(self, kind: str, handler: Callable[[dict], Awaitable[Any]]):
+        """handler(payload) is awaited by a worker and must return a JSON-serialisable result"""
+        self._handlers[kind] = handler
+
+    async def start(self):
+        """Requeue work left over from the last run and start the workers"""
+        self._ready = asyncio.Queue()
+        self._prune_finished()
+        self._requeue_expired()
+        with self._lock:
+            leftover = [row[0] for row in self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,))]
+        for job_id in leftover:
+            self._ready.put_nowait(job_id)
+        self._accepting = True
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._heartbeat = asyncio.create_task(self._keep_leases())
+        logger.debug("Job queue started with %s workers, %s jobs requeued", self.workers, len(leftover))
+
+    def _requeue_expired(self) -> List[str]:
+        """
+        Requeue running jobs whose owner stopped renewing their lease (the
+        process died); jobs other live processes are running are left alone
+        """
+        expired_before = time.time() - self.lease_seconds
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at <= ?)",
+                (RUNNING, expired_before))]
+            for job_id in expired:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, started_at = NULL, heartbeat_at = NULL "
+                    "WHERE id = ? AND status = ? AND (heartbeat_at IS NULL OR heartbeat_at <= ?)",
+                    (QUEUED, job_id, RUNNING, expired_before))
+        if expired:
+            logger.warning("Requeued %s jobs whose worker stopped: %s", len(expired), ", ".join(expired))
+        return expired
+
+    def _prune_finished(self):
+        """Delete finished jobs (and their results) older than result_ttl"""
+        with self._lock:
+            pruned = self._conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at <= ?",
+                                        (SUCCEEDED, FAILED, time.time() - self.result_ttl)).rowcount
+        if pruned:
+            logger.debug("Pruned %s finished jobs", pruned)
+
+    def _renew_leases(self):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?",
+                               (time.time(), self.owner, RUNNING))
+
+    async def _keep_leases(self):
+        """
+        Renew the leases of the jobs this process runs, pick up jobs abandoned
+        by dead processes and, every prune_interval, drop expired results
+        """
+        interval = self.lease_seconds / 3
+        pruned_at = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            # Off the event loop: under contention a write can wait up to the 5s busy timeout.
+            # A failed round (e.g. "database is locked") is retried; ending the loop would let
+            # other processes take over jobs that are still running here.
+            try:
+                await asyncio.to_thread(self._renew_leases)
+                expired = await asyncio.to_thread(self._requeue_expired)
+                if time.monotonic() - pruned_at >= self.prune_interval:
+                    await asyncio.to_thread(self._prune_finished)
+                    pruned_at = time.monotonic()
+            except Exception:
+                logger.exception("Renewing job leases failed, retrying in %.1fs", interval)
+                continue
+            for job_id in expired:
+                self._ready.put_nowait(job_id)
+
+    async def drain(self, timeout: float = JOB_DRAIN_TIMEOUT):
+        """
+        Stop taking new jobs, give running jobs up to timeout seconds to finish,
+        then stop the workers. Jobs still queued (or interrupted) stay in the
+        database and run on the next start.
+        """
+        self._accepting = False
+        running = list(self._running.values())
+        if running:
+            logger.debug("Draining %s running jobs", len(running))
+            await asyncio.wait(running, timeout=timeout)
+        tasks = self._tasks + ([self._heartbeat] if self._heartbeat else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._heartbeat = None
+
+    def submit(self, kind: str, payload: dict) -> str:
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        if not self._accepting:
+            raise QueueFull("Job queue is not accepting work")
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if queued >= self.max_queue:
+                raise QueueFull(f"{queued} jobs already queued")
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(payload), time.time())
+            )
+        self._ready.put_nowait(job_id)
+        self._publish(job_id, QUEUED)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status without its result, or None for an unknown id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, error, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(("id", "kind", "status", "error", "created_at", "started_at", "finished_at"), row))
+        if job["status"] == QUEUED:
+            job["position"] = self._position(job["created_at"])
+        return job
+
+    def result(self, job_id: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def _position(self, created_at: float) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                                      (QUEUED, created_at)).fetchone()[0]
+
+    async def subscribe(self, job_id: str):
+        """Async generator of status changes for a job, ending once it has finished"""
+        job = self.get(job_id)
+        if job is None:
+            return
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            status = job["status"]
+            yield status
+            while status not in FINISHED:
+                status = await queue.get()
+                yield status
+        finally:
+            self._subscribers[job_id].remove(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def _publish(self, job_id: str, status: str):
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait(status)
+
+    def _claim(self, job_id: str) -> Optional[tuple]:
+        """Atomically take a queued job for this process; (kind, payload), or None if someone else has it"""
+        now = time.time()
+        with self._lock:
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, started_at = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, self.owner, now, now, job_id, QUEUED)
+            ).rowcount == 1
+            row = self._conn.execute("SELECT kind, payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not claimed:
+            return None
+        self._publish(job_id, RUNNING)
+        return row
+
+    def _set_status(self, job_id: str, status: str, **columns):
+        """Update a job this process has claimed; a job whose lease was lost is left to its new owner"""
+        assignments = ", ".join(["status = ?"] + [f"{name} = ?" for name in columns])
+        with self._lock:
+            updated = self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ? AND owner = ?",
+                                         (status, *columns.values(), job_id, self.owner)).rowcount
+        if updated:
+            self._publish(job_id, status)
+        else:
+            logger.warning("Job %s is no longer owned by this process, not marking it %s", job_id, status)
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._ready.get()
+            claimed = self._claim(job_id)
+            if claimed is None:
+                continue
+            kind, payload = claimed
+            # The job id doubles as the request id of its trace; the task below runs in this context,
+            # queued behind interactive requests for LLM rate limit capacity
+            start_trace(job_id, f"job {kind}")
+            llm_priority.set(BACKGROUND)
+            logger.debug("Worker %s running %s job %s", index, kind, job_id)
+            task = asyncio.create_task(self._handlers[kind](json.loads(payload)))
+            self._running[job_id] = task
+            try:
+                # shield: cancelling the worker during drain must not cancel the job itself
+                result = await asyncio.shield(task)
+                self._set_status(job_id, SUCCEEDED, result=json.dumps(result), finished_at=time.time())
+            except asyncio.CancelledError:
+                if not task.done():
+                    task.cancel()
+                # Interrupted by shutdown; leave it for the next start
+                self._set_status(job_id, QUEUED, owner=None, started_at=None, heartbeat_at=None)
+                raise
+            except Exception as e:
+                logger.error("%s job %s failed: %s", kind, job_id, e)
+                self._set_status(job_id, FAILED, error=str(e), finished_at=time.time())
+            finally:
+                self._running.pop(job_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": len(self._running),
+            **{status: counts.get(status, 0) for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)},
+        }
+
+
+job_queue = JobQueue()
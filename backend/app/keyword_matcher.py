@@ -0,0 +1,122 @@
+"""
+Single-pass multi-pattern skill matcher (Aho-Corasick).
+
+extract_basic_keywords is the fallback whenever the LLM skill extraction
+fails, so during an outage it runs on every request. Instead of one regex
+per skill family, every skill name and alias from the taxonomy data file is
+compiled once into an Aho-Corasick automaton, and a text is scanned in one
+linear pass that reports every known term. Matching is case-insensitive,
+respects word boundaries (a term must not be preceded or followed by a
+letter, digit or underscore) and prefers the longest term where matches
+overlap ("SQL Server" over "SQL").
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from app.skill_taxonomy import skill_taxonomy, SkillTaxonomy
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    canonical: str  # canonical skill name
+    term: str       # the text as it appears in the input
+    start: int
+    end: int
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _fold(text: str) -> str:
+    """Lowercase with whitespace mapped to spaces, keeping every offset in place"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # A few characters (e.g. "İ") grow when lowercased; fold them one by one
+        lowered = "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+    return "".join(" " if ch.isspace() else ch for ch in lowered)
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over (term, canonical name) pairs"""
+
+    def __init__(self, terms: Iterable[Tuple[str, str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]  # (term length, canonical name)
+
+        for term, canonical in terms:
+            folded = _fold(" ".join(term.split()))
+            if not folded:
+                continue
+            state = 0
+            for ch in folded:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            if (len(folded), canonical) not in self._out[state]:
+                self._out[state].append((len(folded), canonical))
+
+        # Breadth-first: a state's failure link is the longest proper suffix that is also a trie path
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    @classmethod
+    def from_taxonomy(cls, taxonomy: SkillTaxonomy) -> "KeywordMatcher":
+        return cls(taxonomy.terms(for_text_search=True))
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """Non-overlapping matches in text order, longest term first where matches overlap"""
+        folded = _fold(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        candidates = []
+        consumed = []  # offsets of the characters fed to the automaton
+        state = 0
+        previous = ""
+        for i, ch in enumerate(folded):
+            if ch == " " and previous == " ":
+                # Runs of whitespace match the single space in a term
+                continue
+            previous = ch
+            consumed.append(i)
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not state:
+                continue
+            for length, canonical in out[state]:
+                start, end = consumed[-length], i + 1
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+                    continue
+                candidates.append((start, -end, canonical))
+
+        matches = []
+        last_end = 0
+        for start, negative_end, canonical in sorted(candidates):
+            if start >= last_end:
+                last_end = -negative_end
+                matches.append(KeywordMatch(canonical, text[start:last_end], start, last_end))
+        return matches
+
+    def find_skills(self, text: str) -> List[str]:
+        """Unique canonical skill names in order of first appearance"""
+        return list(dict.fromkeys(match.canonical for match in self.find_all(text)))
+
+
+keyword_matcher = KeywordMatcher.from_taxonomy(skill_taxonomy)
@@ -0,0 +1,243 @@
+"""
+pdflatex compile pool.
+
+Compiles run as asyncio subprocesses behind a concurrency limit and a
+bounded wait queue, so bursts of PDF downloads queue up (or are turned away)
+instead of starting an unbounded number of TeX processes. The toolchain is
+probed once at startup rather than on every request.
+
+Repeat preambles are the other big cost: every compile reloads the same
+packages. Once a preamble has been seen LATEX_FORMAT_MIN_USES times it is
+dumped into a format file (pdflatex -ini with mylatexformat) and later
+compiles load that format instead of re-reading the packages. If the format
+cannot be built (e.g. mylatexformat is not installed) compiles simply run
+without it. Preamble use counts and failed builds are remembered for the
+LATEX_FORMAT_TRACKED_PREAMBLES most recent preambles only, since clients
+can send any number of distinct ones.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.cache import LRUCache
+from app.metrics import LATEX_COMPILE_DURATION
+
+logger = logging.getLogger(__name__)
+
+LATEX_MAX_CONCURRENCY = int(os.getenv("LATEX_MAX_CONCURRENCY", str(os.cpu_count() or 2)))
+LATEX_MAX_QUEUE = int(os.getenv("LATEX_MAX_QUEUE", "32"))
+LATEX_COMPILE_TIMEOUT = float(os.getenv("LATEX_COMPILE_TIMEOUT_SECONDS", "60"))
+LATEX_FORMAT_CACHE = os.getenv("LATEX_FORMAT_CACHE", "true").lower() in ("1", "true", "yes")
+LATEX_FORMAT_DIR = os.getenv(
+    "LATEX_FORMAT_DIR",
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "latex_formats")
+)
+LATEX_FORMAT_MIN_USES = int(os.getenv("LATEX_FORMAT_MIN_USES", "2"))
+LATEX_FORMAT_TRACKED_PREAMBLES = int(os.getenv("LATEX_FORMAT_TRACKED_PREAMBLES", "1000"))
+
+BEGIN_DOCUMENT = "\\begin{document}"
+
+
+class CompileQueueFull(Exception):
+    """Raised when more compiles are waiting than the queue allows"""
+
+
+@dataclass
+class CompileResult:
+    returncode: int
+    stdout: str
+    stderr: str
+    pdf_path: str
+    log_path: str
+    used_format: bool = False
+
+
+async def run_pdflatex(*args: str, timeout: float, cwd: Optional[str] = None,
+                       env: Optional[Dict[str, str]] = None) -> Tuple[int, str, str]:
+    """
+    Run pdflatex without blocking the event loop.
+    Returns (returncode, stdout, stderr); raises asyncio.TimeoutError after killing
+    the process if it runs past the timeout.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "pdflatex", *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=env
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    return (process.returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"))
+
+
+def split_preamble(latex_code: str) -> Optional[str]:
+    """Everything before \\begin{document}, or None if there is no document body"""
+    index = latex_code.find(BEGIN_DOCUMENT)
+    if index <= 0:
+        return None
+    return latex_code[:index]
+
+
+class LatexCompilePool:
+    """Bounded pool of pdflatex compiles with a one-time toolchain probe and format cache"""
+
+    def __init__(self, max_concurrency: int = LATEX_MAX_CONCURRENCY, max_queue: int = LATEX_MAX_QUEUE,
+                 format_dir: str = LATEX_FORMAT_DIR, use_formats: bool = LATEX_FORMAT_CACHE):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.format_dir = os.path.abspath(format_dir)
+        self.use_formats = use_formats
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._active = 0
+        self._probe_lock = asyncio.Lock()
+        self.available: Optional[bool] = None
+        self.version: Optional[str] = None
+        self._preamble_uses = LRUCache(max_entries=LATEX_FORMAT_TRACKED_PREAMBLES)
+        # Only while a format is being built; dropped once it is built or has failed
+        self._format_locks: Dict[str, asyncio.Lock] = {}
+        self._failed_formats = LRUCache(max_entries=LATEX_FORMAT_TRACKED_PREAMBLES)
+
+    async def probe(self) -> bool:
+        """Check for pdflatex once; later calls return the remembered answer"""
+        async with self._probe_lock:
+            if self.available is None:
+                try:
+                    returncode, stdout, _ = await run_pdflatex("--version", timeout=10)
+                    self.available = returncode == 0
+                    self.version = stdout.splitlines()[0] if stdout else None
+                except (FileNotFoundError, asyncio.TimeoutError):
+                    self.available = False
+                logger.debug("pdflatex available: %s (%s)", self.available, self.version)
+            return self.available
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self._active,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "cached_formats": len([f for f in os.listdir(self.format_dir) if f.endswith(".fmt")])
+            if os.path.isdir(self.format_dir) else 0,
+        }
+
+    async def compile(self, latex_code: str, output_dir: str, jobname: str = "resume",
+                      timeout: float = LATEX_COMPILE_TIMEOUT) -> CompileResult:
+        """
+        Compile latex_code into output_dir/<jobname>.pdf.
+        Raises CompileQueueFull when the wait queue is full and
+        asyncio.TimeoutError when pdflatex runs past the timeout.
+        """
+        if self._waiting >= self.max_queue:
+            raise CompileQueueFull(f"{self._waiting} compiles already waiting")
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._active += 1
+        try:
+            tex_path = os.path.join(output_dir, f"{jobname}.tex")
+            with open(tex_path, "w", encoding="utf-8") as f:
+                f.write(latex_code)
+
+            format_name = await self._format_for(latex_code)
+            if format_name:
+                result = await self._run(tex_path, output_dir, jobname, timeout, format_name)
+                if result.returncode == 0 and os.path.exists(result.pdf_path):
+                    return result
+                # A stale or incompatible format should never cost the user their PDF
+                logger.warning("Compile with format %s failed, retrying without it", format_name)
+                self._failed_formats.set(format_name, True)
+            return await self._run(tex_path, output_dir, jobname, timeout, None)
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    async def _run(self, tex_path: str, output_dir: str, jobname: str, timeout: float,
+                   format_name: Optional[str]) -> CompileResult:
+        args = ["-interaction=nonstopmode", "-output-directory", output_dir, f"-jobname={jobname}"]
+        env = None
+        if format_name:
+            args.append(f"-fmt={format_name}")
+            # Trailing separator keeps the distribution's default format path
+            env = {**os.environ, "TEXFORMATS": self.format_dir + os.pathsep}
+        with LATEX_COMPILE_DURATION.time(outcome="error", format="yes" if format_name else "no") as labels:
+            try:
+                returncode, stdout, stderr = await run_pdflatex(*args, tex_path, timeout=timeout, env=env)
+            except asyncio.TimeoutError:
+                labels["outcome"] = "timeout"
+                raise
+            labels["outcome"] = "ok" if returncode == 0 else "failed"
+        return CompileResult(
+            returncode=returncode,
+            stdout=stdout,
+            stderr=stderr,
+            pdf_path=os.path.join(output_dir, f"{jobname}.pdf"),
+            log_path=os.path.join(output_dir, f"{jobname}.log"),
+            used_format=format_name is not None
+        )
+
+    async def _format_for(self, latex_code: str) -> Optional[str]:
+        """Name of a precompiled format for this document's preamble, building it if it is now common"""
+        if not self.use_formats:
+            return None
+        preamble = split_preamble(latex_code)
+        if preamble is None:
+            return None
+        format_name = "preamble-" + hashlib.sha256(preamble.encode("utf-8")).hexdigest()[:16]
+        if self._failed_formats.peek(format_name):
+            return None
+        if os.path.exists(os.path.join(self.format_dir, f"{format_name}.fmt")):
+            return format_name
+
+        uses = self._preamble_uses.peek(format_name, 0) + 1
+        self._preamble_uses.set(format_name, uses)
+        if uses < LATEX_FORMAT_MIN_USES:
+            return None
+
+        lock = self._format_locks.setdefault(format_name, asyncio.Lock())
+        async with lock:
+            if os.path.exists(os.path.join(self.format_dir, f"{format_name}.fmt")):
+                return format_name
+            if self._failed_formats.peek(format_name):
+                return None
+            try:
+                built = await self._build_format(format_name, preamble)
+            finally:
+                # Later compiles find the .fmt file or the failure; waiters still hold the lock object
+                self._format_locks.pop(format_name, None)
+                self._preamble_uses.invalidate(format_name)
+            return format_name if built else None
+
+    async def _build_format(self, format_name: str, preamble: str) -> bool:
+        os.makedirs(self.format_dir, exist_ok=True)
+        source_path = os.path.join(self.format_dir, f"{format_name}.tex")
+        with open(source_path, "w", encoding="utf-8") as f:
+            f.write(preamble + BEGIN_DOCUMENT + "\n\\end{document}\n")
+        try:
+            returncode, _, _ = await run_pdflatex(
+                "-ini", f"-jobname={format_name}", "-interaction=nonstopmode",
+                "&pdflatex", "mylatexformat.ltx", source_path,
+                timeout=LATEX_COMPILE_TIMEOUT, cwd=self.format_dir
+            )
+        except asyncio.TimeoutError:
+            returncode = -1
+        built = returncode == 0 and os.path.exists(os.path.join(self.format_dir, f"{format_name}.fmt"))
+        logger.debug("Built LaTeX format %s: %s", format_name, built)
+        if not built:
+            self._failed_formats.set(format_name, True)
+        return built
+
+
+compile_pool = LatexCompilePool()
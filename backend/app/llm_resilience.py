@@ -0,0 +1,369 @@
+"""
+Timeouts, retries, hedged requests and a circuit breaker for LLM calls.
+
+Every app.utils.call_gpt* call goes through call_with_retries (or its async
+twin) with the RetryPolicy of its prompt template:
+
+- each attempt has a timeout, and all attempts of a call share a deadline
+  that stays under the pipeline's stage timeout, so a stage gets an error
+  it can fall back from instead of being abandoned by the executor
+  (remaining_deadline() lets an attempt cap its own waits, e.g. for rate
+  limit capacity, by what is left of it);
+- connection errors, timeouts, 429s and 5xx responses are retried with
+  full-jitter exponential backoff, waiting at least as long as the
+  response's Retry-After header says (and giving up straight away if that
+  is past the deadline); a 429 for an exhausted quota is not retried;
+- templates named in LLM_HEDGE_STAGES send a duplicate request when the
+  first has not answered after LLM_HEDGE_DELAY_SECONDS, and use whichever
+  reply arrives first. Both requests are billed, so keep this to short,
+  latency-critical prompts;
+- a circuit breaker opens after LLM_BREAKER_FAILURES consecutive calls
+  failed with an outage error (or at once on an authentication error).
+  While it is open calls raise CircuitOpenError immediately, so callers go
+  straight to their local fallbacks; after LLM_OUTAGE_COOLDOWN_SECONDS one
+  probe call is let through, and its outcome closes or re-opens the breaker.
+
+The OpenAI clients are created with max_retries=0 so the SDK does not
+retry underneath this policy.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "8"))
+LLM_HEDGE_STAGES = {name.strip() for name in os.getenv("LLM_HEDGE_STAGES", "").split(",") if name.strip()}
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "3"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_OUTAGE_COOLDOWN = float(os.getenv("LLM_OUTAGE_COOLDOWN_SECONDS", "60"))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    timeout: float   # seconds per attempt
+    deadline: float  # seconds for all attempts and backoff together
+    max_attempts: int = LLM_MAX_ATTEMPTS
+
+
+# Per prompt template (the metrics stage label). Deadlines stay under the
+# matching STAGE_TIMEOUTS in app.tailoring.
+RETRY_POLICIES = {
+    "experience_years": RetryPolicy(timeout=15, deadline=40),
+    "skills": RetryPolicy(timeout=15, deadline=40),
+    "job_requirements": RetryPolicy(timeout=20, deadline=55),
+    "resume_fields": RetryPolicy(timeout=25, deadline=55),
+    "job_analysis": RetryPolicy(timeout=25, deadline=55),
+    "ats_resume": RetryPolicy(timeout=45, deadline=85),
+    "latex_resume": RetryPolicy(timeout=60, deadline=115),
+}
+DEFAULT_RETRY_POLICY = RetryPolicy(timeout=30, deadline=60)
+
+
+def retry_policy(stage: str) -> RetryPolicy:
+    return RETRY_POLICIES.get(stage, DEFAULT_RETRY_POLICY)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open"""
+
+
+def outage_errors() -> tuple:
+    """Errors that mean the API itself is unusable right now (not a bad prompt)"""
+    import openai
+    return (openai.APIConnectionError, openai.RateLimitError,
+            openai.InternalServerError, openai.AuthenticationError)
+
+
+def is_retryable(error: Exception) -> bool:
+    import openai
+    if isinstance(error, openai.RateLimitError):
+        # An exhausted quota does not come back within a retry budget
+        return getattr(error, "code", None) != "insufficient_quota"
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409) or error.status_code >= 500
+    return False
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the Retry-After(-ms) header of an API error response, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    for header, divisor in (("retry-after-ms", 1000), ("retry-after", 1)):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) / divisor)
+        except ValueError:
+            pass
+    # HTTP-date form
+    import email.utils
+    parsed = email.utils.parsedate_tz(headers.get("retry-after") or "")
+    return max(0.0, email.utils.mktime_tz(parsed) - time.time()) if parsed else None
+
+
+def backoff_delay(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff after the given 0-based attempt, but never below Retry-After"""
+    delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+    server_delay = retry_after(error)
+    return max(delay, server_delay) if server_delay is not None else delay
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_OUTAGE_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Whether a call could be let through now (without reserving the half-open probe)"""
+        return self.state == self.CLOSED or time.monotonic() >= self.opened_at + self.reset_timeout
+
+    def allow(self) -> bool:
+        """Whether to make a call now; in half-open state only one probe at a time is allowed"""
+        return self.admit() is not None
+
+    def admit(self) -> Optional[float]:
+        """
+        allow() for a call that will report back: None when refused, else a
+        probe id for release_probe() (0.0 for calls made while closed)
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            now = time.monotonic()
+            if now < self.opened_at + self.reset_timeout:
+                return None
+            # An abandoned probe (e.g. a cancelled request) does not block the breaker for long
+            if self.state == self.HALF_OPEN and now < self._probe_started + self.reset_timeout:
+                return None
+            self._transition(self.HALF_OPEN)
+            self._probe_started = now
+            return now
+
+    def release_probe(self, probe: float):
+        """
+        Free the half-open probe slot if its call ended without a verdict
+        (e.g. it was cancelled), so the next call can probe straight away
+        """
+        with self._lock:
+            if probe and self.state == self.HALF_OPEN and self._probe_started == probe:
+                self._probe_started = 0.0
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open(error)
+
+    def trip(self, error: Exception):
+        """Open the breaker now, whatever the failure count"""
+        with self._lock:
+            self._open(error)
+
+    def _open(self, error: Exception):
+        self.opened_at = time.monotonic()
+        if self.state != self.OPEN:
+            self._transition(self.OPEN)
+            logger.warning("OpenAI API unavailable (%s), circuit open for %ss",
+                           type(error).__name__, self.reset_timeout)
+
+    def _transition(self, state: str):
+        self.state = state
+        metrics.LLM_BREAKER_TRANSITIONS.inc(state=state)
+
+
+llm_breaker = CircuitBreaker()
+
+
+def _admit(stage: str) -> float:
+    """The breaker's probe id for this call; raises CircuitOpenError if it is refused"""
+    probe = llm_breaker.admit()
+    if probe is None:
+        metrics.LLM_SHORT_CIRCUITS.inc(stage=stage)
+        raise CircuitOpenError(f"LLM circuit open, not calling {stage}")
+    return probe
+
+
+def record_call_failure(error: Exception):
+    """
+    Feed the final error of a call to the breaker. Every error settles a
+    half-open probe: outage errors re-open the breaker, anything else (the
+    API answered but did not like the request, a reply that would not parse,
+    no rate limit capacity) is no sign of an outage and closes it.
+    """
+    import openai
+    if isinstance(error, openai.AuthenticationError):
+        llm_breaker.trip(error)
+    elif isinstance(error, outage_errors()):
+        llm_breaker.record_failure(error)
+    else:
+        llm_breaker.record_success()
+
+
+def _next_delay(stage: str, attempt: int, error: Exception, policy: RetryPolicy, deadline: float) -> Optional[float]:
+    """Seconds to wait before retrying, or None to give up"""
+    if attempt + 1 >= policy.max_attempts or not is_retryable(error):
+        return None
+    delay = backoff_delay(attempt, error)
+    if time.monotonic() + delay >= deadline:
+        return None
+    metrics.LLM_RETRIES.inc(stage=stage, error=type(error).__name__)
+    logger.warning("LLM call %s failed (%s), retry %s in %.2fs", stage, type(error).__name__, attempt + 1, delay)
+    return delay
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_HEDGE_WORKERS", "8")),
+                                     thread_name_prefix="llm-hedge")
+
+
+def _hedged(stage: str, attempt: Callable[[float], T], timeout: float) -> T:
+    """Run attempt in the hedge pool, adding a duplicate if the first is slow; the first success wins"""
+    context = contextvars.copy_context()
+    primary = _hedge_executor.submit(context.copy().run, attempt, timeout)
+    done, _ = wait([primary], timeout=min(LLM_HEDGE_DELAY, timeout))
+    if done:
+        return primary.result()
+    hedge = _hedge_executor.submit(context.copy().run, attempt, timeout)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                metrics.LLM_HEDGES.inc(stage=stage, winner="primary" if future is primary else "hedge")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+async def _hedged_async(stage: str, attempt: Callable[[float], Awaitable[T]], timeout: float) -> T:
+    primary = asyncio.ensure_future(attempt(timeout))
+    done, _ = await asyncio.wait([primary], timeout=min(LLM_HEDGE_DELAY, timeout))
+    if done:
+        return primary.result()
+    hedge = asyncio.ensure_future(attempt(timeout))
+    pending = {primary, hedge}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    metrics.LLM_HEDGES.inc(stage=stage, winner="primary" if task is primary else "hedge")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# time.monotonic() deadline of the call_with_retries call in progress
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_call_deadline", default=None)
+
+
+def remaining_deadline() -> Optional[float]:
+    """Seconds left before the current call's retry deadline; None outside call_with_retries"""
+    deadline = _deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def call_with_retries(stage: str, attempt: Callable[[float], T]) -> T:
+    """
+    Call attempt(timeout_seconds) under the stage's retry policy, hedging
+    stages in LLM_HEDGE_STAGES; raises CircuitOpenError while the breaker is open
+    """
+    probe = _admit(stage)
+    policy = retry_policy(stage)
+    deadline = time.monotonic() + policy.deadline
+    token = _deadline.set(deadline)
+    try:
+        return _call_with_retries(stage, attempt, policy, deadline)
+    finally:
+        _deadline.reset(token)
+        llm_breaker.release_probe(probe)
+
+
+def _call_with_retries(stage: str, attempt: Callable[[float], T], policy: RetryPolicy, deadline: float) -> T:
+    for number in range(policy.max_attempts):
+        timeout = max(0.1, min(policy.timeout, deadline - time.monotonic()))
+        try:
+            if stage in LLM_HEDGE_STAGES:
+                result = _hedged(stage, attempt, timeout)
+            else:
+                result = attempt(timeout)
+        except Exception as e:
+            delay = _next_delay(stage, number, e, policy, deadline)
+            if delay is None:
+                record_call_failure(e)
+                raise
+            time.sleep(delay)
+        else:
+            llm_breaker.record_success()
+            return result
+
+
+async def call_with_retries_async(stage: str, attempt: Callable[[float], Awaitable[T]], hedge: bool = True) -> T:
+    """
+    Async variant of call_with_retries; waiting out a backoff does not block
+    the event loop. hedge=False never duplicates the request (e.g. for streams).
+    """
+    probe = _admit(stage)
+    policy = retry_policy(stage)
+    deadline = time.monotonic() + policy.deadline
+    token = _deadline.set(deadline)
+    try:
+        return await _call_with_retries_async(stage, attempt, hedge, policy, deadline)
+    finally:
+        _deadline.reset(token)
+        llm_breaker.release_probe(probe)
+
+
+async def _call_with_retries_async(stage: str, attempt: Callable[[float], Awaitable[T]], hedge: bool,
+                                   policy: RetryPolicy, deadline: float) -> T:
+    for number in range(policy.max_attempts):
+        timeout = max(0.1, min(policy.timeout, deadline - time.monotonic()))
+        try:
+            if hedge and stage in LLM_HEDGE_STAGES:
+                result = await _hedged_async(stage, attempt, timeout)
+            else:
+                result = await attempt(timeout)
+        except Exception as e:
+            delay = _next_delay(stage, number, e, policy, deadline)
+            if delay is None:
+                record_call_failure(e)
+                raise
+            await asyncio.sleep(delay)
+        else:
+            llm_breaker.record_success()
+            return result
@@ -0,0 +1,406 @@
+"""
+LLM-free extractors for the local tailoring mode.
+
+Every stage of the normal pipeline calls the OpenAI API, so an outage or a
+rate-limit wall takes tailoring down with it. These functions produce the
+same shapes as their LLM counterparts from spaCy entities, the taxonomy
+keyword matcher and a handful of patterns:
+
+- extract_resume_fields_locally  ~ extract_resume_fields_with_llm
+- analyze_job_description_locally ~ extract_job_analysis
+- tailor_resume_fields_locally   ~ generate_ats_resume
+- render_latex_resume            ~ generate_latex_resume (deterministic template)
+
+The results are plainer than the model's, but a full /tailor response
+takes a fraction of a second and costs nothing.
+"""
+import logging
+import re
+import threading
+from typing import Dict, List, Optional
+
+from app.experience_dates import DATE_RANGE_RE
+from app.keyword_matcher import keyword_matcher
+from app.skill_taxonomy import skill_taxonomy
+
+logger = logging.getLogger(__name__)
+
+SPACY_MODEL = "en_core_web_sm"
+
+# spaCy and its model take seconds and a few hundred MB to load, and only
+# the local mode's entity extraction needs them, so they load on first use
+# (or in app.warmup, before worker processes are forked).
+_nlp = None
+_nlp_lock = threading.Lock()
+_nlp_unavailable = False
+
+
+def get_nlp():
+    """The spaCy pipeline, loaded once per process"""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL)
+                logger.debug("Loaded spaCy model %s", SPACY_MODEL)
+    return _nlp
+
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "profile", "objective", "about me"],
+    "experience": ["experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment"],
+    "education": ["education", "academic background", "qualifications"],
+    "skills": ["skills", "technical skills", "core competencies", "technologies"],
+    "projects": ["projects", "personal projects", "key projects"],
+}
+_SECTION_NAMES = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+_HEADING_RE = re.compile(
+    r"^\s*(" + "|".join(sorted(map(re.escape, _SECTION_NAMES), key=len, reverse=True)) + r")\s*:?\s*$",
+    re.IGNORECASE | re.MULTILINE
+)
+# Text extracted from LaTeX arrives on a single line; there only upper-case headings are trusted
+_INLINE_HEADING_RE = re.compile(
+    r"(?<![A-Za-z])(" + "|".join(sorted(map(re.escape, (a.upper() for a in _SECTION_NAMES)), key=len, reverse=True))
+    + r")(?![A-Za-z])\s*:?"
+)
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"(?<!\w)\+?\(?\d[\d\s().-]{7,}\d(?!\w)")
+BULLET_RE = re.compile(r"^\s*(?:[-*•▪●◦‣]|\d+[.)])\s*")
+DEGREE_RE = re.compile(
+    r"\b(Bachelor(?:'s)?|Master(?:'s)?|Ph\.?D\.?|Doctorate|Associate(?:'s)?|Diploma|MBA|"
+    r"B\.?S\.?c?|M\.?S\.?c?|B\.?A\.?|M\.?A\.?|B\.?Tech|M\.?Tech|B\.?E\.?|M\.?E\.?)(?![A-Za-z])"
+)
+INSTITUTION_RE = re.compile(r"(?:[A-Z][\w.&'-]*\s+)*(?:University|College|Institute|School|Academy)"
+                            r"(?:\s+of(?:\s+[A-Z][\w&'-]*)+)?")
+LOCATION_RE = re.compile(r"\b[A-Z][a-z]+(?: [A-Z][a-z]+)*, [A-Z]{2}\b")
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+
+REQUIRED_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years?|yrs?)\b", re.IGNORECASE)
+PREFERRED_RE = re.compile(r"\b(preferred|nice to have|nice-to-have|bonus|a plus|desirable|good to have)\b",
+                          re.IGNORECASE)
+REQUIRED_HEADING_RE = re.compile(r"\b(requirements|required|qualifications|must have|must-have|you have|"
+                                 r"what you.ll need|responsibilities|what you.ll do)\b", re.IGNORECASE)
+EDUCATION_LEVELS = [
+    ("phd", re.compile(r"\b(ph\.?d|doctorate)\b", re.IGNORECASE)),
+    ("master's", re.compile(r"\b(master'?s?|m\.?sc?|mba)\b", re.IGNORECASE)),
+    ("bachelor's", re.compile(r"\b(bachelor'?s?|b\.?sc?|b\.?tech|undergraduate degree)\b", re.IGNORECASE)),
+]
+SENIORITY = [
+    ("lead", re.compile(r"\b(lead|principal|staff|head of|architect)\b", re.IGNORECASE)),
+    ("senior", re.compile(r"\b(senior|sr\.?)\b", re.IGNORECASE)),
+    ("entry", re.compile(r"\b(junior|jr\.?|entry[- ]level|graduate|intern)\b", re.IGNORECASE)),
+]
+INDUSTRIES = [
+    ("finance", re.compile(r"\b(bank|banking|fintech|trading|financial|insurance)\b", re.IGNORECASE)),
+    ("healthcare", re.compile(r"\b(health|healthcare|clinical|medical|patient|hospital)\b", re.IGNORECASE)),
+    ("retail", re.compile(r"\b(retail|e-?commerce)\b", re.IGNORECASE)),
+    ("education", re.compile(r"\b(edtech|university|school|learning platform)\b", re.IGNORECASE)),
+]
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """Map section name ("header", "experience", ...) to its text"""
+    headings = list(_HEADING_RE.finditer(text))
+    if not headings:
+        headings = list(_INLINE_HEADING_RE.finditer(text))
+    sections = {"header": text[:headings[0].start()] if headings else text}
+    for heading, following in zip(headings, headings[1:] + [None]):
+        name = _SECTION_NAMES[heading.group(1).lower()]
+        body = text[heading.end():following.start() if following else len(text)]
+        # Keep the first occurrence; later ones are usually mentions inside the body
+        sections.setdefault(name, body.strip())
+    return sections
+
+
+def _lines(text: str) -> List[str]:
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def _first_entity(text: str, label: str) -> Optional[str]:
+    """
+    First spaCy entity with this label, or None when spaCy or its model is
+    unavailable (or NER fails) so callers fall back to their patterns
+    """
+    global _nlp_unavailable
+    if _nlp_unavailable:
+        return None
+    try:
+        nlp = get_nlp()
+    except (ImportError, OSError) as e:
+        # Not installed or model not downloaded; don't retry the load on every resume
+        _nlp_unavailable = True
+        logger.warning("spaCy model %s unavailable (%s), using pattern matching only", SPACY_MODEL, e)
+        return None
+    try:
+        ents = nlp(text).ents
+    except Exception as e:
+        logger.warning("spaCy NER failed (%s), using pattern matching", e)
+        return None
+    for ent in ents:
+        if ent.label_ == label:
+            return ent.text.strip()
+    return None
+
+
+def _first_match(pattern: re.Pattern, text: str) -> str:
+    match = pattern.search(text)
+    return match.group(0) if match else ""
+
+
+def _guess_name(header: str) -> str:
+    name = _first_entity(header[:300], "PERSON")
+    if name:
+        return name
+    for line in _lines(header)[:3]:
+        words = line.split()
+        if 2 <= len(words) <= 4 and all(w[:1].isupper() and w.replace(".", "").replace("-", "").isalpha() for w in words):
+            return line
+    return ""
+
+
+def _split_title_company(line: str) -> Dict[str, str]:
+    line = DATE_RANGE_RE.sub("", line).strip(" ,|-–—()")
+    for separator in (" at ", " @ ", " | ", " - ", " – ", " — ", ", "):
+        if separator in line:
+            title, company = line.split(separator, 1)
+            return {"title": title.strip(" ,|-–—"), "company": company.strip(" ,|-–—")}
+    return {"title": line, "company": ""}
+
+
+def _experience_entries(section: str) -> List[dict]:
+    """
+    One entry per role. A role starts at a line with a date range, or at a
+    title/company line directly above one; other lines are its bullets.
+    """
+    lines = _lines(section)
+    entries = []
+    awaiting_dates = False
+    for i, line in enumerate(lines):
+        is_bullet = BULLET_RE.match(line) is not None
+        date_range = None if is_bullet else DATE_RANGE_RE.search(line)
+        if date_range:
+            parsed = _split_title_company(line)
+            if awaiting_dates:
+                entry = entries[-1]
+                if parsed["title"] and not entry["company"]:
+                    entry["company"] = parsed["title"]
+            else:
+                entry = {**parsed, "bullets": []}
+                entries.append(entry)
+            entry["start"], entry["end"] = date_range.group("start"), date_range.group("end")
+            awaiting_dates = False
+            continue
+        next_has_dates = (i + 1 < len(lines) and not BULLET_RE.match(lines[i + 1])
+                          and DATE_RANGE_RE.search(lines[i + 1]) is not None)
+        if not is_bullet and (next_has_dates or not entries):
+            entries.append({**_split_title_company(line), "start": "", "end": "", "bullets": []})
+            awaiting_dates = next_has_dates
+        elif entries:
+            entries[-1]["bullets"].append(BULLET_RE.sub("", line))
+    return entries
+
+
+def _education_entries(section: str) -> List[dict]:
+    entries = []
+    for line in _lines(section):
+        degree = DEGREE_RE.search(line)
+        institution = INSTITUTION_RE.search(line)
+        if not degree and not institution:
+            continue
+        year = YEAR_RE.findall(line)
+        entries.append({
+            "degree": line[degree.start():].split(",")[0].strip() if degree else "",
+            "institution": institution.group(0).strip() if institution else "",
+            "year": year[-1] if year else "",
+        })
+    return entries
+
+
+def _project_entries(section: str) -> List[dict]:
+    projects = []
+    for line in _lines(section):
+        line = BULLET_RE.sub("", line)
+        for separator in (": ", " - ", " – ", " — "):
+            if separator in line:
+                name, description = line.split(separator, 1)
+                projects.append({"name": name.strip(), "description": description.strip()})
+                break
+        else:
+            if projects:
+                projects[-1]["description"] = (projects[-1]["description"] + " " + line).strip()
+            else:
+                projects.append({"name": line, "description": ""})
+    return projects
+
+
+def _section_skills(section: str) -> List[str]:
+    items = re.split(r"[,;•|\n]", section)
+    skills = []
+    for item in items:
+        item = re.sub(r"^[^:]{0,40}:", "", item).strip(" .-*")
+        if 1 < len(item) <= 40:
+            skills.append(skill_taxonomy.canonical(item))
+    return skills
+
+
+def extract_resume_fields_locally(resume_text: str) -> dict:
+    """Structured resume fields (same keys as the LLM parser) without calling the API"""
+    sections = split_sections(resume_text)
+    header = sections["header"]
+    email = EMAIL_RE.search(resume_text)
+    phone = PHONE_RE.search(header) or PHONE_RE.search(resume_text)
+    skills = list(dict.fromkeys(keyword_matcher.find_skills(resume_text) +
+                                _section_skills(sections.get("skills", ""))))
+    return {
+        "name": _guess_name(header),
+        "email": email.group(0) if email else "",
+        "phone": phone.group(0).strip() if phone else "",
+        "location": _first_entity(header[:300], "GPE") or _first_match(LOCATION_RE, header[:300]),
+        "summary": " ".join(_lines(sections.get("summary", ""))),
+        "experience": _experience_entries(sections.get("experience", "")),
+        "education": _education_entries(sections.get("education", "")),
+        "skills": skills,
+        "projects": _project_entries(sections.get("projects", "")),
+    }
+
+
+def _required_years(text: str) -> int:
+    for match in REQUIRED_YEARS_RE.finditer(text):
+        years = int(match.group(1))
+        if 0 < years <= 30:
+            return years
+    return 0
+
+
+def _first_label(text: str, patterns, default: Optional[str]) -> Optional[str]:
+    for label, pattern in patterns:
+        if pattern.search(text):
+            return label
+    return default
+
+
+def analyze_job_description_locally(job_description: str) -> Dict[str, any]:
+    """
+    Skills and requirements of a posting (the shape of extract_job_analysis).
+    Skills mentioned in a "preferred / nice to have / bonus" line or section
+    are preferred; every other skill is required.
+    """
+    required, preferred = [], []
+    in_preferred_section = False
+    for line in job_description.splitlines() or [job_description]:
+        found = keyword_matcher.find_skills(line)
+        is_preferred = PREFERRED_RE.search(line) is not None
+        if not found:
+            # Heading-like lines without skills switch sections until the next heading
+            if is_preferred:
+                in_preferred_section = True
+            elif REQUIRED_HEADING_RE.search(line):
+                in_preferred_section = False
+            continue
+        (preferred if is_preferred or in_preferred_section else required).extend(found)
+
+    required = list(dict.fromkeys(required))
+    preferred = [skill for skill in dict.fromkeys(preferred) if skill not in required]
+    required_years = _required_years(job_description)
+    level = _first_label(job_description[:500], SENIORITY, None)
+    if level is None:
+        level = "entry" if required_years < 2 else "mid" if required_years < 5 else "senior"
+    return {
+        "skills": required + preferred,
+        "requirements": {
+            "required_years": required_years,
+            "required_skills": required,
+            "preferred_skills": preferred,
+            "required_education": _first_label(job_description, EDUCATION_LEVELS, ""),
+            "experience_level": level,
+            "industry": _first_label(job_description, INDUSTRIES, "tech"),
+        },
+    }
+
+
+def tailor_resume_fields_locally(resume_fields: dict, job_description: str) -> dict:
+    """
+    Deterministic stand-in for the ATS rewrite: nothing is invented; skills the
+    posting asks for are moved to the front and experience bullets that mention
+    them are listed first.
+    """
+    wanted = set(skill_taxonomy.key(skill) for skill in keyword_matcher.find_skills(job_description))
+
+    def relevance(text: str) -> int:
+        return -sum(1 for skill in keyword_matcher.find_skills(text) if skill_taxonomy.key(skill) in wanted)
+
+    skills = resume_fields.get("skills", []) or []
+    tailored = dict(resume_fields)
+    tailored["skills"] = sorted(skills, key=lambda skill: skill_taxonomy.key(skill) not in wanted)
+    tailored["experience"] = [
+        {**entry, "bullets": sorted(entry.get("bullets", []) or [], key=relevance)}
+        for entry in resume_fields.get("experience", []) or []
+    ]
+    return tailored
+
+
+LATEX_SPECIAL = {
+    "\\": r"\textbackslash{}", "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#", "_": r"\_",
+    "{": r"\{", "}": r"\}", "~": r"\textasciitilde{}", "^": r"\textasciicircum{}",
+}
+
+
+def latex_escape(value) -> str:
+    return "".join(LATEX_SPECIAL.get(ch, ch) for ch in str(value or ""))
+
+
+def render_latex_resume(resume_fields: dict, job_description: str = "") -> str:
+    """Render structured resume fields with a fixed LaTeX template"""
+    e = latex_escape
+    lines = [
+        r"\documentclass[11pt]{article}",
+        r"\usepackage[margin=0.75in]{geometry}",
+        r"\usepackage{enumitem}",
+        r"\setlist{nosep}",
+        r"\pagestyle{empty}",
+        r"\begin{document}",
+        r"\begin{center}",
+        rf"{{\LARGE\bfseries {e(resume_fields.get('name'))}}}\\[2pt]",
+    ]
+    contact = [e(resume_fields.get(key)) for key in ("email", "phone", "location") if resume_fields.get(key)]
+    if contact:
+        lines.append(" \\textbar{} ".join(contact))
+    lines.append(r"\end{center}")
+
+    if resume_fields.get("summary"):
+        lines += [r"\section*{Summary}", e(resume_fields["summary"])]
+
+    experience = resume_fields.get("experience") or []
+    if experience:
+        lines.append(r"\section*{Experience}")
+        for job in experience:
+            dates = " -- ".join(e(job.get(key)) for key in ("start", "end") if job.get(key))
+            heading = ", ".join(e(job.get(key)) for key in ("title", "company") if job.get(key))
+            lines.append(rf"\textbf{{{heading}}} \hfill {dates}")
+            bullets = [b for b in job.get("bullets") or [] if b]
+            if bullets:
+                lines.append(r"\begin{itemize}")
+                lines += [rf"\item {e(bullet)}" for bullet in bullets]
+                lines.append(r"\end{itemize}")
+            lines.append(r"\smallskip")
+
+    education = resume_fields.get("education") or []
+    if education:
+        lines.append(r"\section*{Education}")
+        for school in education:
+            heading = ", ".join(e(school.get(key)) for key in ("degree", "institution") if school.get(key))
+            lines.append(rf"{heading} \hfill {e(school.get('year'))}\\")
+
+    if resume_fields.get("skills"):
+        lines += [r"\section*{Skills}", ", ".join(e(skill) for skill in resume_fields["skills"])]
+
+    projects = resume_fields.get("projects") or []
+    if projects:
+        lines += [r"\section*{Projects}", r"\begin{itemize}"]
+        lines += [rf"\item \textbf{{{e(p.get('name'))}}}: {e(p.get('description'))}" for p in projects]
+        lines.append(r"\end{itemize}")
+
+    lines.append(r"\end{document}")
+    return "\n".join(lines) + "\n"
@@ -1,12 +1,65 @@
-from fastapi import FastAPI, UploadFile, File, Form, Response
+from fastapi import FastAPI, UploadFile, File, Form, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.tailoring import process_resume
-from app.utils import extract_text_from_pdf, extract_text_from_latex
+from pydantic import BaseModel
+from typing import List
+from app.tailoring import (process_resume_async, process_resume_events, process_resume_batch_async,
+                           rank_resumes_events, prewarm_job_descriptions, BATCH_MAX_JOB_DESCRIPTIONS, TAILOR_MODES)
+from app.jd_store import get_jd_store
+from app.resume_cache import resume_cache, resume_file_hash
+from app.latex import compile_pool, CompileQueueFull
+from app.artifacts import pdf_artifacts, latex_source_hash
+from app.jobs import job_queue, QueueFull
+from app.metrics import registry as metrics_registry
+from app.rate_limit import rate_limiter
+from app.warmup import WARMUP, warm_up, set_ready, is_ready, readiness
+from app.tracing import configure_logging, start_trace, get_trace, span
+from contextlib import asynccontextmanager
+from app.utils import extract_text_from_pdf, extract_text_from_latex, llm_cache
+import asyncio
+import io
+import json
+import logging
+import re
 import tempfile
-import subprocess
 import os
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+configure_logging()
+
+# Under a pre-fork server with the app preloaded, this warms the parent once
+# and every worker inherits the result
+if WARMUP == "import":
+    warm_up()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP == "startup":
+        await run_in_threadpool(warm_up)
+    # Probe the LaTeX toolchain once instead of on every /latex-to-pdf call
+    await compile_pool.probe()
+    await job_queue.start()
+    set_ready(True)
+    yield
+    # Stop taking traffic before draining
+    set_ready(False)
+    # Let in-flight jobs finish; anything still queued runs after the restart
+    await job_queue.drain()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Give each request an id (X-Request-ID, echoed back) and a trace of its spans"""
+    request_id = request.headers.get("x-request-id", "")[:128] or None
+    trace = start_trace(request_id, f"{request.method} {request.url.path}")
+    # For streamed responses this covers the time to the response headers; later spans still join the trace
+    with span("request", method=request.method, path=request.url.path) as attributes:
+        response = await call_next(request)
+        attributes["status_code"] = response.status_code
+    response.headers["X-Request-ID"] = trace.request_id
+    return response
 
 @app.get("/")
 def read_root():
@@ -16,6 +69,50 @@ def read_root():
 def health_check():
     return {"status": "healthy", "message": "Backend is working correctly"}
 
+@app.get("/ready")
+def readiness_check(response: Response):
+    """200 once warm-up is done and job workers run; 503 while starting or draining"""
+    if not is_ready():
+        response.status_code = 503
+    return readiness()
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """LLM call, pipeline stage, pdflatex and text extraction metrics in Prometheus text format"""
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/traces/{request_id}")
+def request_trace(request_id: str):
+    """Timeline of a recent request: its spans with parent ids, offsets and durations"""
+    trace = get_trace(request_id)
+    if trace is None:
+        return JSONResponse(status_code=404, content={"error": "Trace not found"})
+    return trace
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"llm_responses": llm_cache.stats(), "parsed_resumes": resume_cache.stats(),
+            "latex_compiles": compile_pool.stats(), "pdf_artifacts": pdf_artifacts.stats(),
+            "jobs": job_queue.stats(), "llm_rate_limit": rate_limiter.stats()}
+
+class PrewarmRequest(BaseModel):
+    job_descriptions: List[str] = []
+    # Also refresh the N most reused stored postings
+    include_popular: int = 0
+
+@app.get("/job-descriptions/popular")
+def popular_job_descriptions(limit: int = 20):
+    """Stored job description analyses, most reused first"""
+    return {"postings": get_jd_store().popular(limit)}
+
+@app.post("/job-descriptions/prewarm")
+def prewarm_job_description_analyses(request: PrewarmRequest):
+    """Analyze postings ahead of time so /tailor calls for them skip the job-side LLM calls"""
+    job_descriptions = list(request.job_descriptions)
+    if request.include_popular > 0:
+        job_descriptions += [p["job_description"] for p in get_jd_store().popular(request.include_popular)]
+    return prewarm_job_descriptions(job_descriptions)
+
 # CORS Middleware
 origins = [
     "http://localhost:3000",
@@ -32,155 +129,420 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+async def parse_resume_upload(resume_file: UploadFile):
+    """
+    Read an uploaded PDF/LaTeX resume and extract its text.
+    Returns (resume_text, resume_hash, error); error is a response dict when
+    the file cannot be used. Text is cached by the sha256 of the upload, so
+    the same file is only parsed once.
+    """
+    resume_bytes = await resume_file.read()
+    resume_hash = resume_file_hash(resume_bytes)
+    filename = resume_file.filename.lower()
+    
+    logger.debug("Processing file: %s", filename)
+    
+    resume_text = resume_cache.get_text(resume_hash)
+    if resume_text is not None:
+        logger.debug("Reusing cached text for resume %s", resume_hash[:12])
+        return resume_text, resume_hash, None
+    
+    if filename.endswith('.pdf'):
+        try:
+            with span("extract_text", file_type="pdf", size=len(resume_bytes)):
+                resume_text = await run_in_threadpool(extract_text_from_pdf, io.BytesIO(resume_bytes))
+            if not resume_text or len(resume_text.strip()) < 50:
+                return None, resume_hash, {"error": "The PDF file appears to be empty or contains no readable text. Please ensure the PDF contains text (not just images) and try again."}
+        except Exception as pdf_error:
+            logger.error("PDF extraction failed: %s", pdf_error)
+            if "Stream has ended unexpectedly" in str(pdf_error) or "PdfStreamError" in str(pdf_error):
+                return None, resume_hash, {"error": "The PDF file appears to be corrupted or invalid. Please upload a valid PDF file or try converting your document to PDF again."}
+            else:
+                return None, resume_hash, {"error": f"Failed to extract text from PDF: {str(pdf_error)}"}
+    elif filename.endswith('.tex'):
+        try:
+            with span("extract_text", file_type="tex", size=len(resume_bytes)):
+                resume_text = await run_in_threadpool(extract_text_from_latex, io.BytesIO(resume_bytes))
+            if not resume_text or len(resume_text.strip()) < 50:
+                return None, resume_hash, {"error": "The LaTeX file appears to be empty or contains no readable content. Please check your file and try again."}
+        except Exception as tex_error:
+            logger.error("LaTeX extraction failed: %s", tex_error)
+            return None, resume_hash, {"error": f"Failed to extract text from LaTeX file: {str(tex_error)}"}
+    else:
+        return None, resume_hash, {"error": "Unsupported file type. Please upload a PDF or LaTeX (.tex) file."}
+    
+    resume_cache.put_text(resume_hash, resume_text)
+    return resume_text, resume_hash, None
+
+def invalid_mode_error(mode: str):
+    """Error dict for an unknown mode form field, else None"""
+    if mode.lower() not in TAILOR_MODES:
+        return {"error": f"Unknown mode '{mode}'. Use one of: {', '.join(TAILOR_MODES)}."}
+    return None
+
 @app.post("/tailor")
-def tailor_resume(
+async def tailor_resume(
     resume_file: UploadFile = File(...),
     job_description: str = Form(...),
-    target_match_percentage: int = Form(0)
+    target_match_percentage: int = Form(0),
+    mode: str = Form("auto")
 ):
+    """
+    mode is "llm" (OpenAI for every stage), "local" (spaCy and pattern
+    extraction, no API calls) or "auto" (local only while the API is down).
+    """
     try:
-        # SpooledTemporaryFile needs to be seeked to 0 before reading
-        resume_file.file.seek(0)
-        filename = resume_file.filename.lower()
-        
-        print(f"[DEBUG] Processing file: {filename}")
-        print(f"[DEBUG] Job description length: {len(job_description)}")
-        
-        if filename.endswith('.pdf'):
-            try:
-                resume_text = extract_text_from_pdf(resume_file.file)
-                if not resume_text or len(resume_text.strip()) < 50:
-                    return {"error": "The PDF file appears to be empty or contains no readable text. Please ensure the PDF contains text (not just images) and try again."}
-            except Exception as pdf_error:
-                print(f"[ERROR] PDF extraction failed: {str(pdf_error)}")
-                if "Stream has ended unexpectedly" in str(pdf_error) or "PdfStreamError" in str(pdf_error):
-                    return {"error": "The PDF file appears to be corrupted or invalid. Please upload a valid PDF file or try converting your document to PDF again."}
-                else:
-                    return {"error": f"Failed to extract text from PDF: {str(pdf_error)}"}
-        elif filename.endswith('.tex'):
-            try:
-                resume_text = extract_text_from_latex(resume_file.file)
-                if not resume_text or len(resume_text.strip()) < 50:
-                    return {"error": "The LaTeX file appears to be empty or contains no readable content. Please check your file and try again."}
-            except Exception as tex_error:
-                print(f"[ERROR] LaTeX extraction failed: {str(tex_error)}")
-                return {"error": f"Failed to extract text from LaTeX file: {str(tex_error)}"}
-        else:
-            return {"error": "Unsupported file type. Please upload a PDF or LaTeX (.tex) file."}
+        logger.debug("Job description length: %s", len(job_description))
+        error = invalid_mode_error(mode)
+        if error:
+            return error
+        resume_text, resume_hash, error = await parse_resume_upload(resume_file)
+        if error:
+            return error
+        
+        logger.debug("Extracted resume text length: %s", len(resume_text))
+        
+        result = await process_resume_async(resume_text, job_description, target_match_percentage,
+                                            resume_hash=resume_hash, mode=mode)
+        logger.debug("Process result keys: %s", list(result.keys()) if result else 'None')
         
-        print(f"[DEBUG] Extracted resume text length: {len(resume_text)}")
+        result["resume_hash"] = resume_hash
+        return result
+    except Exception as e:
+        logger.exception("Exception in tailor_resume: %s", e)
+        return {"error": f"Internal server error: {str(e)}"}
+
+@app.post("/tailor/batch")
+async def tailor_resume_batch(
+    resume_file: UploadFile = File(...),
+    job_descriptions: List[str] = Form(...),
+    top_k: int = Form(3),
+    mode: str = Form("auto")
+):
+    """
+    Score one resume against several job descriptions (repeat the
+    job_descriptions form field). Jobs come back ranked by match score; only
+    the top_k best matches get a tailored LaTeX resume.
+    """
+    try:
+        job_descriptions = [jd for jd in job_descriptions if jd.strip()]
+        logger.debug("Batch of %s job descriptions", len(job_descriptions))
+        if not job_descriptions:
+            return {"error": "Please provide at least one job description."}
+        if len(job_descriptions) > BATCH_MAX_JOB_DESCRIPTIONS:
+            return {"error": f"Please submit at most {BATCH_MAX_JOB_DESCRIPTIONS} job descriptions at a time."}
+        error = invalid_mode_error(mode)
+        if error:
+            return error
         
-        result = process_resume(resume_text, job_description, target_match_percentage)
-        print(f"[DEBUG] Process result keys: {list(result.keys()) if result else 'None'}")
+        resume_text, resume_hash, error = await parse_resume_upload(resume_file)
+        if error:
+            return error
         
+        result = await process_resume_batch_async(resume_text, job_descriptions, top_k, resume_hash=resume_hash,
+                                                  mode=mode)
+        result["resume_hash"] = resume_hash
         return result
     except Exception as e:
-        print(f"[ERROR] Exception in tailor_resume: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Exception in tailor_resume_batch: %s", e)
         return {"error": f"Internal server error: {str(e)}"}
 
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/tailor/stream")
+async def tailor_resume_stream(
+    resume_file: UploadFile = File(...),
+    job_description: str = Form(...),
+    target_match_percentage: int = Form(0),
+    mode: str = Form("auto")
+):
+    """
+    Streaming variant of /tailor using Server-Sent Events. Emits "skills",
+    "match_analysis", "ats_resume" and "latex_token" events as the pipeline
+    progresses, then a final "result" (same payload as /tailor) or "error".
+    """
+    logger.debug("Job description length: %s", len(job_description))
+    error = invalid_mode_error(mode)
+    if not error:
+        resume_text, resume_hash, error = await parse_resume_upload(resume_file)
+
+    async def event_stream():
+        if error:
+            yield format_sse("error", error)
+            return
+        try:
+            async for event, data in process_resume_events(resume_text, job_description, target_match_percentage,
+                                                           resume_hash=resume_hash, mode=mode):
+                if event == "result":
+                    data["resume_hash"] = resume_hash
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error("Exception in tailor_resume_stream: %s", e)
+            yield format_sse("error", {"error": f"Internal server error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def run_tailor_job(payload: dict) -> dict:
+    result = await process_resume_async(payload["resume_text"], payload["job_description"],
+                                        payload["target_match_percentage"], resume_hash=payload["resume_hash"],
+                                        mode=payload.get("mode"))
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    result["resume_hash"] = payload["resume_hash"]
+    return result
+
+job_queue.register("tailor", run_tailor_job)
+
+@app.post("/jobs/tailor", status_code=202)
+async def submit_tailor_job(
+    resume_file: UploadFile = File(...),
+    job_description: str = Form(...),
+    target_match_percentage: int = Form(0),
+    mode: str = Form("auto")
+):
+    """
+    Queue a /tailor run and return its job id straight away.
+    Poll GET /jobs/{job_id} (or subscribe to /jobs/{job_id}/events) and fetch
+    the payload from /jobs/{job_id}/result once the job has succeeded.
+    """
+    error = invalid_mode_error(mode)
+    if not error:
+        resume_text, resume_hash, error = await parse_resume_upload(resume_file)
+    if error:
+        return JSONResponse(status_code=400, content=error)
+    try:
+        job_id = job_queue.submit("tailor", {
+            "resume_text": resume_text,
+            "job_description": job_description,
+            "target_match_percentage": target_match_percentage,
+            "resume_hash": resume_hash,
+            "mode": mode,
+        })
+    except QueueFull as e:
+        logger.warning("Rejecting tailor job: %s", e)
+        return JSONResponse(status_code=503, headers={"Retry-After": "30"},
+                            content={"error": "Too many resumes are being tailored right now. Please try again shortly."})
+    return {"job_id": job_id, "status": "queued", "resume_hash": resume_hash}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return job
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    if job["status"] == "failed":
+        return {"error": job["error"]}
+    if job["status"] != "succeeded":
+        return JSONResponse(status_code=202, content=job)
+    return job_queue.result(job_id)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent "status" events for a job, ending with the final "result" or "error" event"""
+    if job_queue.get(job_id) is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+
+    async def event_stream():
+        async for status in job_queue.subscribe(job_id):
+            yield format_sse("status", {"job_id": job_id, "status": status})
+        job = job_queue.get(job_id)
+        if job["status"] == "succeeded":
+            yield format_sse("result", job_queue.result(job_id))
+        else:
+            yield format_sse("error", {"error": job["error"]})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/rank-resumes")
+async def rank_resumes(
+    resume_files: List[UploadFile] = File(...),
+    job_description: str = Form(...),
+    mode: str = Form("auto")
+):
+    """
+    Recruiter screening: score many resumes against one job description
+    without generating tailored resumes. Streams Server-Sent Events: one
+    "job_analysis", a "resume" event per scored resume (with missing-skill
+    breakdown), then the final "ranking".
+    """
+    error = invalid_mode_error(mode)
+    if error:
+        return JSONResponse(status_code=400, content=error)
+    logger.debug("Ranking %s resumes, job description length: %s", len(resume_files), len(job_description))
+    parsed = await asyncio.gather(*[parse_resume_upload(resume_file) for resume_file in resume_files])
+    resumes = [
+        {"filename": resume_file.filename, "resume_text": resume_text,
+         "resume_hash": resume_hash, "error": error["error"] if error else None}
+        for resume_file, (resume_text, resume_hash, error) in zip(resume_files, parsed)
+    ]
+
+    async def event_stream():
+        try:
+            async for event, data in rank_resumes_events(resumes, job_description, mode=mode):
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error("Exception in rank_resumes: %s", e)
+            yield format_sse("error", {"error": f"Internal server error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/resume-cache/{resume_hash}")
+def invalidate_resume_cache(resume_hash: str):
+    """Forget the parsed text and fields of one uploaded resume"""
+    return {"invalidated": resume_cache.invalidate(resume_hash)}
+
+@app.delete("/resume-cache")
+def clear_resume_cache():
+    resume_cache.clear()
+    return {"cleared": True}
+
+def pdf_file_response(path: str, source_hash: str) -> FileResponse:
+    # FileResponse streams the file from disk instead of buffering it in Python
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename="tailored_resume.pdf",
+        headers={"ETag": f'"{source_hash}"', "Cache-Control": "private, max-age=0, must-revalidate",
+                 "Content-Location": f"/pdf/{source_hash}"}
+    )
+
+def etag_matches(request: Request, source_hash: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    return if_none_match.strip() == "*" or f'"{source_hash}"' in if_none_match
+
+@app.get("/pdf/{source_hash}")
+def get_stored_pdf(request: Request, source_hash: str):
+    """
+    A PDF compiled by /latex-to-pdf, by the hash in its ETag and
+    Content-Location; If-None-Match revalidation answers 304.
+    """
+    stored_path = pdf_artifacts.get(source_hash) if re.fullmatch(r"[0-9a-f]{64}", source_hash) else None
+    if stored_path is None:
+        return JSONResponse(status_code=404, content={"error": "PDF not found"})
+    if etag_matches(request, source_hash):
+        return Response(status_code=304, headers={"ETag": f'"{source_hash}"'})
+    return pdf_file_response(stored_path, source_hash)
+
 @app.post("/latex-to-pdf")
-def latex_to_pdf(latex_code: str = Form(...)):
+async def latex_to_pdf(request: Request, latex_code: str = Form(...)):
     """
-    Convert LaTeX code to PDF with comprehensive error handling and fallback options
+    Convert LaTeX code to PDF with comprehensive error handling and fallback options.
+    Compiled PDFs are kept by source hash: repeat downloads are served from disk
+    without compiling, and GET /pdf/{hash} serves them afterwards. A POST with
+    a matching If-None-Match fails with 412, as RFC 7232 requires for
+    non-GET requests.
     """
+    source_hash = latex_source_hash(latex_code)
     try:
-        print(f"[DEBUG] Starting LaTeX to PDF conversion")
-        print(f"[DEBUG] LaTeX code length: {len(latex_code)}")
+        logger.debug("Starting LaTeX to PDF conversion")
+        logger.debug("LaTeX code length: %s", len(latex_code))
         
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tex_path = os.path.join(tmpdir, "resume.tex")
-            pdf_path = os.path.join(tmpdir, "resume.pdf")
-            log_path = os.path.join(tmpdir, "resume.log")
-            
-            # Write LaTeX code to .tex file
-            with open(tex_path, "w", encoding="utf-8") as f:
-                f.write(latex_code)
-            
-            print(f"[DEBUG] LaTeX file written to: {tex_path}")
-            
-            # Check if pdflatex is available
-            try:
-                subprocess.run(["pdflatex", "--version"], 
-                             capture_output=True, check=True, timeout=10)
-            except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-                return {"error": "pdflatex is not installed or not accessible. Please install LaTeX distribution (e.g., MiKTeX, TeX Live)."}
+        stored_path = pdf_artifacts.get(source_hash)
+        if stored_path:
+            if etag_matches(request, source_hash):
+                return Response(status_code=412, headers={"ETag": f'"{source_hash}"'})
+            logger.debug("Serving stored PDF %s", source_hash[:12])
+            return pdf_file_response(stored_path, source_hash)
+        
+        # The toolchain is probed once at startup; this only waits if that has not finished
+        if not await compile_pool.probe():
+            return {"error": "pdflatex is not installed or not accessible. Please install LaTeX distribution (e.g., MiKTeX, TeX Live)."}
+        
+        async with pdf_artifacts.compile_lock(source_hash):
+            # Another request may have compiled the same source while we waited
+            stored_path = pdf_artifacts.path_for(source_hash)
+            if os.path.exists(stored_path):
+                return pdf_file_response(stored_path, source_hash)
             
-            # Run pdflatex to generate PDF with better error handling
-            try:
-                result = subprocess.run([
-                    "pdflatex", 
-                    "-interaction=nonstopmode", 
-                    "-output-directory", tmpdir, 
-                    tex_path
-                ], capture_output=True, text=True, timeout=60)
-                
-                print(f"[DEBUG] pdflatex return code: {result.returncode}")
-                print(f"[DEBUG] pdflatex stdout: {result.stdout[:500]}...")
-                print(f"[DEBUG] pdflatex stderr: {result.stderr[:500]}...")
-                
-                # Check if PDF was actually created
-                if not os.path.exists(pdf_path):
-                    # Read log file for more details
-                    log_content = ""
-                    if os.path.exists(log_path):
-                        with open(log_path, "r", encoding="utf-8") as f:
-                            log_content = f.read()
+            with tempfile.TemporaryDirectory() as tmpdir:
+                # Run pdflatex to generate PDF with better error handling
+                try:
+                    with span("latex_compile", source_hash=source_hash[:12]) as attributes:
+                        compiled = await compile_pool.compile(latex_code, tmpdir)
+                        attributes.update(returncode=compiled.returncode, used_format=compiled.used_format)
+                    pdf_path = compiled.pdf_path
+                    log_path = compiled.log_path
+                    stderr = compiled.stderr
                     
-                    error_msg = "PDF file was not generated. "
-                    if "! LaTeX Error" in log_content:
-                        error_msg += "LaTeX compilation error detected."
-                    elif result.stderr:
-                        error_msg += f"Compilation error: {result.stderr[:200]}"
-                    else:
-                        error_msg += "Unknown compilation error."
+                    logger.debug("pdflatex return code: %s (precompiled format: %s)", compiled.returncode,
+                                 compiled.used_format, extra={"fields": {"stdout": compiled.stdout[:500],
+                                                                         "stderr": stderr[:500]}})
                     
-                    return {"error": error_msg, "details": log_content[:1000]}
-                
-                # Verify PDF file is not empty and is valid
-                pdf_size = os.path.getsize(pdf_path)
-                if pdf_size == 0:
-                    return {"error": "Generated PDF file is empty."}
-                
-                print(f"[DEBUG] PDF file size: {pdf_size} bytes")
-                
-                # Read PDF and verify it starts with PDF header
-                with open(pdf_path, "rb") as f:
-                    pdf_bytes = f.read()
-                
-                if not pdf_bytes.startswith(b'%PDF'):
-                    return {"error": "Generated file is not a valid PDF."}
-                
-                print(f"[DEBUG] PDF validation successful, returning {len(pdf_bytes)} bytes")
-                
-                return Response(
-                    pdf_bytes, 
-                    media_type="application/pdf", 
-                    headers={
-                        "Content-Disposition": "attachment; filename=tailored_resume.pdf",
-                        "Content-Length": str(len(pdf_bytes))
-                    }
-                )
-                
-            except subprocess.TimeoutExpired:
-                return {"error": "PDF generation timed out. The LaTeX code might be too complex."}
-            except Exception as e:
-                return {"error": f"PDF generation failed: {str(e)}"}
+                    # Check if PDF was actually created
+                    if not os.path.exists(pdf_path):
+                        # Read log file for more details
+                        log_content = ""
+                        if os.path.exists(log_path):
+                            with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+                                log_content = f.read()
+                        
+                        error_msg = "PDF file was not generated. "
+                        if "! LaTeX Error" in log_content:
+                            error_msg += "LaTeX compilation error detected."
+                        elif stderr:
+                            error_msg += f"Compilation error: {stderr[:200]}"
+                        else:
+                            error_msg += "Unknown compilation error."
+                        
+                        return {"error": error_msg, "details": log_content[:1000]}
+                    
+                    # Verify PDF file is not empty and is valid
+                    pdf_size = os.path.getsize(pdf_path)
+                    if pdf_size == 0:
+                        return {"error": "Generated PDF file is empty."}
+                    
+                    logger.debug("PDF file size: %s bytes", pdf_size)
+                    
+                    # Verify it starts with the PDF header without reading the whole file
+                    with open(pdf_path, "rb") as f:
+                        header = f.read(4)
+                    
+                    if header != b'%PDF':
+                        return {"error": "Generated file is not a valid PDF."}
+                    
+                    stored_path = pdf_artifacts.put(source_hash, pdf_path)
+                    logger.debug("PDF validation successful, serving %s bytes", pdf_size)
+                    
+                    return pdf_file_response(stored_path, source_hash)
+                    
+                except CompileQueueFull:
+                    return JSONResponse(status_code=503, headers={"Retry-After": "5"},
+                                        content={"error": "PDF generation is busy right now. Please try again in a few seconds."})
+                except asyncio.TimeoutError:
+                    return {"error": "PDF generation timed out. The LaTeX code might be too complex."}
+                except Exception as e:
+                    return {"error": f"PDF generation failed: {str(e)}"}
                 
     except Exception as e:
-        print(f"[ERROR] Exception in latex_to_pdf: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Exception in latex_to_pdf: %s", e)
         return {"error": f"Internal server error during PDF generation: {str(e)}"}
 
 @app.post("/latex-to-text")
-def latex_to_text(latex_code: str = Form(...)):
+async def latex_to_text(latex_code: str = Form(...)):
     """
     Convert LaTeX code to plain text as a fallback when PDF generation fails
     """
     try:
-        print(f"[DEBUG] Converting LaTeX to plain text")
+        logger.debug("Converting LaTeX to plain text")
         
         # Simple LaTeX to text conversion
         import re
@@ -221,5 +583,5 @@ Generated by AI Resume Tailor
         }
         
     except Exception as e:
-        print(f"[ERROR] Exception in latex_to_text: {str(e)}")
+        logger.error("Exception in latex_to_text: %s", e)
         return {"error": f"Failed to convert LaTeX to text: {str(e)}"}
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Prometheus metrics in the text exposition format.
+
+A small in-process registry of counters and histograms with labels,
+rendered at /metrics. Each worker process keeps its own values (scrape
+every worker, or run one worker per scrape target); Prometheus sums the
+series across instances.
+
+What is recorded:
+
+- every LLM call (app.utils.call_gpt*): requests by stage (the prompt
+  template name), model, cache outcome and result; errors by class; API
+  latency; prompt/completion tokens; estimated cost in USD; retries,
+  hedged requests and circuit breaker activity (app.llm_resilience);
+  rate limiter queue depth and wait time by priority (app.rate_limit)
+- pipeline stage durations (app.pipeline), to find the slowest stage
+- pdflatex runs (app.latex) and resume text extraction (app.utils)
+
+Costs use LLM_PRICES_PER_1K_TOKENS, a JSON object mapping model to
+{"prompt": usd, "completion": usd} per 1000 tokens, on top of the
+built-in table below.
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+MODEL_PRICES_PER_1K_TOKENS = {
+    "gpt-3.5-turbo": {"prompt": 0.0005, "completion": 0.0015},
+    "gpt-4o-mini": {"prompt": 0.00015, "completion": 0.0006},
+    "gpt-4o": {"prompt": 0.0025, "completion": 0.01},
+}
+MODEL_PRICES_PER_1K_TOKENS.update(json.loads(os.getenv("LLM_PRICES_PER_1K_TOKENS", "{}")))
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block; labels may be updated inside it"""
+        started = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[name]) for name in self.labelnames))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += count
+                    le = 'le="' + _format_value(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+LLM_REQUESTS = registry.register(Counter(
+    "llm_requests_total", "LLM calls by stage, model, cache outcome (hit/miss/disabled) and result (ok/error)",
+    ["stage", "model", "cache", "result"]))
+LLM_ERRORS = registry.register(Counter(
+    "llm_errors_total", "Failed LLM API calls by error class", ["stage", "model", "error"]))
+LLM_LATENCY = registry.register(Histogram(
+    "llm_request_duration_seconds", "LLM API call latency (cache hits excluded)", ["stage", "model"]))
+LLM_PROMPT_TOKENS = registry.register(Counter(
+    "llm_prompt_tokens_total", "Prompt tokens billed by the API", ["stage", "model"]))
+LLM_COMPLETION_TOKENS = registry.register(Counter(
+    "llm_completion_tokens_total", "Completion tokens billed by the API", ["stage", "model"]))
+LLM_COST = registry.register(Counter(
+    "llm_cost_usd_total", "Estimated LLM spend in USD", ["stage", "model"]))
+LLM_RETRIES = registry.register(Counter(
+    "llm_retries_total", "LLM attempts retried after a transient error", ["stage", "error"]))
+LLM_HEDGES = registry.register(Counter(
+    "llm_hedged_requests_total", "Hedged LLM calls by which request answered first (primary/hedge)",
+    ["stage", "winner"]))
+LLM_SHORT_CIRCUITS = registry.register(Counter(
+    "llm_short_circuited_total", "LLM calls not made because the circuit breaker was open", ["stage"]))
+LLM_BREAKER_TRANSITIONS = registry.register(Counter(
+    "llm_circuit_breaker_transitions_total", "LLM circuit breaker state changes by new state", ["state"]))
+LLM_RATE_LIMIT_QUEUE_DEPTH = registry.register(Gauge(
+    "llm_rate_limit_queue_depth", "LLM calls waiting for rate limit capacity in this process", ["priority"]))
+LLM_RATE_LIMIT_WAIT = registry.register(Histogram(
+    "llm_rate_limit_wait_seconds", "Time LLM calls waited for rate limit capacity", ["priority"]))
+LLM_RATE_LIMIT_TIMEOUTS = registry.register(Counter(
+    "llm_rate_limit_timeouts_total", "LLM calls given up after waiting too long for capacity", ["priority"]))
+STAGE_DURATION = registry.register(Histogram(
+    "pipeline_stage_duration_seconds", "Pipeline stage duration by outcome (ok/fallback/timeout/error)",
+    ["stage", "outcome"]))
+LATEX_COMPILE_DURATION = registry.register(Histogram(
+    "latex_compile_duration_seconds", "pdflatex run duration", ["outcome", "format"]))
+TEXT_EXTRACTION_DURATION = registry.register(Histogram(
+    "resume_text_extraction_duration_seconds", "Resume text extraction duration by file type", ["file_type"]))
+
+
+def llm_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of one call; 0.0 for models without a known price"""
+    prices = MODEL_PRICES_PER_1K_TOKENS.get(model)
+    if not prices:
+        return 0.0
+    return (prompt_tokens * prices["prompt"] + completion_tokens * prices["completion"]) / 1000
+
+
+def stage_label(template_id: str) -> str:
+    """Prompt template name ("ats_resume" for "ats_resume/2") used as the stage label"""
+    return template_id.split("/", 1)[0]
+
+
+def record_llm_usage(stage: str, model: str, usage, duration: float, cache: str = "miss"):
+    """Record latency, tokens and cost of a successful API call; usage may be None"""
+    LLM_LATENCY.observe(duration, stage=stage, model=model)
+    LLM_REQUESTS.inc(stage=stage, model=model, cache=cache, result="ok")
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    LLM_PROMPT_TOKENS.inc(prompt_tokens, stage=stage, model=model)
+    LLM_COMPLETION_TOKENS.inc(completion_tokens, stage=stage, model=model)
+    LLM_COST.inc(llm_cost(model, prompt_tokens, completion_tokens), stage=stage, model=model)
+
+
+def record_llm_error(stage: str, model: str, error: Exception, duration: float, cache: str = "miss"):
+    LLM_LATENCY.observe(duration, stage=stage, model=model)
+    LLM_REQUESTS.inc(stage=stage, model=model, cache=cache, result="error")
+    LLM_ERRORS.inc(stage=stage, model=model, error=type(error).__name__)
+
+
+def record_llm_cache_hit(stage: str, model: str):
+    LLM_REQUESTS.inc(stage=stage, model=model, cache="hit", result="ok")
@@ -0,0 +1,238 @@
+"""
+Stage executor for the tailoring pipeline.
+
+A pipeline is a list of Stage objects. Each stage names the stages it depends
+on; a stage is started as soon as all of its dependencies have finished, so
+independent stages run side by side and the total latency approaches the
+slowest dependency chain rather than the sum of every call.
+
+run_stages drives the graph from a thread pool for synchronous callers;
+run_stages_async drives the same graph on the event loop, awaiting coroutine
+stages directly and pushing plain functions to worker threads.
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.metrics import STAGE_DURATION
+from app.tracing import record_span, span
+
+logger = logging.getLogger(__name__)
+
+
+class StageError(Exception):
+    """Raised when a stage without a fallback fails or times out"""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"Stage '{stage}' {message}")
+        self.stage = stage
+
+
+@dataclass
+class Stage:
+    """
+    A single unit of pipeline work.
+
+    func is called with the results of its dependencies as keyword arguments
+    (one per name in deps); it may be a coroutine function when the graph is
+    run with run_stages_async. If the stage raises or exceeds its timeout,
+    the zero-argument fallback is called to produce the result instead;
+    stages without a fallback abort the whole run with StageError.
+    """
+    name: str
+    func: Callable[..., Any]
+    deps: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+    fallback: Optional[Callable[[], Any]] = None
+
+
+def _validate(stages: List[Stage]) -> Dict[str, Stage]:
+    """Check names are unique, dependencies exist and the graph is acyclic"""
+    by_name = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        by_name[stage.name] = stage
+
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    # Kahn's algorithm: every stage must become ready at some point
+    remaining = {stage.name: set(stage.deps) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return by_name
+
+
+def _record_duration(stage: Stage, started: float, outcome: str):
+    STAGE_DURATION.observe(time.perf_counter() - started, stage=stage.name, outcome=outcome)
+    record_span(f"stage.{stage.name}", started, status=outcome)
+
+
+def _use_fallback(stage: Stage, reason: str, started: float, outcome: str = "fallback") -> Any:
+    if stage.fallback is None:
+        _record_duration(stage, started, "error")
+        raise StageError(stage.name, reason)
+    _record_duration(stage, started, outcome)
+    logger.warning("Stage '%s' %s, using fallback", stage.name, reason)
+    return stage.fallback()
+
+
+def run_stages(stages: List[Stage], max_workers: Optional[int] = None,
+               on_complete: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """
+    Run the stages on a thread pool, honouring their dependencies and timeouts.
+    on_complete(name, result) is called as each stage finishes.
+
+    Returns a dict mapping each stage name to its result (or fallback value).
+    """
+    by_name = _validate(stages)
+    results: Dict[str, Any] = {}
+    pending = {stage.name: set(stage.deps) for stage in stages}
+    running = {}  # future -> (stage, deadline, started)
+    run_started = time.perf_counter()
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1,
+                                  thread_name_prefix="pipeline")
+
+    def submit_ready():
+        ready = [name for name, deps in pending.items() if not deps]
+        for name in ready:
+            del pending[name]
+            stage = by_name[name]
+            kwargs = {dep: results[dep] for dep in stage.deps}
+            started = time.perf_counter()
+            deadline = started + stage.timeout if stage.timeout else None
+            # Each stage runs in a copy of the caller's context, keeping its request id and trace
+            future = executor.submit(contextvars.copy_context().run, stage.func, **kwargs)
+            running[future] = (stage, deadline, started)
+
+    def finish(stage: Stage, value: Any):
+        results[stage.name] = value
+        for deps in pending.values():
+            deps.discard(stage.name)
+        if on_complete is not None:
+            on_complete(stage.name, value)
+
+    with span("pipeline", stages=len(stages)):
+        try:
+            submit_ready()
+            while running:
+                deadlines = [deadline for _, deadline, _ in running.values() if deadline is not None]
+                wait_for = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+                done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage, _, started = running.pop(future)
+                    try:
+                        value = future.result()
+                    except StageError:
+                        raise
+                    except Exception as e:
+                        value = _use_fallback(stage, f"failed: {str(e)}", started)
+                    else:
+                        _record_duration(stage, started, "ok")
+                    logger.debug("Stage '%s' finished in %.2fs", stage.name, time.perf_counter() - started)
+                    finish(stage, value)
+
+                now = time.perf_counter()
+                for future, (stage, deadline, started) in list(running.items()):
+                    if deadline is not None and now >= deadline and not future.done():
+                        # The worker thread cannot be interrupted; we stop waiting for it
+                        running.pop(future)
+                        future.cancel()
+                        finish(stage, _use_fallback(stage, f"timed out after {stage.timeout}s", started, "timeout"))
+
+                submit_ready()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.debug("Pipeline of %s stages finished in %.2fs", len(stages), time.perf_counter() - run_started)
+    return results
+
+
+async def run_stages_async(stages: List[Stage],
+                           on_complete: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """
+    Async counterpart of run_stages. Coroutine stages run on the event loop
+    (and are cancelled when they time out); plain functions run in threads.
+    on_complete(name, result) is called on the event loop as each stage finishes.
+
+    Returns a dict mapping each stage name to its result (or fallback value).
+    """
+    by_name = _validate(stages)
+    results: Dict[str, Any] = {}
+    pending = {stage.name: set(stage.deps) for stage in stages}
+    running = {}  # task -> (stage, deadline, started)
+    run_started = time.perf_counter()
+
+    def submit_ready():
+        ready = [name for name, deps in pending.items() if not deps]
+        for name in ready:
+            del pending[name]
+            stage = by_name[name]
+            kwargs = {dep: results[dep] for dep in stage.deps}
+            if asyncio.iscoroutinefunction(stage.func):
+                coro = stage.func(**kwargs)
+            else:
+                coro = asyncio.to_thread(stage.func, **kwargs)
+            started = time.perf_counter()
+            deadline = started + stage.timeout if stage.timeout else None
+            running[asyncio.ensure_future(coro)] = (stage, deadline, started)
+
+    def finish(stage: Stage, value: Any):
+        results[stage.name] = value
+        for deps in pending.values():
+            deps.discard(stage.name)
+        if on_complete is not None:
+            on_complete(stage.name, value)
+
+    with span("pipeline", stages=len(stages)):
+        try:
+            submit_ready()
+            while running:
+                deadlines = [deadline for _, deadline, _ in running.values() if deadline is not None]
+                wait_for = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+                done, _ = await asyncio.wait(list(running), timeout=wait_for,
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    stage, _, started = running.pop(task)
+                    try:
+                        value = task.result()
+                    except StageError:
+                        raise
+                    except Exception as e:
+                        value = _use_fallback(stage, f"failed: {str(e)}", started)
+                    else:
+                        _record_duration(stage, started, "ok")
+                    logger.debug("Stage '%s' finished in %.2fs", stage.name, time.perf_counter() - started)
+                    finish(stage, value)
+
+                now = time.perf_counter()
+                for task, (stage, deadline, started) in list(running.items()):
+                    if deadline is not None and now >= deadline and not task.done():
+                        running.pop(task)
+                        task.cancel()
+                        finish(stage, _use_fallback(stage, f"timed out after {stage.timeout}s", started, "timeout"))
+
+                submit_ready()
+        finally:
+            for task in running:
+                task.cancel()
+
+        logger.debug("Pipeline of %s stages finished in %.2fs", len(stages), time.perf_counter() - run_started)
+    return results
@@ -0,0 +1,330 @@
+"""
+Versioned prompt templates and a token-aware prompt builder.
+
+Every LLM prompt is a PromptTemplate with a name and a version; "name/version"
+is the template id passed to call_gpt and becomes part of the LLM cache key,
+so bump the version whenever a template's wording changes.
+
+build_prompt() fills a template and counts the prompt's input tokens (with
+tiktoken when it is installed, otherwise about 4 characters per token).
+Structured values (dicts, lists) are serialized as compact JSON, which is
+much smaller than a Python repr with indentation.
+
+Truncation policy: a prompt larger than PROMPT_TOKEN_BUDGET input tokens is
+shrunk by cutting the template's truncatable fields (free text such as the
+resume or job description; instructions and JSON data are never cut). The
+largest truncatable field is cut first, from the end and at a line break
+where possible, down to what fits but never below MIN_FIELD_TOKENS; a
+marker tells the model the text was shortened. If the prompt still does not
+fit, it is sent as is with a warning.
+"""
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "8000"))
+MIN_FIELD_TOKENS = 200
+TRUNCATION_MARKER = "\n[... truncated to fit the prompt budget]"
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Input tokens of text for the chat model (estimated without tiktoken)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def to_compact_json(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    version: int
+    text: str
+    # Fields that may be cut to fit the budget
+    truncatable: Tuple[str, ...] = ()
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}/{self.version}"
+
+
+@dataclass(frozen=True)
+class BuiltPrompt:
+    template_id: str
+    text: str
+    input_tokens: int
+    truncated: List[str] = field(default_factory=list)
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut text from the end so that it, with the marker, fits in max_tokens"""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep = int(len(text) * max(max_tokens - count_tokens(TRUNCATION_MARKER), 1) / tokens)
+    while True:
+        cut = text[:keep]
+        line_break = cut.rfind("\n")
+        if line_break > keep * 0.8:
+            cut = cut[:line_break]
+        shortened = cut.rstrip() + TRUNCATION_MARKER
+        if count_tokens(shortened) <= max_tokens or keep == 0:
+            return shortened
+        keep = int(keep * 0.9)
+
+
+def build_prompt(template: PromptTemplate, budget: int = None, **values) -> BuiltPrompt:
+    """Fill template with values (dicts and lists as compact JSON) within the token budget"""
+    budget = budget or PROMPT_TOKEN_BUDGET
+    values = {name: value if isinstance(value, str) else to_compact_json(value) for name, value in values.items()}
+    text = template.text.format(**values)
+    tokens = count_tokens(text)
+    truncated = []
+    while tokens > budget:
+        candidates = [name for name in template.truncatable if count_tokens(values[name]) > MIN_FIELD_TOKENS]
+        if not candidates:
+            logger.warning("Prompt %s is %s tokens, over the %s budget", template.id, tokens, budget)
+            break
+        name = max(candidates, key=lambda n: len(values[n]))
+        field_tokens = count_tokens(values[name])
+        values[name] = truncate_text(values[name], max(MIN_FIELD_TOKENS, field_tokens - (tokens - budget)))
+        if name not in truncated:
+            truncated.append(name)
+        text = template.text.format(**values)
+        tokens = count_tokens(text)
+    if truncated:
+        logger.warning("Prompt %s truncated %s to fit %s tokens", template.id, ', '.join(truncated), budget)
+    return BuiltPrompt(template.id, text, tokens, truncated)
+
+
+EXPERIENCE_YEARS = PromptTemplate("experience_years", 1, """
+Extract the total years of PROFESSIONAL experience from the following text.
+IMPORTANT: 
+- Return ONLY a single number representing total years of experience (e.g., 5, 3, 7).
+- Do NOT include internships, part-time work, or academic projects in the total.
+- Only count full-time professional work experience.
+- If multiple roles, sum only the professional experience years.
+- Do NOT include any other numbers like calendar years (2020, 2023, etc.) or other text.
+- If no specific years mentioned, estimate based on job history and roles.
+
+Text: {text}
+""", truncatable=('text',))
+
+JOB_REQUIREMENTS = PromptTemplate("job_requirements", 1, """
+Analyze this job description and extract key requirements with their importance levels.
+
+Return ONLY a JSON object with this structure:
+{{
+    "required_years": number (only years of experience required, not calendar years),
+    "required_skills": ["skill1", "skill2"],
+    "preferred_skills": ["skill1", "skill2"],
+    "required_education": "degree level",
+    "experience_level": "entry/mid/senior/lead",
+    "industry": "tech/finance/healthcare/etc"
+}}
+
+IMPORTANT: For "required_years", extract only the number of years of experience required (e.g., 5, 3, 7).
+Do NOT include calendar years like 2020, 2023, etc.
+
+Job Description: {text}
+""", truncatable=('text',))
+
+SKILLS = PromptTemplate("skills", 1, """
+You are a professional skills analyzer. Extract specific, relevant skills from the following {context} text.
+
+IMPORTANT: Return ONLY a comma-separated list of skills, with no additional text, explanations, or formatting.
+
+Focus on extracting:
+1. Programming Languages: Python, Java, JavaScript, C++, C#, Ruby, PHP, Go, Rust, Swift, Kotlin, TypeScript, etc.
+2. Frameworks & Libraries: React, Angular, Vue, Django, Flask, Spring, Node.js, Express, Laravel, ASP.NET, etc.
+3. Tools & Technologies: Docker, Kubernetes, AWS, Azure, GCP, Git, Jenkins, Travis CI, etc.
+4. Databases: MySQL, PostgreSQL, MongoDB, Redis, SQLite, Oracle, SQL Server, etc.
+5. Frontend Technologies: HTML, CSS, SASS, LESS, Bootstrap, Tailwind, Material-UI, etc.
+6. Data Science & ML: TensorFlow, PyTorch, Scikit-learn, Pandas, NumPy, Matplotlib, etc.
+7. Soft Skills: Leadership, Communication, Problem Solving, Teamwork, Project Management, etc.
+8. Industry Skills: Machine Learning, Data Analysis, Data Science, AI, Deep Learning, etc.
+9. Methodologies: Agile, Scrum, Kanban, Waterfall, DevOps, CI/CD, etc.
+
+Only include skills that are explicitly mentioned or clearly implied in the text. Do not infer skills that are not present.
+
+Text to analyze:
+{text}
+""", truncatable=('text',))
+
+RESUME_FIELDS = PromptTemplate("resume_fields", 1, """
+You are an expert resume parser. Extract the following fields from the resume below and return ONLY a JSON object with this structure:
+{{
+  "name": string,
+  "email": string,
+  "phone": string,
+  "location": string,
+  "summary": string,
+  "experience": [
+    {{"company": string, "title": string, "start": string, "end": string, "bullets": [string]}}
+  ],
+  "education": [
+    {{"degree": string, "institution": string, "year": string}}
+  ],
+  "skills": [string],
+  "projects": [
+    {{"name": string, "description": string}}
+  ]
+}}
+IMPORTANT:
+- The name should be the person's full name, not a job title or location.
+- The email and phone should be valid if present.
+- The summary should be 1-3 sentences summarizing the candidate.
+- Experience and education should be arrays, even if only one entry.
+- Skills should be a list of specific skills.
+- Projects are optional.
+- If a field is missing, use an empty string or empty array.
+
+Resume:
+{resume_text}
+""", truncatable=('resume_text',))
+
+JOB_ANALYSIS = PromptTemplate("job_analysis", 1, """
+You are a professional job description analyzer. Analyze the job description below in a single pass.
+
+Return ONLY a JSON object with this structure:
+{{
+    "skills": ["skill1", "skill2"],
+    "required_years": number (only years of experience required, not calendar years),
+    "required_skills": ["skill1", "skill2"],
+    "preferred_skills": ["skill1", "skill2"],
+    "required_education": "degree level",
+    "experience_level": "entry/mid/senior/lead",
+    "industry": "tech/finance/healthcare/etc"
+}}
+
+"skills" lists every specific skill mentioned or clearly implied in the job description:
+1. Programming Languages: Python, Java, JavaScript, C++, C#, Ruby, PHP, Go, Rust, Swift, Kotlin, TypeScript, etc.
+2. Frameworks & Libraries: React, Angular, Vue, Django, Flask, Spring, Node.js, Express, Laravel, ASP.NET, etc.
+3. Tools & Technologies: Docker, Kubernetes, AWS, Azure, GCP, Git, Jenkins, Travis CI, etc.
+4. Databases: MySQL, PostgreSQL, MongoDB, Redis, SQLite, Oracle, SQL Server, etc.
+5. Frontend Technologies: HTML, CSS, SASS, LESS, Bootstrap, Tailwind, Material-UI, etc.
+6. Data Science & ML: TensorFlow, PyTorch, Scikit-learn, Pandas, NumPy, Matplotlib, etc.
+7. Soft Skills: Leadership, Communication, Problem Solving, Teamwork, Project Management, etc.
+8. Industry Skills: Machine Learning, Data Analysis, Data Science, AI, Deep Learning, etc.
+9. Methodologies: Agile, Scrum, Kanban, Waterfall, DevOps, CI/CD, etc.
+Do not infer skills that are not present. "required_skills" and "preferred_skills" split these by importance.
+
+IMPORTANT: For "required_years", extract only the number of years of experience required (e.g., 5, 3, 7).
+Do NOT include calendar years like 2020, 2023, etc.
+
+Job Description: {text}
+""", truncatable=('text',))
+
+ATS_RESUME = PromptTemplate("ats_resume", 2, """
+You are an expert resume writer and ATS optimization specialist.
+
+You are given the candidate's STRUCTURED RESUME DATA (JSON) and the JOB DESCRIPTION at the end of this prompt.
+
+Your tasks:
+1. **Skills Section:**
+   - Ensure the skills section includes all relevant skills from the job description that the candidate genuinely possesses, based on their experience, education, or projects.
+   - Do NOT add skills that are not supported by the candidate’s background.
+
+2. **Project & Experience Descriptions:**
+   - Rewrite project and experience bullet points to naturally incorporate keywords and phrases from the job description, but only where they truthfully reflect the candidate’s actual work.
+   - Emphasize achievements and responsibilities that align with the job’s requirements.
+   - Avoid exaggeration or making unrealistic claims.
+
+3. **ATS Optimization:**
+   - Use exact keywords and terminology from the job description where appropriate, especially for skills, technologies, and methodologies.
+   - Maintain a professional, concise, and truthful tone.
+
+4. **No Hallucination:**
+   - Do NOT invent experience, skills, or qualifications that are not present in the candidate’s background.
+
+CRITICAL:
+- You MUST preserve all original personal information (name, email, phone, location, education, etc.) exactly as provided in the structured resume data.
+- Only rewrite the skills, experience, and project descriptions for ATS optimization.
+- Do NOT invent, change, or omit the candidate’s identity or contact details.
+- Do NOT generate a sample or template resume—always use the real candidate’s data.
+
+5. **Output:**
+   - Return a JSON object with the following structure:
+     {{
+       "name": ...,
+       "email": ...,
+       "phone": ...,
+       "location": ...,
+       "summary": ...,
+       "skills": [...],  // Optimized for ATS, truthful
+       "experience": [
+         {{
+           "company": ...,
+           "title": ...,
+           "start": ...,
+           "end": ...,
+           "bullets": [
+             // Each bullet rewritten to maximize ATS match, using job description keywords where truthful
+           ]
+         }},
+         ...
+       ],
+       "education": [...],
+       "projects": [
+         {{
+           "name": ...,
+           "description": "...", // Rewritten to include relevant job keywords, if truthful
+         }},
+         ...
+       ]
+     }}
+
+CRITICAL:
+- Do not add or exaggerate skills or experience.
+- Only use keywords from the job description if they are genuinely supported by the candidate’s background.
+- The goal is to maximize ATS keyword match while remaining 100% truthful.
+
+STRUCTURED RESUME DATA:
+{resume_fields}
+
+JOB DESCRIPTION:
+{job_description}
+""", truncatable=('job_description',))
+
+LATEX_RESUME = PromptTemplate("latex_resume", 2, """
+You are a professional resume writer. Given the following structured resume data (JSON, already tailored to the target job), generate a complete, professional LaTeX resume. Use this structure:
+- Name (large, bold at top)
+- Contact info (email, phone, location)
+- Summary
+- Experience (with company, title, dates, bullet points)
+- Education (degree, institution, year)
+- Skills (as a list)
+- Projects (if present)
+
+STRUCTURED RESUME DATA:
+{ats_resume_fields}
+
+CRITICAL:
+- The name must be the first and most prominent thing in the header.
+- Do NOT use location or job title as the name.
+- All sections must be present and properly formatted.
+- Use only valid LaTeX.
+- Make it look like a human professional resume.
+- Do not hallucinate or invent information.
+- If a field is missing, skip that section.
+Return only the LaTeX code, ready to compile.
+""", truncatable=())
+
+TEMPLATES: Dict[str, PromptTemplate] = {
+    template.name: template
+    for template in (EXPERIENCE_YEARS, JOB_REQUIREMENTS, SKILLS, RESUME_FIELDS, JOB_ANALYSIS, ATS_RESUME, LATEX_RESUME)
+}
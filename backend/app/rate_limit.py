@@ -0,0 +1,300 @@
+"""
+Host-wide rate limiting and prioritisation of outbound LLM calls.
+
+Every API request (each retry and hedge included) first takes one request
+and its estimated tokens (prompt tokens from app.prompts.count_tokens plus
+the expected reply size of the template) from two token buckets. The
+buckets live in a SQLite file in WAL mode, so all worker processes on the
+host draw from the same budget instead of bursting into 429s together;
+once the reply arrives the token bucket is corrected by the actual usage.
+
+- LLM_RATE_LIMIT_RPM / LLM_RATE_LIMIT_TPM: the account's per-minute limits
+  (0 turns a bucket off, both 0 turns the limiter off)
+- LLM_RATE_LIMIT_HEADROOM: fraction of those limits to use (default 0.9)
+- LLM_RATE_LIMIT_BURST_SECONDS: how many seconds of quota may go out at
+  once after an idle period (default 10)
+- LLM_RATE_LIMIT_MAX_WAIT_SECONDS: a call waiting longer than this raises
+  RateLimitTimeout, and its stage falls back like on any other LLM error
+
+Calls that have to wait queue by priority, taken from the llm_priority
+context variable: interactive requests (/tailor, /tailor/stream) go ahead
+of batch work (/tailor/batch, /rank-resumes), which goes ahead of
+background work (queued jobs, prewarming). The ordering is per process;
+the processes themselves share the buckets first come, first served.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app import metrics
+from app.cache import STATE_DIR
+
+LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "3500"))
+LLM_RATE_LIMIT_TPM = float(os.getenv("LLM_RATE_LIMIT_TPM", "200000"))
+LLM_RATE_LIMIT_HEADROOM = float(os.getenv("LLM_RATE_LIMIT_HEADROOM", "0.9"))
+LLM_RATE_LIMIT_BURST_SECONDS = float(os.getenv("LLM_RATE_LIMIT_BURST_SECONDS", "10"))
+LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+LLM_RATE_LIMIT_PATH = os.getenv("LLM_RATE_LIMIT_PATH", os.path.join(STATE_DIR, "llm_rate_limit.sqlite"))
+
+INTERACTIVE, BATCH, BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch", BACKGROUND: "background"}
+
+llm_priority: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+# Typical reply size per prompt template, charged up front and corrected afterwards
+COMPLETION_TOKEN_ESTIMATES = {
+    "experience_years": 10,
+    "skills": 150,
+    "job_requirements": 250,
+    "resume_fields": 900,
+    "job_analysis": 350,
+    "ats_resume": 1200,
+    "latex_resume": 1800,
+}
+DEFAULT_COMPLETION_TOKENS = 300
+
+
+@contextmanager
+def priority(level: int):
+    """Run the with-block's LLM calls (threads and tasks it starts included) at this priority"""
+    token = llm_priority.set(level)
+    try:
+        yield
+    finally:
+        llm_priority.reset(token)
+
+
+def estimate_tokens(stage: str, prompt_tokens: int) -> int:
+    return prompt_tokens + COMPLETION_TOKEN_ESTIMATES.get(stage, DEFAULT_COMPLETION_TOKENS)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when an LLM call waited LLM_RATE_LIMIT_MAX_WAIT_SECONDS without getting capacity"""
+
+
+class SharedTokenBuckets:
+    """Request and token buckets in a SQLite file shared by the processes on one host"""
+
+    def __init__(self, path: str = LLM_RATE_LIMIT_PATH, rpm: float = LLM_RATE_LIMIT_RPM,
+                 tpm: float = LLM_RATE_LIMIT_TPM, headroom: float = LLM_RATE_LIMIT_HEADROOM,
+                 burst_seconds: float = LLM_RATE_LIMIT_BURST_SECONDS):
+        # name -> (refill per second, capacity)
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        for name, per_minute in (("requests", rpm), ("tokens", tpm)):
+            if per_minute > 0:
+                rate = per_minute * headroom / 60
+                self.buckets[name] = (rate, max(1.0, rate * burst_seconds))
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_rate_buckets ("
+            "name TEXT PRIMARY KEY, level REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _update(self, change: Callable[[Dict[str, float]], None]):
+        """Refill every bucket to now, let change() edit the levels, and write them back atomically"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                levels = {}
+                for name, (rate, capacity) in self.buckets.items():
+                    row = self._conn.execute("SELECT level, updated_at FROM llm_rate_buckets WHERE name = ?",
+                                             (name,)).fetchone()
+                    levels[name] = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+                change(levels)
+                self._conn.executemany("INSERT OR REPLACE INTO llm_rate_buckets (name, level, updated_at) "
+                                       "VALUES (?, ?, ?)", [(name, level, now) for name, level in levels.items()])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def try_acquire(self, tokens: int) -> float:
+        """
+        Take one request and the tokens, returning 0.0; or take nothing and
+        return the seconds until both buckets could cover them. A cost above a
+        bucket's capacity is capped at it, so it goes once the bucket is full.
+        """
+        costs = {"requests": 1, "tokens": tokens}
+        wait = [0.0]
+
+        def take(levels):
+            needed = {name: min(costs[name], capacity) for name, (_, capacity) in self.buckets.items()}
+            wait[0] = max([(needed[name] - levels[name]) / self.buckets[name][0] for name in needed] + [0.0])
+            if wait[0] <= 0:
+                for name in needed:
+                    levels[name] -= needed[name]
+
+        self._update(take)
+        return wait[0]
+
+    def refund(self, tokens: int):
+        """Return over-estimated tokens (negative: charge an under-estimate, which may leave a debt)"""
+        if tokens and "tokens" in self.buckets:
+            capacity = self.buckets["tokens"][1]
+
+            def adjust(levels):
+                levels["tokens"] = min(capacity, levels["tokens"] + tokens)
+
+            self._update(adjust)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "wake", "left")
+
+    def __init__(self, priority: int, tokens: int, wake: Callable[[], None]):
+        self.priority, self.tokens, self.wake = priority, tokens, wake
+        self.left = False
+
+
+class LLMRateLimiter:
+    """Priority queue of LLM calls in front of the shared buckets; only the head of the queue draws from them"""
+
+    def __init__(self, buckets_factory: Callable[[], Optional[SharedTokenBuckets]],
+                 max_wait: float = LLM_RATE_LIMIT_MAX_WAIT):
+        self._buckets_factory = buckets_factory
+        self._buckets: Optional[SharedTokenBuckets] = None
+        self._opened = False
+        self.max_wait = max_wait
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def buckets(self) -> Optional[SharedTokenBuckets]:
+        """The shared buckets, opened on first use; None when rate limiting is off"""
+        if not self._opened:
+            with self._lock:
+                if not self._opened:
+                    self._buckets = self._buckets_factory()
+                    self._opened = True
+        return self._buckets
+
+    def _enqueue(self, waiter: _Waiter):
+        with self._lock:
+            heapq.heappush(self._queue, (waiter.priority, next(self._sequence), waiter))
+        metrics.LLM_RATE_LIMIT_QUEUE_DEPTH.inc(priority=PRIORITY_NAMES[waiter.priority])
+
+    def _leave(self, waiter: _Waiter):
+        """Take waiter out of the queue; a no-op if it already left (acquired, then cancelled)"""
+        with self._lock:
+            if waiter.left:
+                return
+            waiter.left = True
+            was_head = self._queue[0][2] is waiter
+            self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+            heapq.heapify(self._queue)
+            head = self._queue[0][2] if was_head and self._queue else None
+        metrics.LLM_RATE_LIMIT_QUEUE_DEPTH.dec(priority=PRIORITY_NAMES[waiter.priority])
+        if head is not None:
+            head.wake()
+
+    def _attempt(self, waiter: _Waiter) -> Optional[float]:
+        """0.0 once acquired, seconds to wait while at the head, None while others are ahead"""
+        with self._lock:
+            if self._queue[0][2] is not waiter:
+                return None
+        wait = self._buckets.try_acquire(waiter.tokens)
+        if wait <= 0:
+            self._leave(waiter)
+        return wait
+
+    def _max_wait(self, max_wait: Optional[float]) -> float:
+        return self.max_wait if max_wait is None else max(0.0, min(self.max_wait, max_wait))
+
+    def _next_wait(self, waiter: _Waiter, wait: Optional[float], started: float, max_wait: float) -> float:
+        remaining = started + max_wait - time.perf_counter()
+        if remaining <= 0 or (wait is not None and wait > remaining):
+            metrics.LLM_RATE_LIMIT_TIMEOUTS.inc(priority=PRIORITY_NAMES[waiter.priority])
+            raise RateLimitTimeout(f"No LLM rate limit capacity within {max_wait:.2f}s")
+        return remaining if wait is None else wait
+
+    def _observe(self, waiter: _Waiter, started: float) -> float:
+        waited = time.perf_counter() - started
+        metrics.LLM_RATE_LIMIT_WAIT.observe(waited, priority=PRIORITY_NAMES[waiter.priority])
+        return waited
+
+    def acquire(self, tokens: int, max_wait: Optional[float] = None) -> float:
+        """
+        Block until the call may go out; returns the seconds waited. max_wait
+        (e.g. what is left of the caller's retry deadline) shortens the
+        limiter's own LLM_RATE_LIMIT_MAX_WAIT_SECONDS.
+        """
+        if self.buckets() is None:
+            return 0.0
+        max_wait = self._max_wait(max_wait)
+        started = time.perf_counter()
+        woken = threading.Event()
+        waiter = _Waiter(llm_priority.get(), tokens, woken.set)
+        self._enqueue(waiter)
+        try:
+            wait = self._attempt(waiter)
+            while wait != 0:
+                woken.wait(self._next_wait(waiter, wait, started, max_wait))
+                woken.clear()
+                wait = self._attempt(waiter)
+        except BaseException:
+            self._leave(waiter)
+            raise
+        return self._observe(waiter, started)
+
+    async def acquire_async(self, tokens: int, max_wait: Optional[float] = None) -> float:
+        """Async variant of acquire; waiting does not block the event loop"""
+        if self.buckets() is None:
+            return 0.0
+        max_wait = self._max_wait(max_wait)
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+        waiter = _Waiter(llm_priority.get(), tokens, lambda: loop.call_soon_threadsafe(woken.set))
+        self._enqueue(waiter)
+        try:
+            wait = await asyncio.to_thread(self._attempt, waiter)
+            while wait != 0:
+                timeout = self._next_wait(waiter, wait, started, max_wait)
+                try:
+                    await asyncio.wait_for(woken.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                woken.clear()
+                wait = await asyncio.to_thread(self._attempt, waiter)
+        except BaseException:
+            self._leave(waiter)
+            raise
+        return self._observe(waiter, started)
+
+    def settle(self, estimated_tokens: int, usage):
+        """Correct the token bucket once the API reports what the call actually used"""
+        total = getattr(usage, "total_tokens", None) if usage is not None else None
+        if total is not None and self.buckets() is not None:
+            self._buckets.refund(estimated_tokens - total)
+
+    def stats(self) -> Dict[str, any]:
+        buckets = self.buckets()
+        with self._lock:
+            queued = [entry[0] for entry in self._queue]
+        return {
+            "enabled": buckets is not None,
+            "requests_per_minute": LLM_RATE_LIMIT_RPM,
+            "tokens_per_minute": LLM_RATE_LIMIT_TPM,
+            "queued": {name: queued.count(level) for level, name in PRIORITY_NAMES.items()},
+        }
+
+
+def _open_buckets() -> Optional[SharedTokenBuckets]:
+    if LLM_RATE_LIMIT_RPM <= 0 and LLM_RATE_LIMIT_TPM <= 0:
+        return None
+    return SharedTokenBuckets()
+
+
+rate_limiter = LLMRateLimiter(_open_buckets)
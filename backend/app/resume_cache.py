@@ -0,0 +1,53 @@
+"""
+Cache of parsed resumes keyed by the sha256 of the uploaded file.
+
+Candidates upload the same resume against job after job; this keeps the
+extracted text and the structured fields so repeat uploads skip PDF parsing
+and the field-extraction LLM call. Memory is bounded by the LRU entry limit.
+"""
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+from app.cache import LRUCache
+
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "256"))
+RESUME_CACHE_TTL = float(os.getenv("RESUME_CACHE_TTL_SECONDS", str(6 * 3600)))
+
+
+def resume_file_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParsedResumeCache:
+    """Extracted text and structured fields per uploaded file hash"""
+
+    def __init__(self, max_entries: int = RESUME_CACHE_MAX_ENTRIES, ttl: Optional[float] = RESUME_CACHE_TTL):
+        self._entries = LRUCache(max_entries=max_entries, ttl=ttl)
+
+    def _get(self, resume_hash: str) -> Dict[str, Any]:
+        return self._entries.get(resume_hash) or {}
+
+    def get_text(self, resume_hash: str) -> Optional[str]:
+        return self._get(resume_hash).get("text")
+
+    def get_fields(self, resume_hash: str) -> Optional[dict]:
+        return self._get(resume_hash).get("fields")
+
+    def put_text(self, resume_hash: str, text: str):
+        self._entries.set(resume_hash, {**self._entries.peek(resume_hash, {}), "text": text})
+
+    def put_fields(self, resume_hash: str, fields: dict):
+        self._entries.set(resume_hash, {**self._entries.peek(resume_hash, {}), "fields": fields})
+
+    def invalidate(self, resume_hash: str) -> bool:
+        return self._entries.invalidate(resume_hash)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._entries.stats()
+
+
+resume_cache = ParsedResumeCache()
@@ -0,0 +1,114 @@
+"""
+Vectorized skill-match scoring over interned skill IDs.
+
+calculate_match_score scores one resume against one posting. Batch flows
+score whole candidate pools, so here every skill is interned to an integer
+ID and each resume becomes a row of a boolean matrix; each posting's
+required/preferred skills become count vectors (a skill listed twice counts
+twice, exactly as in the list-based scoring). Matches for every
+resume x job pair then fall out of one matrix product.
+
+Scores are identical to calculate_skill_match_score /
+calculate_experience_score / calculate_match_score: the same 0.7/0.3 and
+0.6/0.4 weights applied in the same order of floating point operations.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.skill_taxonomy import skill_taxonomy
+
+
+class SkillVocabulary:
+    """Interns skills to dense integer IDs; aliases of one taxonomy skill share an ID"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+
+    @staticmethod
+    def key(skill: str) -> str:
+        return skill_taxonomy.key(skill)
+
+    def intern(self, skill: str) -> int:
+        return self._ids.setdefault(self.key(skill), len(self._ids))
+
+    def lookup(self, skill: str) -> Optional[int]:
+        return self._ids.get(self.key(skill))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def _count_matrix(vocab: SkillVocabulary, skill_lists: Sequence[Sequence[str]]) -> np.ndarray:
+    """(len(skill_lists) x len(vocab)) matrix of how often each skill occurs in each list"""
+    rows = np.zeros((len(skill_lists), len(vocab)), dtype=np.int32)
+    for row, skills in enumerate(skill_lists):
+        for skill in skills:
+            rows[row, vocab.lookup(skill)] += 1
+    return rows
+
+
+def _fraction_score(matches: np.ndarray, totals: np.ndarray, weight: float) -> np.ndarray:
+    """(matches / total) * weight per column, 0.0 where the posting lists no skills"""
+    safe_totals = np.where(totals > 0, totals, 1)
+    return np.where(totals > 0, (matches / safe_totals) * weight, 0.0)
+
+
+def experience_scores(resume_years: np.ndarray, required_years: np.ndarray) -> np.ndarray:
+    """Broadcasting version of calculate_experience_score"""
+    resume_years = resume_years.astype(np.float64)
+    required_years = required_years.astype(np.float64)
+    safe_required = np.where(required_years == 0, 1.0, required_years)
+    excess = np.minimum(resume_years - required_years, required_years * 0.5)
+    exceeding = 0.8 + (excess / safe_required) * 0.2
+    short = np.maximum(0.0, 0.8 - ((required_years - resume_years) / safe_required) * 0.8)
+    scores = np.where(resume_years >= required_years, exceeding, short)
+    return np.where(required_years == 0, 0.8, scores)
+
+
+class SkillMatchMatrix:
+    """
+    Resumes x jobs match scoring.
+
+    resume_skills is one skill list per resume; jobs is one dict per posting
+    with "job_skills", "required_skills" and "preferred_skills" lists.
+    """
+
+    def __init__(self, resume_skills: Sequence[Sequence[str]], jobs: Sequence[Dict[str, Any]]):
+        self.vocab = SkillVocabulary()
+        skill_taxonomy.lookup_many([skill for skills in resume_skills for skill in skills] +
+                                   [skill for job in jobs for skill in job["required_skills"] + job["preferred_skills"]])
+        for skills in resume_skills:
+            for skill in skills:
+                self.vocab.intern(skill)
+        for job in jobs:
+            for skill in job["required_skills"] + job["preferred_skills"]:
+                self.vocab.intern(skill)
+
+        self.jobs = jobs
+        # resumes x vocab: does the resume list the skill at all
+        self.resumes = _count_matrix(self.vocab, resume_skills) > 0
+        # jobs x vocab: how often the posting lists the skill
+        self.required = _count_matrix(self.vocab, [job["required_skills"] for job in jobs])
+        self.preferred = _count_matrix(self.vocab, [job["preferred_skills"] for job in jobs])
+        self.has_job_skills = np.array([bool(job["job_skills"]) for job in jobs], dtype=bool)
+
+    def skill_scores(self) -> np.ndarray:
+        """resumes x jobs matrix equal to calculate_skill_match_score for every pair"""
+        resumes = self.resumes.astype(np.int32)
+        required_matches = resumes @ self.required.T
+        preferred_matches = resumes @ self.preferred.T
+        required_score = _fraction_score(required_matches, self.required.sum(axis=1), 0.7)
+        preferred_score = _fraction_score(preferred_matches, self.preferred.sum(axis=1), 0.3)
+        return np.where(self.has_job_skills, required_score + preferred_score, 0.0)
+
+    def missing_counts(self, which: str = "required") -> np.ndarray:
+        """resumes x jobs count of required (or preferred) skill entries the resume lacks"""
+        wanted = self.required if which == "required" else self.preferred
+        return (~self.resumes).astype(np.int32) @ wanted.T
+
+    def missing_skills(self, resume: int, job: int, which: str = "required") -> List[str]:
+        """The posting's required (or preferred) skills missing from the resume, in posting order"""
+        row = self.resumes[resume]
+        return [skill for skill in self.jobs[job][f"{which}_skills"] if not row[self.vocab.lookup(skill)]]
+
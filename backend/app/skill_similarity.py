@@ -0,0 +1,114 @@
+"""
+Fuzzy skill matching with character n-gram TF-IDF vectors.
+
+The taxonomy index only recognizes exact aliases, so spellings that differ
+only in punctuation, spacing or a generic suffix ("React.js" / "ReactJS",
+"scikit learn" / "Scikit-learn", "CI/CD pipelines" / "CI/CD") fall through
+to the case-insensitive string comparison. Here every taxonomy term is
+embedded as a TF-IDF vector over its character 2-4-grams, after dropping
+punctuation, whitespace and qualifier words like "pipelines" or "skills",
+and the L2-normalized matrix is built once. Resolving a batch of unknown
+skills is then one matrix product: each query takes the canonical skill
+of its most similar term if the cosine similarity reaches
+SKILL_SIMILARITY_THRESHOLD.
+
+Query n-grams that never occur in the taxonomy still count towards the
+query's norm (with the highest IDF), so "Javas" is not a perfect match
+for "Java" just because all of "Java"'s n-grams are present.
+"""
+import math
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SKILL_SIMILARITY_THRESHOLD = float(os.getenv("SKILL_SIMILARITY_THRESHOLD", "0.8"))
+NGRAM_SIZES = (2, 3, 4)
+
+# Words that qualify a skill without changing which skill it is
+QUALIFIER_WORDS = {
+    "pipeline", "pipelines", "cluster", "clusters", "skill", "skills", "framework", "frameworks",
+    "library", "libraries", "programming", "language", "languages", "development", "experience",
+    "tool", "tools", "platform",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def similarity_form(term: str) -> str:
+    """Lowercase alphanumerics (and + #) without qualifier words, padded with ^ and $"""
+    words = _WORD_RE.findall(term.lower().replace("/", ""))
+    kept = [word for word in words if word not in QUALIFIER_WORDS] or words
+    return "^" + "".join(kept) + "$"
+
+
+def char_ngrams(term: str) -> Dict[str, int]:
+    """Counts of the character n-grams of similarity_form(term)"""
+    form = similarity_form(term)
+    counts: Dict[str, int] = {}
+    for n in NGRAM_SIZES:
+        for i in range(len(form) - n + 1):
+            gram = form[i:i + n]
+            counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class SkillSimilarityIndex:
+    """TF-IDF n-gram matrix over (term, canonical name) pairs"""
+
+    def __init__(self, terms: Iterable[Tuple[str, str]], threshold: float = SKILL_SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        pairs = list(terms)
+        self.canonical_names = [canonical for _, canonical in pairs]
+        documents = [char_ngrams(term) for term, _ in pairs]
+
+        document_frequency: Dict[str, int] = {}
+        for grams in documents:
+            for gram in grams:
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+        self.vocabulary = {gram: i for i, gram in enumerate(document_frequency)}
+        count = len(documents)
+        # Smoothed IDF, as in scikit-learn's TfidfVectorizer
+        self.idf = np.array([math.log((1 + count) / (1 + document_frequency[gram])) + 1
+                             for gram in self.vocabulary], dtype=np.float64)
+        self.unseen_idf = math.log(1 + count) + 1
+
+        matrix = np.zeros((count, len(self.vocabulary)), dtype=np.float64)
+        for row, grams in enumerate(documents):
+            for gram, n in grams.items():
+                matrix[row, self.vocabulary[gram]] = n
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+    def _query_matrix(self, queries: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(queries), len(self.vocabulary)), dtype=np.float64)
+        unseen_weight = np.zeros(len(queries), dtype=np.float64)
+        for row, query in enumerate(queries):
+            for gram, n in char_ngrams(query).items():
+                column = self.vocabulary.get(gram)
+                if column is None:
+                    unseen_weight[row] += (n * self.unseen_idf) ** 2
+                else:
+                    vectors[row, column] = n * self.idf[column]
+        norms = np.sqrt((vectors ** 2).sum(axis=1) + unseen_weight)
+        return vectors / np.where(norms > 0, norms, 1.0)[:, None]
+
+    def similarities(self, queries: Sequence[str]) -> np.ndarray:
+        """queries x terms cosine similarity matrix"""
+        if not queries:
+            return np.zeros((0, len(self.canonical_names)))
+        return self._query_matrix(queries) @ self.matrix.T
+
+    def nearest(self, queries: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+        """(canonical name or None, similarity) of the closest term for each query"""
+        if not queries or not self.canonical_names:
+            return [(None, 0.0) for _ in queries]
+        scores = self.similarities(queries)
+        best = scores.argmax(axis=1)
+        results = []
+        for row, column in enumerate(best):
+            score = float(scores[row, column])
+            results.append((self.canonical_names[column] if score >= self.threshold else None, score))
+        return results
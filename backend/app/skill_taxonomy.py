@@ -0,0 +1,146 @@
+"""
+Skill taxonomy: canonical skill names and their aliases.
+
+"JS" and "JavaScript", "k8s" and "Kubernetes", "Postgres" and "PostgreSQL"
+are the same skill, but plain lowercase comparison counts them as misses.
+The taxonomy is loaded once from a JSON data file (SKILL_TAXONOMY_PATH)
+into a hash index from every normalized alias to its canonical entry, so
+canonicalizing a skill is one dict lookup. Skills that are not in the
+taxonomy are kept as written and compared case-insensitively.
+
+Aliases listed under "ambiguous_aliases" (e.g. "ts", "rest") are fine for
+canonicalizing skill lists but too common as plain words to search for in
+free text, so terms(for_text_search=True) leaves them out.
+
+A skill that matches no alias exactly falls back to the fuzzy n-gram index
+in app.skill_similarity ("ReactJS" -> React), unless SKILL_FUZZY_MATCHING
+is off. Fuzzy results are memoized per normalized term; lookup_many()
+resolves a whole list of new terms with one matrix product. The pipeline's
+worker threads share the memo, so it is only read with single get()s and
+cleared and filled under a lock.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.skill_similarity import SkillSimilarityIndex
+
+logger = logging.getLogger(__name__)
+
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(__file__), "data", "skill_taxonomy.json")
+)
+SKILL_FUZZY_MATCHING = os.getenv("SKILL_FUZZY_MATCHING", "true").lower() in ("1", "true", "yes")
+# Unknown terms remembered with their fuzzy result; cleared when full
+SKILL_FUZZY_CACHE_SIZE = int(os.getenv("SKILL_FUZZY_CACHE_SIZE", "20000"))
+
+# Marks a term with no memoized fuzzy result (None is a memoized "no match")
+_MISSING = object()
+
+
+def normalize_term(term: str) -> str:
+    """Lowercase and collapse whitespace: the form used as index key"""
+    return " ".join(term.lower().split())
+
+
+class SkillTaxonomy:
+    """Alias -> canonical skill index"""
+
+    def __init__(self, skills: List[Dict[str, any]], ambiguous_aliases: List[str] = (),
+                 fuzzy: bool = SKILL_FUZZY_MATCHING):
+        self.skills = skills
+        self.fuzzy = fuzzy
+        self._similarity: Optional[SkillSimilarityIndex] = None  # built on first fuzzy lookup
+        self._fuzzy_matches: Dict[str, Optional[Dict[str, any]]] = {}
+        self._fuzzy_lock = threading.Lock()
+        self.ambiguous_aliases = set(normalize_term(alias) for alias in ambiguous_aliases)
+        self._index: Dict[str, Dict[str, any]] = {}
+        for entry in skills:
+            for term in [entry["name"]] + entry.get("aliases", []):
+                key = normalize_term(term)
+                existing = self._index.get(key)
+                if existing is not None and existing is not entry:
+                    raise ValueError(f"Skill term '{term}' maps to both {existing['name']} and {entry['name']}")
+                self._index[key] = entry
+
+    @classmethod
+    def load(cls, path: str = SKILL_TAXONOMY_PATH) -> "SkillTaxonomy":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        taxonomy = cls(data["skills"], data.get("ambiguous_aliases", []))
+        logger.debug("Loaded skill taxonomy with %s skills, %s terms", len(taxonomy.skills), len(taxonomy._index))
+        return taxonomy
+
+    def similarity_index(self) -> SkillSimilarityIndex:
+        if self._similarity is None:
+            self._similarity = SkillSimilarityIndex(self.terms())
+        return self._similarity
+
+    def lookup_many(self, skills: Iterable[str]) -> List[Optional[Dict[str, any]]]:
+        """lookup() for a list of skills, with one fuzzy query for all new unknown terms"""
+        keys = [normalize_term(skill) for skill in skills]
+        # Fuzzy results for this call, so another thread clearing the memo cannot lose them
+        matches: Dict[str, Optional[Dict[str, any]]] = {}
+        if self.fuzzy:
+            unknown = []
+            for key in dict.fromkeys(keys):
+                if not key or key in self._index:
+                    continue
+                match = self._fuzzy_matches.get(key, _MISSING)
+                if match is _MISSING:
+                    unknown.append(key)
+                else:
+                    matches[key] = match
+            if unknown:
+                found = {key: self._index[normalize_term(canonical)] if canonical else None
+                         for key, (canonical, _) in zip(unknown, self.similarity_index().nearest(unknown))}
+                matches.update(found)
+                with self._fuzzy_lock:
+                    if len(self._fuzzy_matches) + len(found) > SKILL_FUZZY_CACHE_SIZE:
+                        self._fuzzy_matches.clear()
+                    self._fuzzy_matches.update(found)
+        return [self._index.get(key) or matches.get(key) for key in keys]
+
+    def lookup(self, skill: str) -> Optional[Dict[str, any]]:
+        """Taxonomy entry for a skill name or alias (or a close variant of one), or None"""
+        key = normalize_term(skill)
+        entry = self._index.get(key)
+        if entry is not None or not self.fuzzy or not key:
+            return entry
+        match = self._fuzzy_matches.get(key, _MISSING)
+        if match is _MISSING:
+            return self.lookup_many([skill])[0]
+        return match
+
+    def canonical(self, skill: str) -> str:
+        """Canonical display name; unknown skills are returned stripped"""
+        entry = self.lookup(skill)
+        return entry["name"] if entry is not None else skill.strip()
+
+    def key(self, skill: str) -> str:
+        """Comparison key: equal for every alias of the same skill"""
+        entry = self.lookup(skill)
+        return normalize_term(entry["name"]) if entry is not None else normalize_term(skill)
+
+    def category(self, skill: str) -> Optional[str]:
+        entry = self.lookup(skill)
+        return entry.get("category") if entry is not None else None
+
+    def terms(self, for_text_search: bool = False) -> Iterator[Tuple[str, str]]:
+        """(term, canonical name) for every name and alias"""
+        for entry in self.skills:
+            yield entry["name"], entry["name"]
+            for alias in entry.get("aliases", []):
+                if for_text_search and normalize_term(alias) in self.ambiguous_aliases:
+                    continue
+                yield alias, entry["name"]
+
+    def __contains__(self, skill: str) -> bool:
+        """Exact name/alias membership; fuzzy variants are not included"""
+        return normalize_term(skill) in self._index
+
+
+skill_taxonomy = SkillTaxonomy.load()
@@ -1,206 +1,189 @@
-import spacy
-from app.utils import call_gpt
+from app.utils import call_gpt, call_gpt_async, call_gpt_stream, llm_available
+from app.llm_resilience import CircuitOpenError
+from app.rate_limit import BACKGROUND, BATCH, priority
+from app import prompts
+from app.prompts import BuiltPrompt, build_prompt
+from app.pipeline import Stage, run_stages, run_stages_async
+from app.jd_store import get_jd_store
+from app.resume_cache import resume_cache
+from app.skill_matrix import SkillMatchMatrix, experience_scores
+from app.skill_taxonomy import skill_taxonomy
+from app.keyword_matcher import keyword_matcher
+from app.experience_dates import professional_date_ranges, merge_intervals
+from app.local_pipeline import (extract_resume_fields_locally, analyze_job_description_locally,
+                                tailor_resume_fields_locally, render_latex_resume)
+import asyncio
+import logging
 import re
-from typing import Dict, List, Tuple
+import sqlite3
+from dataclasses import replace
+from functools import partial
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 import math
+import os
+import numpy as np
 
-# Load the spaCy model
-nlp = spacy.load("en_core_web_sm")
+logger = logging.getLogger(__name__)
 
-def extract_experience_years(text: str) -> int:
-    """Extract years of experience from text using GPT and date analysis"""
-    
-    # First, try to calculate from date ranges (more accurate)
-    print("[DEBUG] Attempting to calculate experience from date ranges...")
+# "llm" runs every stage through the OpenAI API, "local" uses the spaCy and
+# pattern extractors in app.local_pipeline, "auto" picks local while the API
+# is recovering from an outage. In "llm" mode each stage still switches to
+# its local counterpart while the LLM circuit breaker is open.
+TAILOR_MODES = ("auto", "llm", "local")
+TAILOR_MODE = os.getenv("TAILOR_MODE", "auto")
+
+# Per-stage deadlines (seconds) for the concurrent process_resume pipeline
+STAGE_TIMEOUTS = {
+    "resume_fields": 60,
+    "job_analysis": 60,
+    "resume_years": 45,
+    "ats_resume_fields": 90,
+    "latex_content": 120,
+}
+
+def _experience_years_from_dates(text: str) -> int:
+    """Return years of experience computed from date ranges, or 0 if none were found"""
+    logger.debug("Attempting to calculate experience from date ranges...")
     date_calculated_years = calculate_experience_from_dates(text)
     
     if date_calculated_years > 0:
-        print(f"[DEBUG] Successfully calculated {date_calculated_years} years from dates")
+        logger.debug("Successfully calculated %s years from dates", date_calculated_years)
         return round(date_calculated_years)
+    return 0
+
+def _experience_years_prompt(text: str) -> BuiltPrompt:
+    return build_prompt(prompts.EXPERIENCE_YEARS, text=text)
+
+def _parse_experience_years(response: str) -> int:
+    """Pull a sane number of years (0-50) out of the GPT experience response"""
+    logger.debug("GPT experience response: %s", response)
     
-    # Fallback to GPT extraction
-    print("[DEBUG] Falling back to GPT extraction...")
-    prompt = f"""
-Extract the total years of PROFESSIONAL experience from the following text.
-IMPORTANT: 
-- Return ONLY a single number representing total years of experience (e.g., 5, 3, 7).
-- Do NOT include internships, part-time work, or academic projects in the total.
-- Only count full-time professional work experience.
-- If multiple roles, sum only the professional experience years.
-- Do NOT include any other numbers like calendar years (2020, 2023, etc.) or other text.
-- If no specific years mentioned, estimate based on job history and roles.
-
-Text: {text}
-"""
+    # Clean the response and extract only experience years
+    cleaned_response = response.strip().lower()
     
-    try:
-        response = call_gpt(prompt)
-        print(f"[DEBUG] GPT experience response: {response}")
+    # Look for patterns like "X years", "X year", "X yrs", etc.
+    # Prioritize professional experience patterns
+    year_patterns = [
+        # Professional experience patterns (highest priority)
+        r'(\d+)\s*years?\s*of\s*professional\s*experience',
+        r'(\d+)\s*yrs?\s*of\s*professional\s*experience',
+        r'(\d+)\s*years?\s*professional\s*experience',
+        r'(\d+)\s*yrs?\s*professional\s*experience',
         
-        # Clean the response and extract only experience years
-        cleaned_response = response.strip().lower()
+        # General experience patterns (medium priority)
+        r'(\d+)\s*years?\s*of\s*experience',
+        r'(\d+)\s*yrs?\s*of\s*experience', 
+        r'(\d+)\s*years?\s*experience',
+        r'(\d+)\s*yrs?\s*experience',
         
-        # Look for patterns like "X years", "X year", "X yrs", etc.
-        # Prioritize professional experience patterns
-        year_patterns = [
-            # Professional experience patterns (highest priority)
-            r'(\d+)\s*years?\s*of\s*professional\s*experience',
-            r'(\d+)\s*yrs?\s*of\s*professional\s*experience',
-            r'(\d+)\s*years?\s*professional\s*experience',
-            r'(\d+)\s*yrs?\s*professional\s*experience',
-            
-            # General experience patterns (medium priority)
-            r'(\d+)\s*years?\s*of\s*experience',
-            r'(\d+)\s*yrs?\s*of\s*experience', 
-            r'(\d+)\s*years?\s*experience',
-            r'(\d+)\s*yrs?\s*experience',
-            
-            # Simple patterns (lowest priority)
-            r'(\d+)\s*years?',
-            r'(\d+)\s*yrs?',
-            r'^(\d+)$'  # Just a number
-        ]
-        
-        for pattern in year_patterns:
-            match = re.search(pattern, cleaned_response)
-            if match:
-                years = int(match.group(1))
-                # Sanity check: reasonable experience range (0-50 years)
-                if 0 <= years <= 50:
-                    print(f"[DEBUG] Extracted {years} years of experience")
-                    return years
-                else:
-                    print(f"[WARNING] Unreasonable years extracted: {years}, skipping")
-        
-        # Fallback: extract any reasonable number
-        numbers = re.findall(r'\d+', cleaned_response)
-        for num_str in numbers:
-            years = int(num_str)
+        # Simple patterns (lowest priority)
+        r'(\d+)\s*years?',
+        r'(\d+)\s*yrs?',
+        r'^(\d+)$'  # Just a number
+    ]
+    
+    for pattern in year_patterns:
+        match = re.search(pattern, cleaned_response)
+        if match:
+            years = int(match.group(1))
+            # Sanity check: reasonable experience range (0-50 years)
             if 0 <= years <= 50:
-                print(f"[DEBUG] Fallback extracted {years} years of experience")
+                logger.debug("Extracted %s years of experience", years)
                 return years
-        
-        print(f"[WARNING] No reasonable years found in response: {response}")
+            else:
+                logger.warning("Unreasonable years extracted: %s, skipping", years)
+    
+    # Fallback: extract any reasonable number
+    numbers = re.findall(r'\d+', cleaned_response)
+    for num_str in numbers:
+        years = int(num_str)
+        if 0 <= years <= 50:
+            logger.debug("Fallback extracted %s years of experience", years)
+            return years
+    
+    logger.warning("No reasonable years found in response: %s", response)
+    return 0
+
+def extract_experience_years(text: str) -> int:
+    """Extract years of experience from text using GPT and date analysis"""
+    
+    # First, try to calculate from date ranges (more accurate)
+    date_calculated_years = _experience_years_from_dates(text)
+    if date_calculated_years > 0:
+        return date_calculated_years
+    
+    # Fallback to GPT extraction
+    logger.debug("Falling back to GPT extraction...")
+    try:
+        return _parse_experience_years(call_gpt(_experience_years_prompt(text)))
+    except CircuitOpenError:
+        # The dates were the local estimate; without them there is nothing to go on
+        return 0
+    except Exception as e:
+        logger.error("Failed to extract experience years: %s", e)
+        return 0
+
+async def extract_experience_years_async(text: str) -> int:
+    """Async variant of extract_experience_years"""
+    date_calculated_years = _experience_years_from_dates(text)
+    if date_calculated_years > 0:
+        return date_calculated_years
+    
+    logger.debug("Falling back to GPT extraction...")
+    try:
+        return _parse_experience_years(await call_gpt_async(_experience_years_prompt(text)))
+    except CircuitOpenError:
+        # The dates were the local estimate; without them there is nothing to go on
         return 0
-        
     except Exception as e:
-        print(f"[ERROR] Failed to extract experience years: {str(e)}")
+        logger.error("Failed to extract experience years: %s", e)
         return 0
 
 def calculate_experience_from_dates(text: str) -> float:
-    """Calculate experience from date ranges in the text"""
+    """
+    Years of professional experience from the date ranges in the text.
+    Overlapping roles are counted once; see app.experience_dates.
+    """
     try:
-        # Look for date patterns like "2020-2023", "2018-2020", etc.
-        date_patterns = [
-            r'(\d{4})\s*-\s*(\d{4})',  # 2020-2023
-            r'(\d{4})\s*to\s*(\d{4})',  # 2020 to 2023
-            r'(\d{4})\s*until\s*(\d{4})',  # 2020 until 2023
-            r'(\d{4})\s*-\s*present',  # 2020-Present
-            r'(\d{4})\s*to\s*present',  # 2020 to Present
-            r'(\d{4})\s*-\s*now',  # 2020-Now
-        ]
-        
-        total_years = 0.0
-        professional_roles = 0
-        
-        # Split text into lines to analyze each role separately
-        lines = text.split('\n')
-        
-        for line in lines:
-            line_lower = line.lower()
-            
-            # Skip lines that mention internships, part-time, or academic work
-            if any(keyword in line_lower for keyword in ['internship', 'intern', 'part-time', 'academic', 'student', 'research assistant']):
-                continue
-                
-            # Look for date ranges in this line
-            for pattern in date_patterns:
-                matches = re.findall(pattern, line)
-                for match in matches:
-                    if len(match) == 2:  # Regular date range
-                        start_year, end_year = match
-                        start = int(start_year)
-                        
-                        # Handle "Present" dates
-                        if end_year.lower() in ['present', 'now', 'current']:
-                            from datetime import datetime
-                            current_year = datetime.now().year
-                            end = current_year
-                        else:
-                            end = int(end_year)
-                        
-                        # Sanity check for reasonable years
-                        if 1990 <= start <= 2030 and 1990 <= end <= 2030 and start <= end:
-                            years = end - start
-                            
-                            # Check if this looks like a professional role
-                            professional_keywords = ['engineer', 'developer', 'manager', 'analyst', 'consultant', 'specialist', 'lead', 'senior', 'junior']
-                            if any(keyword in line_lower for keyword in professional_keywords):
-                                total_years += years
-                                professional_roles += 1
-                                print(f"[DEBUG] Found professional role: {start}-{end} ({years} years)")
-                    elif len(match) == 1:  # Single year (like "2020-Present")
-                        start_year = match[0]
-                        start = int(start_year)
-                        
-                        # Handle "Present" dates
-                        from datetime import datetime
-                        current_year = datetime.now().year
-                        end = current_year
-                        
-                        # Sanity check for reasonable years
-                        if 1990 <= start <= 2030 and 1990 <= end <= 2030 and start <= end:
-                            years = end - start
-                            
-                            # Check if this looks like a professional role
-                            professional_keywords = ['engineer', 'developer', 'manager', 'analyst', 'consultant', 'specialist', 'lead', 'senior', 'junior']
-                            if any(keyword in line_lower for keyword in professional_keywords):
-                                total_years += years
-                                professional_roles += 1
-                                print(f"[DEBUG] Found professional role: {start}-{end} ({years} years)")
-        
-        if professional_roles > 0:
-            print(f"[DEBUG] Calculated {total_years} years from {professional_roles} professional roles")
-            return total_years
-        
-        return 0.0
-        
+        ranges = professional_date_ranges(text)
+        if not ranges:
+            return 0.0
+        months = sum(end - start for start, end in merge_intervals([(r.start, r.end) for r in ranges]))
+        logger.debug("Calculated %s months from %s professional roles", months, len(ranges))
+        return months / 12
     except Exception as e:
-        print(f"[ERROR] Failed to calculate experience from dates: {str(e)}")
+        logger.error("Failed to calculate experience from dates: %s", e)
         return 0.0
 
+def _parse_json_object(response: str) -> dict:
+    """Find the JSON object in a GPT response, or {} if there is none"""
+    import json
+    json_match = re.search(r'\{.*\}', response, re.DOTALL)
+    if json_match:
+        return json.loads(json_match.group())
+    return {}
+
+def _job_requirements_prompt(text: str) -> BuiltPrompt:
+    return build_prompt(prompts.JOB_REQUIREMENTS, text=text)
+
 def extract_job_requirements(text: str) -> Dict[str, any]:
     """Extract job requirements and their importance from job description"""
-    prompt = f"""
-Analyze this job description and extract key requirements with their importance levels.
-
-Return ONLY a JSON object with this structure:
-{{
-    "required_years": number (only years of experience required, not calendar years),
-    "required_skills": ["skill1", "skill2"],
-    "preferred_skills": ["skill1", "skill2"],
-    "required_education": "degree level",
-    "experience_level": "entry/mid/senior/lead",
-    "industry": "tech/finance/healthcare/etc"
-}}
-
-IMPORTANT: For "required_years", extract only the number of years of experience required (e.g., 5, 3, 7).
-Do NOT include calendar years like 2020, 2023, etc.
-
-Job Description: {text}
-"""
-    
     try:
-        response = call_gpt(prompt)
-        # Try to extract JSON from response
-        import json
-        # Find JSON-like content in response
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
+        return _parse_json_object(call_gpt(_job_requirements_prompt(text)))
+    except CircuitOpenError:
+        return analyze_job_description_locally(text)["requirements"]
+    except Exception as e:
+        logger.error("Failed to extract job requirements: %s", e)
         return {}
+
+async def extract_job_requirements_async(text: str) -> Dict[str, any]:
+    """Async variant of extract_job_requirements"""
+    try:
+        return _parse_json_object(await call_gpt_async(_job_requirements_prompt(text)))
+    except CircuitOpenError:
+        return analyze_job_description_locally(text)["requirements"]
     except Exception as e:
-        print(f"[ERROR] Failed to extract job requirements: {str(e)}")
+        logger.error("Failed to extract job requirements: %s", e)
         return {}
 
 def calculate_skill_match_score(resume_skills: List[str], job_skills: List[str], 
@@ -209,9 +192,12 @@ def calculate_skill_match_score(resume_skills: List[str], job_skills: List[str],
     if not job_skills:
         return 0.0
     
-    resume_skills_lower = [skill.lower() for skill in resume_skills]
-    required_skills_lower = [skill.lower() for skill in required_skills]
-    preferred_skills_lower = [skill.lower() for skill in preferred_skills]
+    # Aliases ("JS", "k8s") and close variants ("ReactJS") compare equal to
+    # their canonical skill; resolve the unknown ones in one batch
+    skill_taxonomy.lookup_many(list(resume_skills) + list(required_skills) + list(preferred_skills))
+    resume_skills_lower = set(skill_taxonomy.key(skill) for skill in resume_skills)
+    required_skills_lower = [skill_taxonomy.key(skill) for skill in required_skills]
+    preferred_skills_lower = [skill_taxonomy.key(skill) for skill in preferred_skills]
     
     # Calculate required skills match (weighted higher)
     required_matches = sum(1 for skill in required_skills_lower if skill in resume_skills_lower)
@@ -255,14 +241,21 @@ def get_recommendation_level(overall_score: float) -> Tuple[str, str, str]:
         return "Not Recommended", "Poor match. This position doesn't align with your background.", "red"
 
 def calculate_match_score(resume_text: str, job_description: str, 
-                         resume_skills: List[str], job_skills: List[str]) -> Dict[str, any]:
-    """Calculate comprehensive match score and recommendation"""
+                         resume_skills: List[str], job_skills: List[str],
+                         resume_years: int = None, job_requirements: Dict[str, any] = None) -> Dict[str, any]:
+    """
+    Calculate comprehensive match score and recommendation.
+    resume_years and job_requirements are extracted from the texts unless
+    already computed by the caller.
+    """
     
     # Extract experience years
-    resume_years = extract_experience_years(resume_text)
+    if resume_years is None:
+        resume_years = extract_experience_years(resume_text)
     
     # Extract job requirements
-    job_requirements = extract_job_requirements(job_description)
+    if job_requirements is None:
+        job_requirements = extract_job_requirements(job_description)
     required_years = job_requirements.get('required_years', 0)
     required_skills = job_requirements.get('required_skills', [])
     preferred_skills = job_requirements.get('preferred_skills', [])
@@ -284,8 +277,9 @@ def calculate_match_score(resume_text: str, job_description: str,
     experience_match_percentage = experience_score * 100
     
     # Identify gaps
-    missing_required = [skill for skill in required_skills if skill.lower() not in [s.lower() for s in resume_skills]]
-    missing_preferred = [skill for skill in preferred_skills if skill.lower() not in [s.lower() for s in resume_skills]]
+    resume_skills_lower = set(skill_taxonomy.key(s) for s in resume_skills)
+    missing_required = [skill for skill in required_skills if skill_taxonomy.key(skill) not in resume_skills_lower]
+    missing_preferred = [skill for skill in preferred_skills if skill_taxonomy.key(skill) not in resume_skills_lower]
     
     return {
         "overall_score": round(overall_score, 2),
@@ -304,90 +298,126 @@ def calculate_match_score(resume_text: str, job_description: str,
         "industry": industry
     }
 
-def extract_skills_with_gpt(text: str, context: str = "resume") -> List[str]:
+def calculate_match_scores_batch(resume_skills: List[List[str]], resume_years: List[int],
+                                 jobs: List[Dict[str, any]]) -> List[List[Dict[str, any]]]:
     """
-    Uses GPT to extract meaningful skills from text.
-    context can be "resume" or "job_description"
+    calculate_match_score for every resume x job pair at once, using the
+    vectorized SkillMatchMatrix. jobs are job analyses ({"skills": [...],
+    "requirements": {...}}). Returns match analyses indexed [resume][job],
+    identical to what calculate_match_score returns for each pair.
     """
-    prompt = f"""
-You are a professional skills analyzer. Extract specific, relevant skills from the following {context} text.
-
-IMPORTANT: Return ONLY a comma-separated list of skills, with no additional text, explanations, or formatting.
+    requirements = [job.get("requirements") or {} for job in jobs]
+    matrix = SkillMatchMatrix(resume_skills, [
+        {
+            "job_skills": job["skills"],
+            "required_skills": list(req.get('required_skills', [])),
+            "preferred_skills": list(req.get('preferred_skills', [])),
+        }
+        for job, req in zip(jobs, requirements)
+    ])
+    required_years = [req.get('required_years', 0) for req in requirements]
+    skill = matrix.skill_scores()
+    experience = experience_scores(np.array([years or 0 for years in resume_years], dtype=np.float64)[:, None],
+                                   np.array([years or 0 for years in required_years], dtype=np.float64)[None, :])
+    overall = (skill * 0.6) + (experience * 0.4)
 
-Focus on extracting:
-1. Programming Languages: Python, Java, JavaScript, C++, C#, Ruby, PHP, Go, Rust, Swift, Kotlin, TypeScript, etc.
-2. Frameworks & Libraries: React, Angular, Vue, Django, Flask, Spring, Node.js, Express, Laravel, ASP.NET, etc.
-3. Tools & Technologies: Docker, Kubernetes, AWS, Azure, GCP, Git, Jenkins, Travis CI, etc.
-4. Databases: MySQL, PostgreSQL, MongoDB, Redis, SQLite, Oracle, SQL Server, etc.
-5. Frontend Technologies: HTML, CSS, SASS, LESS, Bootstrap, Tailwind, Material-UI, etc.
-6. Data Science & ML: TensorFlow, PyTorch, Scikit-learn, Pandas, NumPy, Matplotlib, etc.
-7. Soft Skills: Leadership, Communication, Problem Solving, Teamwork, Project Management, etc.
-8. Industry Skills: Machine Learning, Data Analysis, Data Science, AI, Deep Learning, etc.
-9. Methodologies: Agile, Scrum, Kanban, Waterfall, DevOps, CI/CD, etc.
+    results = []
+    for r in range(len(resume_skills)):
+        row = []
+        for j, req in enumerate(requirements):
+            overall_score = float(overall[r, j])
+            skill_score = float(skill[r, j])
+            experience_score = float(experience[r, j])
+            recommendation_level, recommendation_text, color = get_recommendation_level(overall_score)
+            row.append({
+                "overall_score": round(overall_score, 2),
+                "skill_score": round(skill_score, 2),
+                "experience_score": round(experience_score, 2),
+                "skill_match_percentage": round(skill_score * 100, 1),
+                "experience_match_percentage": round(experience_score * 100, 1),
+                "recommendation_level": recommendation_level,
+                "recommendation_text": recommendation_text,
+                "color": color,
+                "resume_years": resume_years[r],
+                "required_years": required_years[j],
+                "missing_required_skills": matrix.missing_skills(r, j, "required"),
+                "missing_preferred_skills": matrix.missing_skills(r, j, "preferred"),
+                "experience_level": req.get('experience_level', 'mid'),
+                "industry": req.get('industry', 'tech')
+            })
+        results.append(row)
+    return results
 
-Only include skills that are explicitly mentioned or clearly implied in the text. Do not infer skills that are not present.
+def _skills_prompt(text: str, context: str) -> BuiltPrompt:
+    return build_prompt(prompts.SKILLS, text=text, context=context)
 
-Text to analyze:
-{text}
-"""
+def _parse_skills_response(response: str, text: str) -> List[str]:
+    """Split GPT's comma-separated skills, topping up with pattern matching if too few"""
+    # Clean up the response and split into individual skills
+    skills = [skill.strip() for skill in response.split(',') if skill.strip()]
+    # Remove any empty strings and duplicates
+    skills = list(set([skill for skill in skills if skill and len(skill) > 1]))
+    
+    # If GPT returned very few skills, fall back to pattern matching
+    if len(skills) < 3:
+        logger.warning("GPT returned only %s skills, falling back to pattern matching", len(skills))
+        pattern_skills = extract_basic_keywords(text)
+        # Combine both methods, prioritizing GPT results
+        combined_skills = list(set(skills + pattern_skills))
+        return combined_skills
     
+    return skills
+
+def extract_skills_with_gpt(text: str, context: str = "resume") -> List[str]:
+    """
+    Uses GPT to extract meaningful skills from text.
+    context can be "resume" or "job_description"
+    """
     try:
-        response = call_gpt(prompt)
-        # Clean up the response and split into individual skills
-        skills = [skill.strip() for skill in response.split(',') if skill.strip()]
-        # Remove any empty strings and duplicates
-        skills = list(set([skill for skill in skills if skill and len(skill) > 1]))
-        
-        # If GPT returned very few skills, fall back to pattern matching
-        if len(skills) < 3:
-            print(f"[WARNING] GPT returned only {len(skills)} skills, falling back to pattern matching")
-            pattern_skills = extract_basic_keywords(text)
-            # Combine both methods, prioritizing GPT results
-            combined_skills = list(set(skills + pattern_skills))
-            return combined_skills
-        
-        return skills
+        return _parse_skills_response(call_gpt(_skills_prompt(text, context)), text)
+    except CircuitOpenError:
+        return extract_basic_keywords(text)
     except Exception as e:
-        print(f"[ERROR] Failed to extract skills with GPT: {str(e)}")
-        print("[INFO] Falling back to pattern-based keyword extraction")
+        logger.error("Failed to extract skills with GPT: %s", e)
+        logger.info("Falling back to pattern-based keyword extraction")
         # Fallback to basic keyword extraction
         return extract_basic_keywords(text)
 
+async def extract_skills_with_gpt_async(text: str, context: str = "resume") -> List[str]:
+    """Async variant of extract_skills_with_gpt"""
+    try:
+        return _parse_skills_response(await call_gpt_async(_skills_prompt(text, context)), text)
+    except CircuitOpenError:
+        return extract_basic_keywords(text)
+    except Exception as e:
+        logger.error("Failed to extract skills with GPT: %s", e)
+        logger.info("Falling back to pattern-based keyword extraction")
+        return extract_basic_keywords(text)
+
 def extract_basic_keywords(text: str) -> List[str]:
-    """Fallback method for basic keyword extraction"""
-    # Common technical skills patterns
-    skill_patterns = [
-        r'\b(?:Python|Java|JavaScript|C\+\+|C#|Ruby|PHP|Go|Rust|Swift|Kotlin|TypeScript|Scala|Perl|R|MATLAB)\b',
-        r'\b(?:React|Angular|Vue|Django|Flask|Spring|Node\.js|Express|Laravel|ASP\.NET|FastAPI|Ruby on Rails)\b',
-        r'\b(?:MySQL|PostgreSQL|MongoDB|Redis|SQLite|Oracle|SQL Server|Cassandra|DynamoDB|Neo4j)\b',
-        r'\b(?:Docker|Kubernetes|AWS|Azure|GCP|Heroku|DigitalOcean|Vercel|Netlify|Firebase)\b',
-        r'\b(?:Git|SVN|Jenkins|Travis CI|CircleCI|GitHub Actions|GitLab CI|Bitbucket Pipelines)\b',
-        r'\b(?:HTML|CSS|SASS|LESS|Bootstrap|Tailwind|Material-UI|Ant Design|Chakra UI|Semantic UI)\b',
-        r'\b(?:TensorFlow|PyTorch|Scikit-learn|Pandas|NumPy|Matplotlib|Seaborn|Plotly|Keras|OpenCV)\b',
-        r'\b(?:Leadership|Communication|Problem Solving|Teamwork|Project Management|Collaboration)\b',
-        r'\b(?:Machine Learning|Data Analysis|Data Science|AI|Deep Learning|Computer Vision|NLP)\b',
-        r'\b(?:Agile|Scrum|Kanban|Waterfall|DevOps|CI/CD|TDD|BDD|Microservices|REST API)\b',
-        r'\b(?:Linux|Unix|Windows|macOS|Shell|Bash|PowerShell|Ansible|Terraform|CloudFormation)\b',
-        r'\b(?:Jira|Confluence|Slack|Teams|Zoom|Figma|Adobe Creative Suite|Photoshop|Illustrator)\b'
-    ]
-    
-    skills = set()
-    for pattern in skill_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        skills.update(matches)
-    
-    return list(skills)
+    """
+    Fallback method for basic keyword extraction.
+    Finds every skill name and alias from the taxonomy in one pass over the
+    text and returns their canonical names.
+    """
+    return keyword_matcher.find_skills(text)
 
 def normalize_skills(skills: List[str]) -> List[str]:
-    """Normalize skills for better matching (case-insensitive, remove duplicates)"""
+    """
+    Normalize skills for better matching: aliases and close variants are
+    mapped to their canonical taxonomy name ("k8s" -> "Kubernetes",
+    "ReactJS" -> "React") and duplicates removed
+    (case-insensitive).
+    """
     normalized = []
     seen = set()
+    skill_taxonomy.lookup_many(skills)
     
     for skill in skills:
-        # Normalize case and strip whitespace
-        normalized_skill = skill.strip().lower()
+        # Canonical key folds case, whitespace and known aliases
+        normalized_skill = skill_taxonomy.key(skill)
         if normalized_skill and normalized_skill not in seen:
-            normalized.append(skill.strip())  # Keep original case for display
+            normalized.append(skill_taxonomy.canonical(skill))  # Canonical (or original) case for display
             seen.add(normalized_skill)
     
     return normalized
@@ -477,212 +507,626 @@ def extract_keywords(text: str) -> List[str]:
 #     return anonymized_text, anonymization_map
 
 # --- NEW LLM-BASED EXTRACTION ---
+def _resume_fields_prompt(resume_text: str) -> BuiltPrompt:
+    return build_prompt(prompts.RESUME_FIELDS, resume_text=resume_text)
+
 def extract_resume_fields_with_llm(resume_text: str) -> dict:
     """
     Use GPT to extract all key resume fields as structured JSON from raw resume text.
+    Raises CircuitOpenError while the LLM circuit breaker is open.
     """
-    prompt = f"""
-You are an expert resume parser. Extract the following fields from the resume below and return ONLY a JSON object with this structure:
-{{
-  "name": string,
-  "email": string,
-  "phone": string,
-  "location": string,
-  "summary": string,
-  "experience": [
-    {{"company": string, "title": string, "start": string, "end": string, "bullets": [string]}}
-  ],
-  "education": [
-    {{"degree": string, "institution": string, "year": string}}
-  ],
-  "skills": [string],
-  "projects": [
-    {{"name": string, "description": string}}
-  ]
-}}
-IMPORTANT:
-- The name should be the person's full name, not a job title or location.
-- The email and phone should be valid if present.
-- The summary should be 1-3 sentences summarizing the candidate.
-- Experience and education should be arrays, even if only one entry.
-- Skills should be a list of specific skills.
-- Projects are optional.
-- If a field is missing, use an empty string or empty array.
-
-Resume:
-{resume_text}
-"""
     try:
-        response = call_gpt(prompt)
-        import json
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
+        return _parse_json_object(call_gpt(_resume_fields_prompt(resume_text)))
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error("Failed to extract resume fields with LLM: %s", e)
         return {}
+
+async def extract_resume_fields_with_llm_async(resume_text: str) -> dict:
+    """Async variant of extract_resume_fields_with_llm"""
+    try:
+        return _parse_json_object(await call_gpt_async(_resume_fields_prompt(resume_text)))
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        print(f"[ERROR] Failed to extract resume fields with LLM: {str(e)}")
+        logger.error("Failed to extract resume fields with LLM: %s", e)
         return {}
 
+def get_resume_fields(resume_text: str, resume_hash: str = None) -> dict:
+    """
+    Structured resume fields, served from the parsed-resume cache when the
+    same file (by upload hash) was processed before.
+    """
+    if resume_hash:
+        cached = resume_cache.get_fields(resume_hash)
+        if cached:
+            logger.debug("Reusing cached resume fields")
+            return cached
+    try:
+        fields = extract_resume_fields_with_llm(resume_text)
+    except CircuitOpenError:
+        # Not cached, so the next run with the API back extracts the richer LLM fields
+        return extract_resume_fields_locally(resume_text)
+    if resume_hash and fields:
+        resume_cache.put_fields(resume_hash, fields)
+    return fields
+
+async def get_resume_fields_async(resume_text: str, resume_hash: str = None) -> dict:
+    """Async variant of get_resume_fields"""
+    if resume_hash:
+        cached = resume_cache.get_fields(resume_hash)
+        if cached:
+            logger.debug("Reusing cached resume fields")
+            return cached
+    try:
+        fields = await extract_resume_fields_with_llm_async(resume_text)
+    except CircuitOpenError:
+        # Not cached, so the next run with the API back extracts the richer LLM fields
+        return extract_resume_fields_locally(resume_text)
+    if resume_hash and fields:
+        resume_cache.put_fields(resume_hash, fields)
+    return fields
+
+# --- JOB DESCRIPTION ANALYSIS ---
+def _job_analysis_prompt(text: str) -> BuiltPrompt:
+    return build_prompt(prompts.JOB_ANALYSIS, text=text)
+
+def _parse_job_analysis(response: str, text: str) -> Dict[str, any]:
+    """
+    Split the single-pass analysis into the flat skill list and the
+    requirements dict, topping up a short skill list with pattern matching.
+    """
+    parsed = _parse_json_object(response)
+    skills = [skill.strip() for skill in parsed.pop("skills", []) or [] if isinstance(skill, str)]
+    skills = list(set([skill for skill in skills if len(skill) > 1]))
+    if len(skills) < 3:
+        logger.warning("Job analysis returned only %s skills, falling back to pattern matching", len(skills))
+        skills = list(set(skills + extract_basic_keywords(text)))
+    return {"skills": skills, "requirements": parsed}
+
+def _fallback_job_analysis(text: str) -> Dict[str, any]:
+    return {"skills": extract_basic_keywords(text), "requirements": {}}
+
+def extract_job_analysis(text: str) -> Dict[str, any]:
+    """
+    Extract the job's skills and requirements with one LLM call.
+    Returns {"skills": [...], "requirements": {...}} where requirements has the
+    same keys as extract_job_requirements. Raises CircuitOpenError while the
+    LLM circuit breaker is open.
+    """
+    try:
+        return _parse_job_analysis(call_gpt(_job_analysis_prompt(text)), text)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error("Failed to analyze job description: %s", e)
+        return _fallback_job_analysis(text)
+
+async def extract_job_analysis_async(text: str) -> Dict[str, any]:
+    """Async variant of extract_job_analysis"""
+    try:
+        return _parse_job_analysis(await call_gpt_async(_job_analysis_prompt(text)), text)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error("Failed to analyze job description: %s", e)
+        return _fallback_job_analysis(text)
+
+def _stored_job_analysis(job_description: str) -> Optional[Dict[str, any]]:
+    # The store only saves LLM calls; when it is unusable the posting is analyzed afresh
+    try:
+        return get_jd_store().get(job_description)
+    except sqlite3.Error as e:
+        logger.warning("JD analysis store unavailable: %s", e)
+        return None
+
+def _store_job_analysis(job_description: str, analysis: Dict[str, any]):
+    # Only complete analyses are worth keeping; a failed call leaves requirements empty
+    if analysis["skills"] and analysis["requirements"]:
+        try:
+            get_jd_store().put(job_description, analysis)
+        except sqlite3.Error as e:
+            logger.warning("Could not store JD analysis: %s", e)
+
+def analyze_job_description(job_description: str) -> Dict[str, any]:
+    """
+    Extract the job's skills and requirements, reusing the stored analysis
+    when the same posting (after normalization) has been analyzed before.
+    Returns {"skills": [...], "requirements": {...}}.
+    """
+    analysis = _stored_job_analysis(job_description)
+    if analysis is not None:
+        logger.debug("Reusing stored job description analysis")
+        return analysis
+    try:
+        analysis = extract_job_analysis(job_description)
+    except CircuitOpenError:
+        # Not stored, for the same reason as the local resume fields
+        return analyze_job_description_locally(job_description)
+    _store_job_analysis(job_description, analysis)
+    return analysis
+
+async def analyze_job_description_async(job_description: str) -> Dict[str, any]:
+    """Async variant of analyze_job_description"""
+    analysis = _stored_job_analysis(job_description)
+    if analysis is not None:
+        logger.debug("Reusing stored job description analysis")
+        return analysis
+    try:
+        analysis = await extract_job_analysis_async(job_description)
+    except CircuitOpenError:
+        # Not stored, for the same reason as the local resume fields
+        return analyze_job_description_locally(job_description)
+    _store_job_analysis(job_description, analysis)
+    return analysis
+
+def prewarm_job_descriptions(job_descriptions: List[str]) -> Dict[str, int]:
+    """Analyze and store postings ahead of time; already stored ones are skipped"""
+    store = get_jd_store()
+    warmed = 0
+    skipped = 0
+    with priority(BACKGROUND):
+        for job_description in job_descriptions:
+            if not job_description.strip() or store.contains(job_description):
+                skipped += 1
+                continue
+            analyze_job_description(job_description)
+            warmed += 1
+    return {"warmed": warmed, "skipped": skipped}
+
+# --- GENERATION STAGES ---
+def _ats_resume_prompt(resume_fields: dict, job_description: str) -> BuiltPrompt:
+    return build_prompt(prompts.ATS_RESUME, resume_fields=resume_fields, job_description=job_description)
+
+def _parse_ats_resume(response, resume_fields: dict) -> dict:
+    import json
+    try:
+        return json.loads(response) if isinstance(response, str) else response
+    except Exception as e:
+        logger.error("Failed to parse ATS-optimized resume JSON: %s", e)
+        return resume_fields
+
+def generate_ats_resume(resume_fields: dict, job_description: str) -> dict:
+    """
+    Use GPT to rewrite the structured resume for ATS keyword match.
+    Falls back to the original fields if the response is not valid JSON, and
+    to the local rewrite while the LLM circuit breaker is open.
+    """
+    try:
+        return _parse_ats_resume(call_gpt(_ats_resume_prompt(resume_fields, job_description)), resume_fields)
+    except CircuitOpenError:
+        return tailor_resume_fields_locally(resume_fields, job_description)
+
+async def generate_ats_resume_async(resume_fields: dict, job_description: str) -> dict:
+    """Async variant of generate_ats_resume"""
+    try:
+        return _parse_ats_resume(await call_gpt_async(_ats_resume_prompt(resume_fields, job_description)),
+                                 resume_fields)
+    except CircuitOpenError:
+        return tailor_resume_fields_locally(resume_fields, job_description)
+
+def _latex_resume_prompt(ats_resume_fields: dict) -> BuiltPrompt:
+    # The job description is not needed here: ats_resume_fields is already tailored to it
+    return build_prompt(prompts.LATEX_RESUME, ats_resume_fields=ats_resume_fields)
+
+def generate_latex_resume(ats_resume_fields: dict, job_description: str) -> str:
+    """
+    Use GPT to render the optimized structured resume as a LaTeX document.
+    job_description is accepted for the stage signature but not sent.
+    Rendered from the local template while the LLM circuit breaker is open.
+    """
+    try:
+        latex_content = call_gpt(_latex_resume_prompt(ats_resume_fields))
+    except CircuitOpenError:
+        return render_latex_resume(ats_resume_fields, job_description)
+    logger.debug("Generated LaTeX length: %s", len(latex_content))
+    return latex_content
+
+async def generate_latex_resume_async(ats_resume_fields: dict, job_description: str) -> str:
+    """Async variant of generate_latex_resume"""
+    try:
+        latex_content = await call_gpt_async(_latex_resume_prompt(ats_resume_fields))
+    except CircuitOpenError:
+        return render_latex_resume(ats_resume_fields, job_description)
+    logger.debug("Generated LaTeX length: %s", len(latex_content))
+    return latex_content
+
 # --- MAIN PIPELINE ---
-def process_resume(resume_text: str, job_description: str, target_match_percentage: int = 0):
+def resolve_mode(mode: str = None) -> str:
+    """Turn a requested mode (or TAILOR_MODE) into "llm" or "local"; raises ValueError for unknown modes"""
+    mode = (mode or TAILOR_MODE).lower()
+    if mode not in TAILOR_MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(TAILOR_MODES)}")
+    if mode == "auto":
+        return "llm" if llm_available() else "local"
+    return mode
+
+class StageFunctions(NamedTuple):
+    extract_fields: Callable
+    analyze_job: Callable
+    extract_years: Callable
+    rewrite: Callable
+    render: Callable
+
+def _resume_fields_locally(resume_text: str, resume_hash: str = None) -> dict:
+    # Not written to the parsed-resume cache: LLM mode should not reuse the plainer local fields
+    return extract_resume_fields_locally(resume_text)
+
+def _render_latex_locally(ats_resume_fields: dict, job_description: str) -> str:
+    return render_latex_resume(ats_resume_fields, job_description)
+
+def stage_functions(mode: str = "llm", asynchronous: bool = False) -> StageFunctions:
+    """The functions behind each pipeline stage for a resolved mode"""
+    if mode == "local":
+        return StageFunctions(_resume_fields_locally, analyze_job_description_locally,
+                              _experience_years_from_dates, tailor_resume_fields_locally, _render_latex_locally)
+    if asynchronous:
+        return StageFunctions(get_resume_fields_async, analyze_job_description_async,
+                              extract_experience_years_async, generate_ats_resume_async, generate_latex_resume_async)
+    return StageFunctions(get_resume_fields, analyze_job_description,
+                          extract_experience_years, generate_ats_resume, generate_latex_resume)
+
+async def _call_stage_function(func: Callable, *args):
+    """Await a coroutine stage function, or run a plain one in a worker thread"""
+    if asyncio.iscoroutinefunction(func):
+        return await func(*args)
+    return await asyncio.to_thread(func, *args)
+
+def build_resume_stages(resume_text: str, job_description: str, asynchronous: bool = False,
+                        resume_hash: str = None, mode: str = "llm") -> List[Stage]:
+    """
+    Declare the process_resume stage graph.
+    Resume field extraction, job description analysis and experience years
+    are independent and run concurrently; the match analysis waits for its
+    inputs while the ATS rewrite and LaTeX generation only depend on the
+    resume fields.
+    With asynchronous=True the LLM stages are the coroutine variants, for
+    use with run_stages_async. resume_hash (the uploaded file's hash) lets the
+    resume fields come from the parsed-resume cache. mode="local" swaps every
+    LLM stage for its app.local_pipeline counterpart.
+    """
+    extract_fields, analyze_job, extract_years, rewrite, render = stage_functions(mode, asynchronous)
+
+    def skills_stage(resume_fields, job_analysis):
+        return {
+            "resume_skills": normalize_skills(resume_fields.get('skills', [])),
+            "job_skills": normalize_skills(job_analysis["skills"]),
+        }
+
+    def match_stage(skills, job_analysis, resume_years):
+        return calculate_match_score(resume_text, job_description, skills["resume_skills"], skills["job_skills"],
+                                     resume_years=resume_years, job_requirements=job_analysis["requirements"])
+
+    return [
+        Stage("resume_fields", partial(extract_fields, resume_text, resume_hash),
+              timeout=STAGE_TIMEOUTS["resume_fields"], fallback=dict),
+        Stage("job_analysis", partial(analyze_job, job_description),
+              timeout=STAGE_TIMEOUTS["job_analysis"], fallback=lambda: _fallback_job_analysis(job_description)),
+        Stage("resume_years", partial(extract_years, resume_text),
+              timeout=STAGE_TIMEOUTS["resume_years"], fallback=lambda: 0),
+        Stage("skills", skills_stage, deps=["resume_fields", "job_analysis"]),
+        Stage("match", match_stage, deps=["skills", "job_analysis", "resume_years"]),
+        Stage("ats_resume_fields", partial(rewrite, job_description=job_description),
+              deps=["resume_fields"], timeout=STAGE_TIMEOUTS["ats_resume_fields"]),
+        Stage("latex_content", partial(render, job_description=job_description),
+              deps=["ats_resume_fields"], timeout=STAGE_TIMEOUTS["latex_content"]),
+    ]
+
+def _skills_summary(skills: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    resume_keys = set(skill_taxonomy.key(s) for s in skills["resume_skills"])
+    job_keys = set(skill_taxonomy.key(s) for s in skills["job_skills"])
+    return {
+        "matched_skills": [s for s in skills["resume_skills"] if skill_taxonomy.key(s) in job_keys],
+        "missing_skills": [s for s in skills["job_skills"] if skill_taxonomy.key(s) not in resume_keys],
+    }
+
+def _resume_result(results: Dict[str, any], mode: str = "llm") -> Dict[str, any]:
+    """Merge the stage results into the /tailor response"""
+    logger.debug("Extracted fields: %s", results['resume_fields'])
+    result = {
+        **_skills_summary(results["skills"]),
+        "latex_content": results["latex_content"],
+        "latex_filename": "tailored_resume.tex",
+        "match_analysis": results["match"],
+        "mode": mode
+    }
+    logger.debug("Returning result with keys: %s", list(result.keys()))
+    return result
+
+def _error_result(e: Exception) -> Dict[str, any]:
+    logger.exception("Exception in process_resume: %s", e)
+    return {
+        "error": f"Processing failed: {str(e)}",
+        "matched_skills": [],
+        "missing_skills": [],
+        "latex_content": "",
+        "latex_filename": "error.tex",
+        "match_analysis": {
+            "overall_score": 0.0,
+            "skill_score": 0.0,
+            "experience_score": 0.0,
+            "skill_match_percentage": 0.0,
+            "experience_match_percentage": 0.0,
+            "recommendation_level": "Error",
+            "recommendation_text": "Unable to analyze due to processing error",
+            "color": "red",
+            "resume_years": 0,
+            "required_years": 0,
+            "missing_required_skills": [],
+            "missing_preferred_skills": [],
+            "experience_level": "unknown",
+            "industry": "unknown"
+        }
+    }
+
+def process_resume(resume_text: str, job_description: str, target_match_percentage: int = 0,
+                   resume_hash: str = None, mode: str = None):
     """
     Uses LLM to extract structured resume fields and generates a LaTeX resume.
+    mode is "llm", "local" or "auto" (default TAILOR_MODE).
+    """
+    try:
+        mode = resolve_mode(mode)
+        logger.debug("Starting process_resume (%s) with resume length: %s", mode, len(resume_text))
+        return _resume_result(run_stages(build_resume_stages(resume_text, job_description,
+                                                             resume_hash=resume_hash, mode=mode)), mode)
+    except Exception as e:
+        return _error_result(e)
+
+async def process_resume_async(resume_text: str, job_description: str, target_match_percentage: int = 0,
+                               resume_hash: str = None, mode: str = None):
+    """
+    Async variant of process_resume: every LLM stage awaits the async OpenAI
+    client, so a single worker can hold many requests in flight.
+    """
+    try:
+        mode = resolve_mode(mode)
+        logger.debug("Starting process_resume_async (%s) with resume length: %s", mode, len(resume_text))
+        return _resume_result(await run_stages_async(build_resume_stages(resume_text, job_description, asynchronous=True,
+                                                                         resume_hash=resume_hash, mode=mode)), mode)
+    except Exception as e:
+        return _error_result(e)
+
+async def process_resume_events(resume_text: str, job_description: str, target_match_percentage: int = 0,
+                                resume_hash: str = None, mode: str = None):
+    """
+    Run the async pipeline and yield (event, data) pairs as stages complete:
+    "skills", then "match_analysis", "ats_resume", one "latex_token" per chunk
+    of LaTeX streamed from the model, and finally "result" (the same payload
+    as process_resume) or "error". In local mode the LaTeX arrives whole,
+    without "latex_token" events.
     """
     try:
-        print(f"[DEBUG] Starting process_resume with resume length: {len(resume_text)}")
-        # 1. Extract structured fields from resume using LLM
-        resume_fields = extract_resume_fields_with_llm(resume_text)
-        print(f"[DEBUG] Extracted fields: {resume_fields}")
-        # 2. Extract skills for analysis (use LLM or fallback)
-        resume_skills = resume_fields.get('skills', [])
-        job_skills = extract_skills_with_gpt(job_description, "job_description")
-        resume_skills = normalize_skills(resume_skills)
-        job_skills = normalize_skills(job_skills)
-        # 3. Calculate match score and recommendation
-        match_analysis = calculate_match_score(resume_text, job_description, resume_skills, job_skills)
-        # 4. Generate ATS-optimized structured resume using LLM
-        ats_prompt = f"""
-You are an expert resume writer and ATS optimization specialist.
-
-Given:
-- STRUCTURED RESUME DATA: {resume_fields}
-- JOB DESCRIPTION: {job_description}
-
-Your tasks:
-1. **Skills Section:**
-   - Ensure the skills section includes all relevant skills from the job description that the candidate genuinely possesses, based on their experience, education, or projects.
-   - Do NOT add skills that are not supported by the candidate’s background.
-
-2. **Project & Experience Descriptions:**
-   - Rewrite project and experience bullet points to naturally incorporate keywords and phrases from the job description, but only where they truthfully reflect the candidate’s actual work.
-   - Emphasize achievements and responsibilities that align with the job’s requirements.
-   - Avoid exaggeration or making unrealistic claims.
-
-3. **ATS Optimization:**
-   - Use exact keywords and terminology from the job description where appropriate, especially for skills, technologies, and methodologies.
-   - Maintain a professional, concise, and truthful tone.
-
-4. **No Hallucination:**
-   - Do NOT invent experience, skills, or qualifications that are not present in the candidate’s background.
-
-CRITICAL:
-- You MUST preserve all original personal information (name, email, phone, location, education, etc.) exactly as provided in the structured resume data.
-- Only rewrite the skills, experience, and project descriptions for ATS optimization.
-- Do NOT invent, change, or omit the candidate’s identity or contact details.
-- Do NOT generate a sample or template resume—always use the real candidate’s data.
-
-5. **Output:**
-   - Return a JSON object with the following structure:
-     {{
-       "name": ...,
-       "email": ...,
-       "phone": ...,
-       "location": ...,
-       "summary": ...,
-       "skills": [...],  // Optimized for ATS, truthful
-       "experience": [
-         {{
-           "company": ...,
-           "title": ...,
-           "start": ...,
-           "end": ...,
-           "bullets": [
-             // Each bullet rewritten to maximize ATS match, using job description keywords where truthful
-           ]
-         }},
-         ...
-       ],
-       "education": [...],
-       "projects": [
-         {{
-           "name": ...,
-           "description": "...", // Rewritten to include relevant job keywords, if truthful
-         }},
-         ...
-       ]
-     }}
-
-CRITICAL:
-- Do not add or exaggerate skills or experience.
-- Only use keywords from the job description if they are genuinely supported by the candidate’s background.
-- The goal is to maximize ATS keyword match while remaining 100% truthful.
-
-STRUCTURED RESUME DATA:
-{resume_fields}
-
-JOB DESCRIPTION:
-{job_description}
-"""
-        ats_structured_resume = call_gpt(ats_prompt)
-        import json
+        mode = resolve_mode(mode)
+    except ValueError as e:
+        yield "error", _error_result(e)
+        return
+    logger.debug("Starting process_resume_events (%s) with resume length: %s", mode, len(resume_text))
+    events = asyncio.Queue()
+
+    async def stream_latex(ats_resume_fields, job_description):
+        chunks = []
+        try:
+            async for delta in call_gpt_stream(_latex_resume_prompt(ats_resume_fields)):
+                chunks.append(delta)
+                events.put_nowait(("latex_token", {"text": delta}))
+        except CircuitOpenError:
+            # Raised before the first chunk; the local rendering arrives whole
+            return render_latex_resume(ats_resume_fields, job_description)
+        latex_content = "".join(chunks)
+        logger.debug("Generated LaTeX length: %s", len(latex_content))
+        return latex_content
+
+    stages = [
+        replace(stage, func=partial(stream_latex, job_description=job_description))
+        if stage.name == "latex_content" and mode == "llm" else stage
+        for stage in build_resume_stages(resume_text, job_description, asynchronous=True,
+                                         resume_hash=resume_hash, mode=mode)
+    ]
+
+    def on_complete(name, value):
+        if name == "skills":
+            events.put_nowait(("skills", {**value, **_skills_summary(value)}))
+        elif name == "match":
+            events.put_nowait(("match_analysis", value))
+        elif name == "ats_resume_fields":
+            events.put_nowait(("ats_resume", value))
+
+    async def run():
         try:
-            ats_resume_fields = json.loads(ats_structured_resume) if isinstance(ats_structured_resume, str) else ats_structured_resume
+            results = await run_stages_async(stages, on_complete=on_complete)
+            events.put_nowait(("result", _resume_result(results, mode)))
         except Exception as e:
-            print(f"[ERROR] Failed to parse ATS-optimized resume JSON: {str(e)}")
-            ats_resume_fields = resume_fields
-
-        # Now generate LaTeX from the optimized structured resume
-        prompt = f"""
-You are a professional resume writer. Given the following structured resume data and job description, generate a complete, professional LaTeX resume. Use this structure:
-- Name (large, bold at top)
-- Contact info (email, phone, location)
-- Summary
-- Experience (with company, title, dates, bullet points)
-- Education (degree, institution, year)
-- Skills (as a list)
-- Projects (if present)
-
-STRUCTURED RESUME DATA:
-{{ats_resume_fields}}
-
-JOB DESCRIPTION:
-{job_description}
-
-CRITICAL:
-- The name must be the first and most prominent thing in the header.
-- Do NOT use location or job title as the name.
-- All sections must be present and properly formatted.
-- Use only valid LaTeX.
-- Make it look like a human professional resume.
-- Do not hallucinate or invent information.
-- If a field is missing, skip that section.
-Return only the LaTeX code, ready to compile.
-"""
-        latex_content = call_gpt(prompt)
-        print(f"[DEBUG] Generated LaTeX length: {len(latex_content)}")
-        result = {
-            "matched_skills": [s for s in resume_skills if s in job_skills],
-            "missing_skills": [s for s in job_skills if s not in resume_skills],
-            "latex_content": latex_content,
-            "latex_filename": "tailored_resume.tex",
-            "match_analysis": match_analysis
+            events.put_nowait(("error", _error_result(e)))
+
+    pipeline = asyncio.ensure_future(run())
+    try:
+        while True:
+            event, data = await events.get()
+            yield event, data
+            if event in ("result", "error"):
+                break
+    finally:
+        # The client may disconnect mid-stream; stop the remaining LLM calls
+        if not pipeline.done():
+            pipeline.cancel()
+
+# --- BATCH TAILORING ---
+BATCH_MAX_JOB_DESCRIPTIONS = 30
+
+def build_batch_match_stages(resume_text: str, job_descriptions: List[str], resume_hash: str = None,
+                             mode: str = "llm") -> List[Stage]:
+    """
+    Stage graph scoring one resume against many postings. The resume fields and
+    experience years are extracted once and every posting is analyzed
+    concurrently; the "matches" stage then scores all of them in one
+    vectorized pass (a list of per-job results in posting order).
+    """
+    functions = stage_functions(mode, asynchronous=True)
+    stages = [
+        Stage("resume_fields", partial(functions.extract_fields, resume_text, resume_hash),
+              timeout=STAGE_TIMEOUTS["resume_fields"], fallback=dict),
+        Stage("resume_years", partial(functions.extract_years, resume_text),
+              timeout=STAGE_TIMEOUTS["resume_years"], fallback=lambda: 0),
+        Stage("resume_skills", lambda resume_fields: normalize_skills(resume_fields.get('skills', [])),
+              deps=["resume_fields"]),
+    ]
+
+    def matches_stage(resume_skills, resume_years, **deps):
+        job_analyses = [{**deps[f"job_analysis_{i}"], "skills": normalize_skills(deps[f"job_analysis_{i}"]["skills"])}
+                        for i in range(len(job_descriptions))]
+        match_analyses = calculate_match_scores_batch([resume_skills], [resume_years], job_analyses)[0]
+        return [
+            {
+                **_skills_summary({"resume_skills": resume_skills, "job_skills": job_analysis["skills"]}),
+                "match_analysis": match_analysis,
+            }
+            for job_analysis, match_analysis in zip(job_analyses, match_analyses)
+        ]
+
+    job_stages = [f"job_analysis_{i}" for i in range(len(job_descriptions))]
+    for name, job_description in zip(job_stages, job_descriptions):
+        stages.append(Stage(name, partial(functions.analyze_job, job_description),
+                            timeout=STAGE_TIMEOUTS["job_analysis"],
+                            fallback=partial(_fallback_job_analysis, job_description)))
+    stages.append(Stage("matches", matches_stage, deps=["resume_skills", "resume_years"] + job_stages))
+    return stages
+
+def build_batch_latex_stages(resume_fields: dict, job_descriptions: Dict[int, str],
+                             mode: str = "llm") -> List[Stage]:
+    """ATS rewrite and LaTeX stages for the selected postings, keyed by their batch index"""
+    functions = stage_functions(mode, asynchronous=True)
+
+    async def latex_stage(i, job_description, **deps):
+        return await _call_stage_function(functions.render, deps[f"ats_resume_fields_{i}"], job_description)
+
+    stages = []
+    for i, job_description in job_descriptions.items():
+        stages.append(Stage(f"ats_resume_fields_{i}",
+                            partial(functions.rewrite, resume_fields, job_description),
+                            timeout=STAGE_TIMEOUTS["ats_resume_fields"], fallback=lambda: resume_fields))
+        stages.append(Stage(f"latex_content_{i}", partial(latex_stage, i, job_description),
+                            deps=[f"ats_resume_fields_{i}"],
+                            timeout=STAGE_TIMEOUTS["latex_content"], fallback=str))
+    return stages
+
+async def process_resume_batch_async(resume_text: str, job_descriptions: List[str], top_k: int = 3,
+                                     resume_hash: str = None, mode: str = None) -> Dict[str, any]:
+    """
+    Tailor one resume against many postings.
+    The resume is parsed once, all postings are analyzed in parallel and the
+    jobs are returned ranked by overall match score. Only the top_k matches
+    get the (expensive) ATS rewrite and LaTeX generation.
+    """
+    # Behind interactive /tailor calls in the LLM rate limiter queue
+    with priority(BATCH):
+        try:
+            mode = resolve_mode(mode)
+            logger.debug("Starting batch (%s) of %s job descriptions, top_k=%s", mode, len(job_descriptions), top_k)
+            results = await run_stages_async(build_batch_match_stages(resume_text, job_descriptions, resume_hash, mode))
+            jobs = [{"index": i, "job_description": job_description, **match}
+                    for i, (job_description, match) in enumerate(zip(job_descriptions, results["matches"]))]
+            jobs.sort(key=lambda job: job["match_analysis"]["overall_score"], reverse=True)
+
+            selected = {job["index"]: job["job_description"] for job in jobs[:max(top_k, 0)]}
+            latex = await run_stages_async(build_batch_latex_stages(results["resume_fields"], selected, mode)) if selected else {}
+            for rank, job in enumerate(jobs, start=1):
+                job["rank"] = rank
+                job["latex_content"] = latex.get(f"latex_content_{job['index']}")
+            return {"jobs": jobs, "latex_filename": "tailored_resume.tex", "mode": mode}
+        except Exception as e:
+            logger.exception("Exception in process_resume_batch_async: %s", e)
+            return {"error": f"Batch processing failed: {str(e)}", "jobs": []}
+
+# --- RECRUITER SCREENING ---
+RANK_MAX_CONCURRENCY = 8
+
+def build_screening_stages(resume_text: str, job_description: str, job_analysis: Dict[str, any],
+                           resume_hash: str = None, mode: str = "llm") -> List[Stage]:
+    """
+    Scoring-only stage graph for one resume against an already analyzed
+    posting: resume fields and experience years, then the match. There are
+    no rewrite or LaTeX stages.
+    """
+    def match_stage(resume_fields, resume_years):
+        skills = {
+            "resume_skills": normalize_skills(resume_fields.get('skills', [])),
+            "job_skills": normalize_skills(job_analysis["skills"]),
         }
-        print(f"[DEBUG] Returning result with keys: {list(result.keys())}")
-        return result
-    except Exception as e:
-        print(f"[ERROR] Exception in process_resume: {str(e)}")
-        import traceback
-        traceback.print_exc()
         return {
-            "error": f"Processing failed: {str(e)}",
-            "matched_skills": [],
-            "missing_skills": [],
-            "latex_content": "",
-            "latex_filename": "error.tex",
-            "match_analysis": {
-                "overall_score": 0.0,
-                "skill_score": 0.0,
-                "experience_score": 0.0,
-                "skill_match_percentage": 0.0,
-                "experience_match_percentage": 0.0,
-                "recommendation_level": "Error",
-                "recommendation_text": "Unable to analyze due to processing error",
-                "color": "red",
-                "resume_years": 0,
-                "required_years": 0,
-                "missing_required_skills": [],
-                "missing_preferred_skills": [],
-                "experience_level": "unknown",
-                "industry": "unknown"
-            }
+            "name": resume_fields.get("name"),
+            **_skills_summary(skills),
+            "match_analysis": calculate_match_score(resume_text, job_description, skills["resume_skills"],
+                                                    skills["job_skills"], resume_years=resume_years,
+                                                    job_requirements=job_analysis["requirements"]),
         }
+
+    functions = stage_functions(mode, asynchronous=True)
+    return [
+        Stage("resume_fields", partial(functions.extract_fields, resume_text, resume_hash),
+              timeout=STAGE_TIMEOUTS["resume_fields"], fallback=dict),
+        Stage("resume_years", partial(functions.extract_years, resume_text),
+              timeout=STAGE_TIMEOUTS["resume_years"], fallback=lambda: 0),
+        Stage("match", match_stage, deps=["resume_fields", "resume_years"]),
+    ]
+
+async def rank_resumes_events(resumes: List[Dict[str, any]], job_description: str,
+                              max_concurrency: int = RANK_MAX_CONCURRENCY, mode: str = None):
+    """
+    Screen many resumes against one job description.
+    resumes are dicts with "filename", "resume_text" and "resume_hash" (or an
+    "error" when the upload could not be parsed). The posting is analyzed
+    once; resumes are then scored max_concurrency at a time.
+
+    Yields (event, data) pairs: "job_analysis" first, one "resume" per resume
+    as soon as it is scored, then "ranking" with every resume ordered by
+    overall match score (unparseable uploads last).
+    """
+    mode = resolve_mode(mode)
+    logger.debug("Ranking %s resumes against one job description (%s)", len(resumes), mode)
+    # Behind interactive /tailor calls in the LLM rate limiter queue
+    with priority(BATCH):
+        try:
+            job_analysis = await asyncio.wait_for(
+                _call_stage_function(stage_functions(mode, asynchronous=True).analyze_job, job_description),
+                STAGE_TIMEOUTS["job_analysis"])
+        except Exception as e:
+            logger.warning("Job analysis failed (%s), ranking with pattern-matched skills", type(e).__name__)
+            job_analysis = _fallback_job_analysis(job_description)
+    yield "job_analysis", {**job_analysis, "mode": mode}
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def score(resume):
+        entry = {"filename": resume["filename"], "resume_hash": resume.get("resume_hash")}
+        if resume.get("error"):
+            return {**entry, "error": resume["error"]}
+        async with semaphore:
+            try:
+                results = await run_stages_async(build_screening_stages(
+                    resume["resume_text"], job_description, job_analysis, resume.get("resume_hash"), mode))
+                return {**entry, **results["match"]}
+            except Exception as e:
+                logger.error("Failed to score %s: %s", resume['filename'], e)
+                return {**entry, "error": f"Processing failed: {str(e)}"}
+
+    with priority(BATCH):
+        # Tasks copy the context they are created in, priority included
+        tasks = [asyncio.ensure_future(score(resume)) for resume in resumes]
+    scored = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            entry = await next_done
+            scored.append(entry)
+            yield "resume", entry
+    finally:
+        # The client may disconnect mid-stream; stop scoring the rest
+        for task in tasks:
+            task.cancel()
+
+    ranked = sorted([entry for entry in scored if "error" not in entry],
+                    key=lambda entry: entry["match_analysis"]["overall_score"], reverse=True)
+    for rank, entry in enumerate(ranked, start=1):
+        entry["rank"] = rank
+    yield "ranking", {"resumes": ranked + [entry for entry in scored if "error" in entry]}
@@ -0,0 +1,251 @@
+"""
+Request-scoped tracing and structured, non-blocking logging.
+
+Every HTTP request gets a request id (the incoming X-Request-ID header or
+a new one) held in a context variable, so it follows the request into
+awaited coroutines, asyncio.to_thread/run_in_threadpool calls and the
+pipeline's worker threads. span() times a block of work (text extraction,
+the stage pipeline, a pdflatex compile) and record_span() adds one that
+has already finished (each pipeline stage, each LLM call). Spans go to the
+request's Trace: a flat list with parent ids and offsets from the start of
+the request. The most recent TRACE_BUFFER_SIZE traces are
+kept in memory and served as JSON at /traces/{request_id}.
+
+Log records from the "app" loggers go through a QueueHandler: the request
+path only enqueues the record, and a QueueListener thread formats it
+(JSON lines by default, LOG_FORMAT=text for plain lines) and writes it to
+stderr. A process forked after configure_logging() (gunicorn --preload)
+inherits no writer thread, so the child gets a fresh queue and listener
+of its own. Configuration:
+
+- LOG_LEVEL (default INFO) for the app loggers
+- LOG_SAMPLE_RATE (default 1.0): fraction of requests whose records below
+  WARNING are emitted. The decision is made once per request id, so a
+  sampled request keeps its complete timeline; warnings and errors are
+  always emitted.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "500"))
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_trace_var: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trace", default=None)
+_span_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("span_id", default=None)
+
+
+def is_sampled(request_id: Optional[str]) -> bool:
+    """Whether debug/info records of this request are emitted; stable per request id"""
+    if request_id is None or LOG_SAMPLE_RATE >= 1.0:
+        return True
+    return zlib.crc32(request_id.encode("utf-8")) % 10000 < LOG_SAMPLE_RATE * 10000
+
+
+class Trace:
+    """Spans of one request"""
+
+    def __init__(self, request_id: str, name: str = ""):
+        self.request_id = request_id
+        self.name = name
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, span: Dict[str, Any]):
+        with self._lock:
+            self.spans.append(span)
+
+    def offset_ms(self, perf_counter: float) -> float:
+        return round((perf_counter - self._started) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_ms"])
+        return {"request_id": self.request_id, "name": self.name, "started_at": self.started_at, "spans": spans}
+
+
+_traces: "OrderedDict[str, Trace]" = OrderedDict()
+_traces_lock = threading.Lock()
+
+
+def start_trace(request_id: Optional[str] = None, name: str = "") -> Trace:
+    """Begin a trace in the current context and remember it for get_trace()"""
+    trace = Trace(request_id or uuid.uuid4().hex, name)
+    request_id_var.set(trace.request_id)
+    _trace_var.set(trace)
+    _span_var.set(None)
+    with _traces_lock:
+        _traces[trace.request_id] = trace
+        while len(_traces) > TRACE_BUFFER_SIZE:
+            _traces.popitem(last=False)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace_var.get()
+
+
+def get_trace(request_id: str) -> Optional[Dict[str, Any]]:
+    with _traces_lock:
+        trace = _traces.get(request_id)
+    return trace.to_dict() if trace is not None else None
+
+
+def record_span(name: str, started: float, status: str = "ok", **attributes):
+    """Add an already finished span (started is a time.perf_counter() value)"""
+    trace = _trace_var.get()
+    if trace is None:
+        return
+    finished = time.perf_counter()
+    span = {
+        "name": name,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": _span_var.get(),
+        "start_ms": trace.offset_ms(started),
+        "duration_ms": round((finished - started) * 1000, 3),
+        "status": status,
+        "thread": threading.current_thread().name,
+        "attributes": attributes,
+    }
+    trace.add_span(span)
+    _span_logger.debug("span %s", name, extra={"fields": span})
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the with-block as a span of the current request (a no-op outside
+    one). Yields the attribute dict so the block can add to it; an exception
+    marks the span as failed and is re-raised.
+    """
+    trace = _trace_var.get()
+    if trace is None:
+        yield attributes
+        return
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _span_var.get()
+    token = _span_var.set(span_id)
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield attributes
+    except BaseException as e:
+        status = "error"
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _span_var.reset(token)
+        record = {
+            "name": name,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "start_ms": trace.offset_ms(started),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "status": status,
+            "thread": threading.current_thread().name,
+            "attributes": attributes,
+        }
+        trace.add_span(record)
+        _span_logger.debug("span %s", name, extra={"fields": record})
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps the request id on each record and drops unsampled low-level records"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        record.request_id = request_id
+        return record.levelno >= logging.WARNING or is_sampled(request_id)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s [%(levelname)s] %(name)s %(request_id)s: %(message)s")
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def configure_logging():
+    """Route the "app" loggers through a queue to a background writer thread (idempotent)"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    records = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(records)
+    _queue_handler.addFilter(RequestContextFilter())
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.addHandler(_queue_handler)
+    app_logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def _restart_listener_in_child():
+    """
+    Threads do not survive fork: give the child its own queue (records the
+    parent had not written yet stay the parent's) and writer thread
+    """
+    global _listener
+    if _listener is None:
+        return
+    records = queue.SimpleQueue()
+    _queue_handler.queue = records
+    _listener = logging.handlers.QueueListener(records, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+_span_logger = logging.getLogger("app.tracing")
@@ -1,7 +1,17 @@
-from openai import OpenAI
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from pypdf import PdfReader
+from app.cache import LRUCache, SQLiteCache, LLMResponseCache
+from app.prompts import BuiltPrompt, count_tokens
+from app import metrics
+from app.tracing import record_span
+from app.llm_resilience import (call_with_retries, call_with_retries_async, llm_breaker, record_call_failure,
+                                remaining_deadline)
+from app.rate_limit import estimate_tokens, rate_limiter
+
+logger = logging.getLogger(__name__)
 
 # Explicitly load the .env from backend dir
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
@@ -9,27 +19,239 @@ load_dotenv(dotenv_path=env_path)
 
 api_key = os.getenv("OPENAI_API_KEY")
 
-print(f"[DEBUG] Loaded API KEY: {(api_key[:5]+'...') if api_key else 'None'} (length {len(api_key) if api_key else 0})")
+# LLM_BACKEND=fake sends every LLM call to the stub server in app.fake_llm
+# (at FAKE_LLM_URL) for offline load tests and benchmarks; no key or network
+# needed, and its persistent stores default to .cache/fake (app.cache.STATE_DIR).
+# LLM_BASE_URL points the "openai" backend at any other OpenAI-compatible API.
+LLM_BACKENDS = ("openai", "fake")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").lower()
+if LLM_BACKEND not in LLM_BACKENDS:
+    raise ValueError(f"Unknown LLM_BACKEND '{LLM_BACKEND}', expected one of {', '.join(LLM_BACKENDS)}")
+if LLM_BACKEND == "fake":
+    # The real key is never sent to the stub
+    api_key = "fake"
+    LLM_BASE_URL = os.getenv("FAKE_LLM_URL", "http://127.0.0.1:8765/v1")
+else:
+    LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+
+logger.debug("Loaded API KEY: %s (length %s)", (api_key[:5] + '...') if api_key else 'None', len(api_key) if api_key else 0)
+
+GPT_MODEL = "gpt-3.5-turbo"
+
+# The openai package (~0.5s to import) and its clients are loaded on first
+# use rather than at import, so a worker boots without them and one without
+# an API key can still serve local mode, the caches and the LaTeX endpoints.
+# Retries are left to app.llm_resilience, so the SDK's own are turned off.
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
 
-if not api_key:
-    raise ValueError("Missing OpenAI API key in .env file. Ensure OPENAI_API_KEY is set.")
+def _require_api_key():
+    if not api_key:
+        raise ValueError("Missing OpenAI API key in .env file. Ensure OPENAI_API_KEY is set.")
 
-client = OpenAI(
-    api_key=api_key
+def get_client() -> "openai.OpenAI":
+    global _client
+    if _client is None:
+        _require_api_key()
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=api_key, base_url=LLM_BASE_URL, max_retries=0)
+    return _client
+
+def get_async_client() -> "openai.AsyncOpenAI":
+    """Used by the asyncio request path; awaiting it never ties up a worker thread"""
+    global _async_client
+    if _async_client is None:
+        _require_api_key()
+        with _client_lock:
+            if _async_client is None:
+                from openai import AsyncOpenAI
+                _async_client = AsyncOpenAI(api_key=api_key, base_url=LLM_BASE_URL, max_retries=0)
+    return _async_client
+
+# LLM response cache. LLM_CACHE_PATH enables the SQLite tier shared by all
+# worker processes on the host; without it only the in-process LRU is used.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+
+llm_cache = LLMResponseCache(
+    memory=LRUCache(max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")), ttl=LLM_CACHE_TTL),
+    disk=SQLiteCache(LLM_CACHE_PATH, max_entries=int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "50000")),
+                     ttl=LLM_CACHE_TTL, table="llm_responses") if LLM_CACHE_PATH else None,
+    backend=f"{LLM_BACKEND}:{LLM_BASE_URL or 'default'}"
 )
 
-def call_gpt(prompt):
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content
+def llm_available() -> bool:
+    """
+    False without an API key and while the LLM circuit breaker is open after
+    an outage, so "auto" mode serves requests from the local pipeline instead
+    """
+    return bool(api_key) and llm_breaker.available()
+
+def _prompt_text(prompt, template_version):
+    """
+    (text, template_version, input_tokens) for a BuiltPrompt or a plain
+    string prompt, logging the input size of the call
+    """
+    if isinstance(prompt, BuiltPrompt):
+        text, template_version, input_tokens = prompt.text, prompt.template_id, prompt.input_tokens
+    else:
+        text, input_tokens = prompt, count_tokens(prompt)
+    logger.debug("LLM call %s: %s input tokens (%s chars)", template_version, input_tokens, len(text))
+    return text, template_version, input_tokens
+
+def _cache_outcome() -> str:
+    return "miss" if LLM_CACHE_ENABLED else "disabled"
+
+def _record_error(stage: str, error: Exception, started: float):
+    """Count a failed API attempt (each retry or hedge is one)"""
+    metrics.record_llm_error(stage, GPT_MODEL, error, time.perf_counter() - started, _cache_outcome())
+    record_span(f"llm.{stage}", started, "error", model=GPT_MODEL, error=type(error).__name__)
+
+def _record_rate_limit_wait(stage: str, waited: float):
+    if waited > 0.001:
+        record_span(f"rate_limit.{stage}", time.perf_counter() - waited)
+
+def _record_usage(stage: str, usage, started: float, **attributes):
+    metrics.record_llm_usage(stage, GPT_MODEL, usage, time.perf_counter() - started, _cache_outcome())
+    record_span(f"llm.{stage}", started, model=GPT_MODEL, **attributes)
+
+def call_gpt(prompt, template_version="untagged"):
+    """
+    Send a prompt to the chat model and return the reply text.
+    prompt is a BuiltPrompt from app.prompts (or a plain string, tagged
+    with template_version). The template id is part of the cache key so
+    editing a template never serves stale replies.
+    """
+    prompt, template_version, input_tokens = _prompt_text(prompt, template_version)
+    stage = metrics.stage_label(template_version)
+    estimated_tokens = estimate_tokens(stage, input_tokens)
+    if LLM_CACHE_ENABLED:
+        cached = llm_cache.get(GPT_MODEL, template_version, prompt)
+        if cached is not None:
+            metrics.record_llm_cache_hit(stage, GPT_MODEL)
+            return cached
+
+    def attempt(timeout: float):
+        _record_rate_limit_wait(stage, rate_limiter.acquire(estimated_tokens, remaining_deadline()))
+        started = time.perf_counter()
+        try:
+            response = get_client().chat.completions.create(
+                model=GPT_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                timeout=timeout
+            )
+        except Exception as e:
+            _record_error(stage, e, started)
+            raise
+        _record_usage(stage, response.usage, started)
+        rate_limiter.settle(estimated_tokens, response.usage)
+        return response
+
+    response = call_with_retries(stage, attempt)
+    content = response.choices[0].message.content
+    if LLM_CACHE_ENABLED and content:
+        llm_cache.set(GPT_MODEL, template_version, prompt, content)
+    return content
+
+async def call_gpt_async(prompt, template_version="untagged"):
+    """Async variant of call_gpt sharing the same response cache"""
+    prompt, template_version, input_tokens = _prompt_text(prompt, template_version)
+    stage = metrics.stage_label(template_version)
+    estimated_tokens = estimate_tokens(stage, input_tokens)
+    if LLM_CACHE_ENABLED:
+        cached = llm_cache.get(GPT_MODEL, template_version, prompt)
+        if cached is not None:
+            metrics.record_llm_cache_hit(stage, GPT_MODEL)
+            return cached
+
+    async def attempt(timeout: float):
+        _record_rate_limit_wait(stage, await rate_limiter.acquire_async(estimated_tokens, remaining_deadline()))
+        started = time.perf_counter()
+        try:
+            response = await get_async_client().chat.completions.create(
+                model=GPT_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                timeout=timeout
+            )
+        except Exception as e:
+            _record_error(stage, e, started)
+            raise
+        _record_usage(stage, response.usage, started)
+        rate_limiter.settle(estimated_tokens, response.usage)
+        return response
+
+    response = await call_with_retries_async(stage, attempt)
+    content = response.choices[0].message.content
+    if LLM_CACHE_ENABLED and content:
+        llm_cache.set(GPT_MODEL, template_version, prompt, content)
+    return content
+
+async def call_gpt_stream(prompt, template_version="untagged"):
+    """
+    Async generator over the reply text as it arrives from the model.
+    A cached reply is yielded in one piece; a fresh one is cached once complete.
+    Latency is measured to the last chunk; usage arrives in the final chunk.
+    """
+    prompt, template_version, input_tokens = _prompt_text(prompt, template_version)
+    stage = metrics.stage_label(template_version)
+    estimated_tokens = estimate_tokens(stage, input_tokens)
+    if LLM_CACHE_ENABLED:
+        cached = llm_cache.get(GPT_MODEL, template_version, prompt)
+        if cached is not None:
+            metrics.record_llm_cache_hit(stage, GPT_MODEL)
+            yield cached
+            return
+
+    async def open_stream(timeout: float):
+        _record_rate_limit_wait(stage, await rate_limiter.acquire_async(estimated_tokens, remaining_deadline()))
+        started = time.perf_counter()
+        try:
+            return started, await get_async_client().chat.completions.create(
+                model=GPT_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout
+            )
+        except Exception as e:
+            _record_error(stage, e, started)
+            raise
+
+    # Only opening the stream is retried: chunks already yielded cannot be taken back
+    started, stream = await call_with_retries_async(stage, open_stream, hedge=False)
+    chunks = []
+    usage = None
+    try:
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                chunks.append(delta)
+                yield delta
+    except Exception as e:
+        _record_error(stage, e, started)
+        record_call_failure(e)
+        raise
+    _record_usage(stage, usage, started, streamed=True)
+    rate_limiter.settle(estimated_tokens, usage)
+    content = "".join(chunks)
+    if LLM_CACHE_ENABLED and content:
+        llm_cache.set(GPT_MODEL, template_version, prompt, content)
 
 def extract_text_from_pdf(file_stream):
-    reader = PdfReader(file_stream)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text()
+    from pypdf import PdfReader
+    with metrics.TEXT_EXTRACTION_DURATION.time(file_type="pdf"):
+        reader = PdfReader(file_stream)
+        text = ""
+        for page in reader.pages:
+            text += page.extract_text()
     return text
 
 def extract_text_from_latex(file_stream):
@@ -37,14 +259,15 @@ def extract_text_from_latex(file_stream):
     Extracts plain text from a LaTeX file stream by removing LaTeX commands.
     """
     import re
-    file_stream.seek(0)
-    latex_content = file_stream.read().decode('utf-8')
-    # Remove LaTeX comments
-    latex_content = re.sub(r'%.*', '', latex_content)
-    # Remove LaTeX commands
-    text = re.sub(r'\\[a-zA-Z]+(\[[^\]]*\])?(\{[^\}]*\})?', '', latex_content)
-    # Remove curly braces
-    text = re.sub(r'[{}]', '', text)
-    # Collapse multiple spaces/newlines
-    text = re.sub(r'\s+', ' ', text)
+    with metrics.TEXT_EXTRACTION_DURATION.time(file_type="tex"):
+        file_stream.seek(0)
+        latex_content = file_stream.read().decode('utf-8')
+        # Remove LaTeX comments
+        latex_content = re.sub(r'%.*', '', latex_content)
+        # Remove LaTeX commands
+        text = re.sub(r'\\[a-zA-Z]+(\[[^\]]*\])?(\{[^\}]*\})?', '', latex_content)
+        # Remove curly braces
+        text = re.sub(r'[{}]', '', text)
+        # Collapse multiple spaces/newlines
+        text = re.sub(r'\s+', ' ', text)
     return text.strip()
@@ -0,0 +1,165 @@
+"""
+Warm-up and readiness.
+
+Importing app.main is kept cheap (spaCy, its model and the OpenAI client
+load on first use), so a worker comes up quickly but its first local-mode
+request pays for those loads. warm_up() pays them up front instead: it
+imports the openai and pypdf packages, loads the spaCy model, builds the
+keyword automaton and the fuzzy skill index, and runs a small sample
+resume and posting through the local extractors and the scoring code,
+which compiles the regexes tailoring builds on the fly. It then runs a full collection and gc.freeze()s everything allocated so
+far, so the collector never writes to those objects again.
+
+WARMUP controls when this happens:
+
+- "startup" (default): in the app lifespan, once per worker process.
+- "import": when app.main is imported. Under a pre-fork server that loads
+  the app in the parent (gunicorn --preload) this runs once, and the forked
+  workers share the warmed, frozen pages copy-on-write. Nothing here opens
+  a SQLite database or network client: the job queue and the LLM cache open
+  their connections on first use, in each worker after the fork.
+- "off": nothing is preloaded.
+
+/health only says the process is up; /ready says it should receive
+traffic (warm-up finished, job workers running, not shutting down).
+"""
+import gc
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+WARMUP = os.getenv("WARMUP", "startup").lower()
+
+SAMPLE_RESUME = """Jane Doe
+jane.doe@example.com | (555) 123-4567 | Austin, TX
+
+Summary
+Backend engineer building data services in Python and AWS.
+
+Experience
+Senior Software Engineer, Example Corp
+Jan 2020 - Present
+- Built REST APIs with FastAPI and PostgreSQL on Kubernetes
+
+Software Engineer, Sample Inc
+Jun 2016 - Dec 2019
+- Moved batch jobs to Docker and CI/CD pipelines
+
+Education
+B.S. Computer Science, University of Texas, 2016
+
+Skills
+Python, JavaScript, React, AWS, Docker, SQL
+"""
+
+SAMPLE_JOB_DESCRIPTION = """Senior Backend Engineer
+We need 5+ years of experience with Python, AWS and Kubernetes.
+Preferred: React, Terraform. Bachelor's degree in Computer Science.
+"""
+
+_lock = threading.Lock()
+_state = {"warmed": False, "ready": False, "components": {}, "duration_seconds": None}
+
+
+def _warm_imports():
+    # Modules app.utils imports lazily; clients are not created here since
+    # their connection pools must not be shared across a fork
+    import openai  # noqa: F401
+    import pypdf  # noqa: F401
+
+
+def _warm_spacy():
+    from app.local_pipeline import get_nlp
+    get_nlp()(SAMPLE_RESUME)
+
+
+def _warm_keyword_matcher():
+    from app.keyword_matcher import keyword_matcher
+    keyword_matcher.find_skills(SAMPLE_RESUME)
+
+
+def _warm_skill_similarity():
+    from app.skill_taxonomy import skill_taxonomy
+    if skill_taxonomy.fuzzy:
+        skill_taxonomy.similarity_index()
+
+
+def _warm_local_pipeline():
+    from app.local_pipeline import (extract_resume_fields_locally, analyze_job_description_locally,
+                                    tailor_resume_fields_locally, render_latex_resume)
+    fields = extract_resume_fields_locally(SAMPLE_RESUME)
+    analyze_job_description_locally(SAMPLE_JOB_DESCRIPTION)
+    render_latex_resume(tailor_resume_fields_locally(fields, SAMPLE_JOB_DESCRIPTION))
+
+
+def _warm_scoring():
+    from app.tailoring import (calculate_experience_from_dates, calculate_match_score,
+                               calculate_match_scores_batch, extract_basic_keywords)
+    resume_skills = extract_basic_keywords(SAMPLE_RESUME)
+    job_skills = extract_basic_keywords(SAMPLE_JOB_DESCRIPTION)
+    requirements = {"required_years": 5, "required_skills": job_skills, "preferred_skills": []}
+    calculate_experience_from_dates(SAMPLE_RESUME)
+    calculate_match_score("", "", resume_skills, job_skills, resume_years=3, job_requirements=requirements)
+    calculate_match_scores_batch([resume_skills], [3], [{"skills": job_skills, "requirements": requirements}])
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("imports", _warm_imports),
+    ("keyword_matcher", _warm_keyword_matcher),
+    ("skill_similarity", _warm_skill_similarity),
+    ("spacy", _warm_spacy),
+    ("local_pipeline", _warm_local_pipeline),
+    ("scoring", _warm_scoring),
+]
+
+
+def warm_up(freeze: bool = True) -> Dict[str, any]:
+    """
+    Run every warm-up step once per process. A failing step (e.g. the spaCy
+    model is not installed) is recorded and skipped; it only means that
+    path will load lazily, or fail, on first use.
+    """
+    with _lock:
+        if _state["warmed"]:
+            return readiness()
+        started = time.perf_counter()
+        for name, step in WARMUP_STEPS:
+            step_started = time.perf_counter()
+            try:
+                step()
+                status = "ok"
+            except Exception as e:
+                status = f"failed: {type(e).__name__}: {e}"
+                logger.warning("Warm-up step %s failed: %s", name, e)
+            _state["components"][name] = {"status": status,
+                                          "seconds": round(time.perf_counter() - step_started, 4)}
+        if freeze:
+            gc.collect()
+            gc.freeze()
+        _state["warmed"] = True
+        _state["duration_seconds"] = round(time.perf_counter() - started, 4)
+        logger.debug("Warm-up finished in %ss", _state['duration_seconds'])
+        return readiness()
+
+
+def set_ready(ready: bool):
+    _state["ready"] = ready
+
+
+def is_ready() -> bool:
+    return _state["ready"]
+
+
+def readiness() -> Dict[str, any]:
+    return {
+        "ready": _state["ready"],
+        "warmed": _state["warmed"],
+        "warmup_mode": WARMUP,
+        "warmup_seconds": _state["duration_seconds"],
+        "components": dict(_state["components"]),
+        "frozen_objects": gc.get_freeze_count(),
+    }
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+LLM-mode throughput benchmark against the fake OpenAI-compatible server.
+
+Runs --requests process_resume_async calls in LLM mode, --concurrency at a
+time, with every LLM call answered by app.fake_llm, and reports pipeline
+latency percentiles, throughput and the LLM calls made per prompt type.
+Each request uses its own job description, so none is served from the JD
+store; the LLM response cache and (unless --rate-limit) the LLM rate limiter
+are off. Latency and error settings are passed to the server as FAKE_LLM_*
+variables, so a run with the same options and --seed is reproducible.
+
+The server is started with uvicorn in a subprocess, or --url uses one that
+is already running; --in-process serves it through an in-memory transport
+instead (no uvicorn or sockets, but the server shares the event loop).
+
+Usage: python bench_llm.py [--requests 50] [--concurrency 10] [--latency-ms 300] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen([sys.executable, "-m", "app.fake_llm", "--port", str(port)], cwd=BACKEND_DIR)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("fake LLM server exited (is uvicorn installed? try --in-process)")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("fake LLM server did not start")
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+async def run_load(requests: int, concurrency: int):
+    from app.tailoring import process_resume_async
+    from app.warmup import SAMPLE_JOB_DESCRIPTION, SAMPLE_RESUME
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            result = await process_resume_async(SAMPLE_RESUME, f"{SAMPLE_JOB_DESCRIPTION}Requisition {i}", mode="llm")
+            latencies.append(time.perf_counter() - started)
+            errors += "error" in result
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", default="lognormal", help="constant, uniform, normal or lognormal")
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--token-delay-ms", type=float, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--errors", default="429,500,503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rate-limit", action="store_true", help="keep the LLM rate limiter on")
+    parser.add_argument("--url", help="use a fake server that is already running at this base URL")
+    parser.add_argument("--in-process", action="store_true", help="serve the fake server in-process")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    state_dir = tempfile.mkdtemp(prefix="bench_llm_")
+    os.environ.update({
+        "FAKE_LLM_LATENCY": args.latency, "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_LATENCY_SPREAD": str(args.latency_spread), "FAKE_LLM_TOKEN_DELAY_MS": str(args.token_delay_ms),
+        "FAKE_LLM_ERROR_RATE": str(args.error_rate), "FAKE_LLM_ERRORS": args.errors,
+        "FAKE_LLM_SEED": str(args.seed),
+        "LLM_BACKEND": "fake", "LLM_CACHE_ENABLED": "false",
+        "JD_STORE_PATH": os.path.join(state_dir, "jd_store.sqlite"),
+        "LLM_RATE_LIMIT_PATH": os.path.join(state_dir, "llm_rate_limit.sqlite"),
+    })
+    if not args.rate_limit:
+        os.environ.update({"LLM_RATE_LIMIT_RPM": "0", "LLM_RATE_LIMIT_TPM": "0"})
+
+    server = None
+    if args.url:
+        os.environ["FAKE_LLM_URL"] = args.url
+    elif not args.in_process:
+        port = free_port()
+        os.environ["FAKE_LLM_URL"] = f"http://127.0.0.1:{port}/v1"
+        server = start_server(port)
+
+    sys.path.insert(0, BACKEND_DIR)
+    from app import utils
+    fake = None
+    if args.in_process:
+        import httpx
+        from openai import AsyncOpenAI
+        from app.fake_llm import create_app
+        fake = create_app()
+        utils._async_client = AsyncOpenAI(api_key="fake", base_url="http://fake-llm/v1", max_retries=0,
+                                          http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake)))
+    try:
+        latencies, errors, elapsed = asyncio.run(run_load(args.requests, args.concurrency))
+        if fake is not None:
+            llm_calls = dict(fake.state.requests)
+        else:
+            stats_url = os.environ["FAKE_LLM_URL"].rsplit("/v1", 1)[0] + "/stats"
+            with urllib.request.urlopen(stats_url) as response:
+                llm_calls = json.load(response)["requests"]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {
+        "requests": args.requests, "concurrency": args.concurrency, "errors": errors,
+        "seconds": round(elapsed, 3), "requests_per_second": round(args.requests / elapsed, 2),
+        "p50_seconds": round(percentile(latencies, 0.5), 4), "p95_seconds": round(percentile(latencies, 0.95), 4),
+        "p99_seconds": round(percentile(latencies, 0.99), 4), "mean_seconds": round(statistics.mean(latencies), 4),
+        "llm_calls": llm_calls,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print("🚀 LLM pipeline benchmark (fake server)")
+    print("=" * 50)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {errors} errors")
+    print(f"throughput {results['requests_per_second']:8.2f} req/s in {results['seconds']:.2f} s")
+    print(f"latency    p50 {results['p50_seconds'] * 1000:8.1f} ms   p95 {results['p95_seconds'] * 1000:8.1f} ms"
+          f"   p99 {results['p99_seconds'] * 1000:8.1f} ms")
+    print(f"LLM calls  {', '.join(f'{kind}={count}' for kind, count in sorted(llm_calls.items()))}")
+
+
+if __name__ == "__main__":
+    main()
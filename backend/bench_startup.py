@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+
+- import:   time to import app.main (what every worker pays at boot)
+- warm_up:  time spent in app.warmup.warm_up() after the import
+- first_local_request_cold / _warm: first local-mode process_resume call
+  without / after warm-up
+
+Usage: python bench_startup.py [--runs 5] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SNIPPETS = {
+    "import": """
+import time
+started = time.perf_counter()
+import app.main
+print(time.perf_counter() - started)
+""",
+    "warm_up": """
+import time
+import app.main
+from app.warmup import warm_up
+started = time.perf_counter()
+warm_up()
+print(time.perf_counter() - started)
+""",
+    "first_local_request_cold": """
+import time
+import app.main
+from app.tailoring import process_resume
+from app.warmup import SAMPLE_RESUME, SAMPLE_JOB_DESCRIPTION
+started = time.perf_counter()
+process_resume(SAMPLE_RESUME, SAMPLE_JOB_DESCRIPTION, mode="local")
+print(time.perf_counter() - started)
+""",
+    "first_local_request_warm": """
+import time
+import app.main
+from app.tailoring import process_resume
+from app.warmup import warm_up, SAMPLE_RESUME, SAMPLE_JOB_DESCRIPTION
+warm_up()
+started = time.perf_counter()
+process_resume(SAMPLE_RESUME, SAMPLE_JOB_DESCRIPTION, mode="local")
+print(time.perf_counter() - started)
+""",
+}
+
+
+def run_snippet(code: str) -> float:
+    # WARMUP=off so importing app.main measures the bare import
+    env = dict(os.environ, WARMUP="off", LLM_CACHE_ENABLED="false")
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SNIPPETS.items():
+        try:
+            timings = [run_snippet(code) for _ in range(args.runs)]
+            results[name] = {"median_seconds": round(statistics.median(timings), 4),
+                             "min_seconds": round(min(timings), 4), "runs": args.runs}
+        except RuntimeError as e:
+            results[name] = {"error": str(e)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print("🚀 Startup benchmark")
+    print("=" * 50)
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:28} ❌ {result['error']}")
+        else:
+            print(f"{name:28} median {result['median_seconds'] * 1000:8.1f} ms   min {result['min_seconds'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for batch tailoring: ranking by match score and top_k LaTeX generation
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the app's stores out of the default .cache directory
+_state_dir = tempfile.mkdtemp(prefix="test_batch_ranking_")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(_state_dir, "jobs.sqlite"))
+os.environ.setdefault("JD_STORE_PATH", os.path.join(_state_dir, "jd_analysis.sqlite"))
+
+from fastapi.testclient import TestClient
+from app import main, tailoring
+
+RESUME_TEXT = """Jane Doe
+Senior Software Engineer at Example Corp, building REST APIs in Python and AWS.
+Jan 2018 -- Present
+"""
+
+RESUME_TEX = ("\\documentclass{article}\n\\begin{document}\n" + RESUME_TEXT + "\\end{document}\n").encode()
+
+JOB_DESCRIPTIONS = [
+    "Data Analyst\nWe need SQL and Excel.",
+    "Backend Engineer\nWe need Python, AWS and Kubernetes.",
+    "Graphic Designer\nWe need Photoshop.",
+    "Platform Engineer\nWe need Python and Terraform.",
+]
+# Overall scores the stand-in scorer gives each posting, in posting order
+SCORES = [40, 90, 10, 70]
+
+def fake_scores_batch(resume_skills, resume_years, job_analyses):
+    return [[{"overall_score": score} for score in SCORES[:len(job_analyses)]]]
+
+def _with_fake_scores(func, *args, **kwargs):
+    previous = tailoring.calculate_match_scores_batch
+    tailoring.calculate_match_scores_batch = fake_scores_batch
+    try:
+        return func(*args, **kwargs)
+    finally:
+        tailoring.calculate_match_scores_batch = previous
+
+def test_jobs_ranked_and_only_top_k_tailored():
+    result = _with_fake_scores(asyncio.run, tailoring.process_resume_batch_async(
+        RESUME_TEXT, JOB_DESCRIPTIONS, top_k=2, mode="local"))
+    jobs = result["jobs"]
+    print(f"Ranking: {[(job['rank'], job['index'], job['match_analysis']['overall_score']) for job in jobs]}")
+    assert "error" not in result and result["mode"] == "local"
+    assert [job["index"] for job in jobs] == [1, 3, 0, 2]
+    assert [job["rank"] for job in jobs] == [1, 2, 3, 4]
+    assert all(job["job_description"] == JOB_DESCRIPTIONS[job["index"]] for job in jobs)
+    # Only the two best matches get the ATS rewrite and LaTeX
+    assert all("\\begin{document}" in job["latex_content"] for job in jobs[:2])
+    assert all(job["latex_content"] is None for job in jobs[2:])
+    print("✅ PASS")
+
+def test_batch_endpoint_top_k_bounds():
+    client = TestClient(main.app)
+
+    def batch(top_k):
+        response = client.post(
+            "/tailor/batch", files={"resume_file": ("resume.tex", RESUME_TEX)},
+            data={"job_descriptions": JOB_DESCRIPTIONS + ["  "], "top_k": top_k, "mode": "local"})
+        return response.json()
+
+    # top_k 0 ranks every posting without generating any LaTeX; a top_k past the end tailors them all
+    none, everything = _with_fake_scores(lambda: (batch(0), batch(10)))
+    print(f"top_k=0: {[job['index'] for job in none['jobs']]}")
+    assert [job["index"] for job in none["jobs"]] == [1, 3, 0, 2]
+    assert all(job["latex_content"] is None for job in none["jobs"])
+    assert len(everything["jobs"]) == len(JOB_DESCRIPTIONS)
+    assert all(job["latex_content"] for job in everything["jobs"])
+    assert none["resume_hash"] == everything["resume_hash"]
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_jobs_ranked_and_only_top_k_tailored()
+    test_batch_endpoint_top_k_bounds()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test script for the date-range tokenizer and interval merging
+"""
+
+import sys
+import os
+from datetime import date
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.experience_dates import professional_date_ranges, experience_months, merge_intervals
+
+TODAY = date(2026, 10, 18)
+
+def test_month_and_year_forms():
+    text = """
+    Senior Software Engineer, Example Corp
+    Jan 2020 – Present
+    - Mentored interns and ran code reviews
+
+    Software Engineer at StartupXYZ (2017-2019)
+    Data Analyst | Acme | 03/2016 to 05/2016
+    Software Engineering Intern, Foo   Jun 2015 - Aug 2015
+    B.S. Computer Science, University of Texas, 2011 - 2015
+    """
+    ranges = professional_date_ranges(text, TODAY)
+    print(f"Ranges: {[(r.text, r.end - r.start) for r in ranges]}")
+    # Jan 2020 through Oct 2026, two bare years, Mar through May
+    assert [r.end - r.start for r in ranges] == [82, 24, 3]
+    assert experience_months(text, TODAY) == 82 + 24 + 3
+    print("✅ PASS")
+
+def test_overlapping_roles_count_once():
+    text = """
+    Lead Developer, Alpha (Jan 2018 - Dec 2020)
+    Consultant, Beta (Jun 2019 - Present)
+    Senior Developer at CompanyA (2014-2016)
+    Junior Developer at CompanyB (2016-2017)
+    """
+    assert merge_intervals([(5, 10), (0, 3), (3, 4), (8, 12)]) == [(0, 4), (5, 12)]
+    months = experience_months(text, TODAY)
+    print(f"Merged months: {months}")
+    # Jan 2018 through Oct 2026, plus 2014-2017 (adjacent ranges merge)
+    assert months == 106 + 36
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_month_and_year_forms()
+    test_overlapping_roles_count_once()
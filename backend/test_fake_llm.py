@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the fake OpenAI-compatible LLM server
+"""
+
+import sys
+import os
+import asyncio
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import openai
+from fastapi.testclient import TestClient
+from app import jd_store, utils
+from app.fake_llm import FakeLLMConfig, create_app
+from app.jd_store import JDAnalysisStore
+from app.rate_limit import LLMRateLimiter
+from app.warmup import SAMPLE_JOB_DESCRIPTION, SAMPLE_RESUME
+
+def _fast_config(**overrides):
+    return FakeLLMConfig(**{"latency": "constant", "latency_ms": 1, "token_delay_ms": 0, **overrides})
+
+def test_pipeline_parses_canned_replies():
+    from app.tailoring import process_resume
+    fake = create_app(_fast_config())
+    previous = (utils._client, utils.LLM_CACHE_ENABLED, utils.rate_limiter, jd_store._store)
+    # TestClient is an httpx.Client, so the real SDK talks to the app in-process
+    utils._client = openai.OpenAI(api_key="fake", base_url="http://testserver/v1", max_retries=0,
+                                  http_client=TestClient(fake))
+    utils.LLM_CACHE_ENABLED = False
+    # Like bench_llm.py, keep canned analyses and stub usage out of the default .cache stores
+    utils.rate_limiter = LLMRateLimiter(lambda: None)
+    jd_store._store = JDAnalysisStore(os.path.join(tempfile.mkdtemp(prefix="test_fake_llm_"), "jd.sqlite"))
+    try:
+        result = process_resume(SAMPLE_RESUME, SAMPLE_JOB_DESCRIPTION, mode="llm")
+        analyzed = jd_store._store.contains(SAMPLE_JOB_DESCRIPTION)
+    finally:
+        utils._client, utils.LLM_CACHE_ENABLED, utils.rate_limiter, jd_store._store = previous
+    print(f"Fake server requests: {dict(fake.state.requests)}")
+    assert "error" not in result, result
+    assert {"resume_fields", "job_analysis", "ats_resume", "latex_resume"} <= set(fake.state.requests)
+    assert "unknown" not in fake.state.requests
+    assert analyzed
+    assert result["match_analysis"]["overall_score"] > 0
+    # The ATS rewrite echoes the parsed fields and the LaTeX is rendered from it
+    assert "Jane Doe" in result["latex_content"] and "\\end{document}" in result["latex_content"]
+    print("✅ PASS")
+
+def test_latency_streaming_and_injected_errors():
+    config = FakeLLMConfig(latency="lognormal", latency_ms=300, latency_spread=0.5, seed=7)
+    draws = [config.sample_latency(random.Random(f"7:{i}")) for i in range(200)]
+    assert draws == [config.sample_latency(random.Random(f"7:{i}")) for i in range(200)]
+    median = sorted(draws)[100]
+    print(f"Lognormal median {median:.3f}s, max {max(draws):.3f}s")
+    assert 0.2 < median < 0.4 and max(draws) > 0.5
+
+    async def stream(fake, prompt):
+        client = openai.AsyncOpenAI(api_key="fake", base_url="http://testserver/v1", max_retries=0,
+                                    http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake)))
+        chunks, usage = [], None
+        async for chunk in await client.chat.completions.create(
+                model="gpt-3.5-turbo", messages=[{"role": "user", "content": prompt}],
+                stream=True, stream_options={"include_usage": True}):
+            usage = chunk.usage or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append(chunk.choices[0].delta.content)
+        return chunks, usage
+
+    from app.prompts import SKILLS, build_prompt
+    prompt = build_prompt(SKILLS, context="resume", text=SAMPLE_RESUME).text
+    chunks, usage = asyncio.run(stream(create_app(_fast_config()), prompt))
+    print(f"Streamed {len(chunks)} chunks: {''.join(chunks)}")
+    assert len(chunks) > 5 and "Python" in "".join(chunks).split(", ")
+    assert usage.completion_tokens > 0 and usage.total_tokens == usage.prompt_tokens + usage.completion_tokens
+
+    client = openai.OpenAI(api_key="fake", base_url="http://testserver/v1", max_retries=0,
+                           http_client=TestClient(create_app(_fast_config(error_rate=1.0, errors=["429"]))))
+    try:
+        client.chat.completions.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": prompt}])
+        assert False, "expected RateLimitError"
+    except openai.RateLimitError as e:
+        assert e.response.headers["retry-after-ms"] == "200"
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_pipeline_parses_canned_replies()
+    test_latency_streaming_and_injected_errors()
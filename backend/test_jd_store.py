@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the job description analysis store
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.jd_store import JDAnalysisStore, job_description_fingerprint, normalize_job_description
+
+def test_fingerprint_ignores_formatting():
+    """Bullets, case and whitespace differences map to the same fingerprint"""
+    original = """
+    SENIOR PYTHON DEVELOPER
+    • 5+ years of Python
+    • Experience with   AWS and Docker
+    """
+    pasted = "senior python developer\n- 5+ years of python\n* experience with aws and docker"
+
+    print(f"Normalized: {normalize_job_description(original)!r}")
+    assert normalize_job_description(original) == normalize_job_description(pasted)
+    assert job_description_fingerprint(original) == job_description_fingerprint(pasted)
+    assert job_description_fingerprint(original) != job_description_fingerprint("Junior Java Developer")
+    print("✅ PASS")
+
+def test_store_roundtrip_and_popularity():
+    """Stored analyses are returned and reuse counts drive the popular list"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = JDAnalysisStore(os.path.join(tmpdir, "jd.sqlite"))
+        analysis = {"skills": ["Python", "AWS"], "requirements": {"required_years": 5}}
+        store.put("Python Developer", analysis)
+        store.put("Java Developer", {"skills": ["Java"], "requirements": {"required_years": 2}})
+
+        assert store.get("  python   developer ") == analysis
+        assert store.get("Go Developer") is None
+        store.get("Python Developer")
+
+        popular = store.popular(limit=5)
+        print(f"Popular: {[(p['job_description'], p['hits']) for p in popular]}")
+        assert popular[0]["job_description"] == "Python Developer"
+        assert popular[0]["hits"] == 2
+
+        assert store.invalidate(popular[0]["fingerprint"])
+        assert store.get("Python Developer") is None
+    print("✅ PASS")
+
+def test_prompt_version_and_pruning():
+    """A new analysis prompt version misses old rows; expired and excess rows are deleted"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "jd.sqlite")
+        analysis = {"skills": ["Python"], "requirements": {"required_years": 3}}
+        JDAnalysisStore(path, version="job_analysis/1").put("Python Developer", analysis)
+        assert JDAnalysisStore(path, version="job_analysis/1").get("Python Developer") == analysis
+        assert JDAnalysisStore(path, version="job_analysis/2").get("Python Developer") is None
+
+        store = JDAnalysisStore(path, max_entries=2)
+        for title in ("Go Developer", "Java Developer", "Rust Developer"):
+            store.put(title, analysis)
+        kept = [p["job_description"] for p in store.popular(limit=10)]
+        print(f"Kept after cap: {kept}")
+        assert len(kept) == 2 and "Rust Developer" in kept
+
+        expiring = JDAnalysisStore(path, ttl=0.05)
+        time.sleep(0.1)
+        expiring.put("Kotlin Developer", analysis)
+        assert [p["job_description"] for p in expiring.popular(limit=10)] == ["Kotlin Developer"]
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_fingerprint_ignores_formatting()
+    test_store_roundtrip_and_popularity()
+    test_prompt_version_and_pruning()
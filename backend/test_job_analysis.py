@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-call job description analysis
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import jd_store, tailoring
+from app.jd_store import JDAnalysisStore
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+We need 5+ years of experience with Python, AWS and Kubernetes.
+Preferred: React, Terraform.
+"""
+
+def _with_reply(reply, func, *args):
+    """Run func with call_gpt answering reply, against a throwaway JD store"""
+    calls = []
+
+    def fake_call_gpt(prompt, template_version="untagged"):
+        calls.append(prompt.template_id)
+        return reply
+
+    previous = (tailoring.call_gpt, jd_store._store)
+    tailoring.call_gpt = fake_call_gpt
+    jd_store._store = JDAnalysisStore(os.path.join(tempfile.mkdtemp(), "jd.sqlite"))
+    try:
+        return func(*args), calls, jd_store._store
+    finally:
+        tailoring.call_gpt, jd_store._store = previous
+
+def test_single_call_is_split_into_skills_and_requirements():
+    reply = "Here is the analysis:\n" + json.dumps({
+        "skills": ["Python", "AWS", "Kubernetes", "React", " "],
+        "required_years": 5,
+        "required_skills": ["Python", "AWS", "Kubernetes"],
+        "preferred_skills": ["React"],
+        "required_education": "Bachelor's",
+        "experience_level": "senior",
+        "industry": "tech",
+    })
+    analysis, calls, store = _with_reply(reply, tailoring.analyze_job_description, JOB_DESCRIPTION)
+    print(f"Analysis: {analysis}")
+    assert calls == ["job_analysis/1"]
+    assert sorted(analysis["skills"]) == ["AWS", "Kubernetes", "Python", "React"]
+    assert "skills" not in analysis["requirements"]
+    assert analysis["requirements"]["required_years"] == 5
+    assert analysis["requirements"]["preferred_skills"] == ["React"]
+    # A complete analysis is stored for the next request with this posting
+    assert store.contains(JOB_DESCRIPTION)
+
+    # Too few skills are topped up by pattern matching
+    short = json.dumps({"skills": ["Python"], "required_years": 5})
+    analysis, _, _ = _with_reply(short, tailoring.extract_job_analysis, JOB_DESCRIPTION)
+    assert {"Python", "AWS", "Kubernetes"} <= set(analysis["skills"])
+    print("✅ PASS")
+
+def test_malformed_reply_falls_back_to_pattern_matching():
+    for reply in ("Sorry, I cannot help with that.", '{"skills": ["Python", "AWS",'):
+        analysis, calls, store = _with_reply(reply, tailoring.analyze_job_description, JOB_DESCRIPTION)
+        print(f"Reply {reply!r}: {analysis}")
+        assert calls == ["job_analysis/1"]
+        assert analysis["requirements"] == {}
+        assert {"Python", "AWS", "Kubernetes"} <= set(analysis["skills"])
+        # Incomplete analyses are not stored, so the posting is analyzed again next time
+        assert not store.contains(JOB_DESCRIPTION)
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_single_call_is_split_into_skills_and_requirements()
+    test_malformed_reply_falls_back_to_pattern_matching()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test script for the durable job queue
+"""
+
+import sys
+import os
+import asyncio
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.jobs import JobQueue, QueueFull
+
+async def echo(payload):
+    await asyncio.sleep(payload.get("delay", 0))
+    if payload.get("fail"):
+        raise RuntimeError("boom")
+    return {"echo": payload["value"]}
+
+async def wait_finished(queue, job_id):
+    async for status in queue.subscribe(job_id):
+        pass
+    return queue.get(job_id)
+
+def test_jobs_run_and_queue_applies_backpressure():
+    """Jobs complete with results, failures are recorded and a full queue refuses work"""
+
+    async def run(path):
+        queue = JobQueue(path, workers=1, max_queue=2)
+        queue.register("echo", echo)
+        await queue.start()
+
+        first = queue.submit("echo", {"value": 1, "delay": 0.2})
+        await asyncio.sleep(0.05)  # let the worker pick up the first job
+        second = queue.submit("echo", {"value": 2, "fail": True})
+        queue.submit("echo", {"value": 3})
+        try:
+            queue.submit("echo", {"value": 4})
+            assert False, "expected QueueFull"
+        except QueueFull as e:
+            print(f"Rejected: {e}")
+
+        assert (await wait_finished(queue, first))["status"] == "succeeded"
+        assert queue.result(first) == {"echo": 1}
+        failed = await wait_finished(queue, second)
+        print(f"Failed job: {failed}")
+        assert failed["status"] == "failed" and failed["error"] == "boom"
+        await queue.drain(timeout=1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        asyncio.run(run(os.path.join(tmpdir, "jobs.sqlite")))
+    print("✅ PASS")
+
+def test_interrupted_jobs_are_requeued_on_start():
+    """A job cut off by shutdown runs again when the queue starts back up"""
+
+    async def run(path):
+        queue = JobQueue(path, workers=1)
+        queue.register("echo", echo)
+        await queue.start()
+        job_id = queue.submit("echo", {"value": "slow", "delay": 5})
+        await asyncio.sleep(0.05)
+        await queue.drain(timeout=0.1)
+        assert queue.get(job_id)["status"] == "queued"
+
+        restarted = JobQueue(path, workers=1)
+        restarted.register("echo", lambda payload: echo({"value": payload["value"]}))
+        await restarted.start()
+        assert (await wait_finished(restarted, job_id))["status"] == "succeeded"
+        assert restarted.result(job_id) == {"echo": "slow"}
+        await restarted.drain(timeout=1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        asyncio.run(run(os.path.join(tmpdir, "jobs.sqlite")))
+    print("✅ PASS")
+
+def test_shared_database_runs_each_job_once():
+    """Processes sharing the database claim each job once and only take over expired leases"""
+    runs = []
+
+    async def record(payload):
+        runs.append(payload["value"])
+        await asyncio.sleep(payload.get("delay", 0))
+        return {"echo": payload["value"]}
+
+    async def run(path):
+        first = JobQueue(path, workers=1)
+        first.register("echo", record)
+        await first.start()
+        job_id = first.submit("echo", {"value": "live", "delay": 0.3})
+        await asyncio.sleep(0.05)
+
+        # A second process starting up leaves the live job alone, even when offered it
+        second = JobQueue(path, workers=1)
+        second.register("echo", record)
+        await second.start()
+        second._ready.put_nowait(job_id)
+        assert (await wait_finished(first, job_id))["status"] == "succeeded"
+        assert runs == ["live"]
+        await second.drain(timeout=1)
+
+        # A running job whose owner stopped renewing its lease is picked up again
+        first.owner = "crashed"
+        stale = first.submit("echo", {"value": "stale", "delay": 5})
+        await asyncio.sleep(0.05)
+        first._conn.execute("UPDATE jobs SET heartbeat_at = 0 WHERE id = ?", (stale,))
+        rescuer = JobQueue(path, workers=1, lease_seconds=1)
+        rescuer.register("echo", lambda payload: record({"value": payload["value"]}))
+        await rescuer.start()
+        assert (await wait_finished(rescuer, stale))["status"] == "succeeded"
+        print(f"Runs: {runs}")
+        assert runs == ["live", "stale", "stale"]
+        await rescuer.drain(timeout=1)
+        await first.drain(timeout=0.1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        asyncio.run(run(os.path.join(tmpdir, "jobs.sqlite")))
+    print("✅ PASS")
+
+def test_leases_survive_database_errors_and_results_expire():
+    """
+    A failed heartbeat round is logged and retried rather than ending the
+    heartbeat, and old results are pruned while the queue runs
+    """
+
+    async def run(path):
+        queue = JobQueue(path, workers=1, lease_seconds=0.15, result_ttl=0.5)
+        queue.prune_interval = 0.1
+        queue.register("echo", echo)
+        renew, failures = queue._renew_leases, []
+
+        def flaky_renew():
+            if not failures:
+                failures.append(1)
+                raise sqlite3.OperationalError("database is locked")
+            renew()
+
+        queue._renew_leases = flaky_renew
+        await queue.start()
+        job_id = queue.submit("echo", {"value": "long", "delay": 0.6})
+        await asyncio.sleep(0.05)
+        started = queue._conn.execute("SELECT heartbeat_at FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        await asyncio.sleep(0.3)
+        heartbeat = queue._conn.execute("SELECT heartbeat_at FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        print(f"Heartbeat moved {heartbeat - started:.2f}s after {len(failures)} failed round")
+        assert failures and heartbeat > started and not queue._heartbeat.done()
+        # The lease never lapsed, so the job ran once and finished normally
+        assert (await wait_finished(queue, job_id))["status"] == "succeeded"
+
+        # Past result_ttl the finished job is deleted without a restart
+        await asyncio.sleep(0.8)
+        assert queue.get(job_id) is None and queue.result(job_id) is None
+        await queue.drain(timeout=1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        asyncio.run(run(os.path.join(tmpdir, "jobs.sqlite")))
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_jobs_run_and_queue_applies_backpressure()
+    test_interrupted_jobs_are_requeued_on_start()
+    test_shared_database_runs_each_job_once()
+    test_leases_survive_database_errors_and_results_expire()
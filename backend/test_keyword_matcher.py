@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-pass skill keyword matcher
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.keyword_matcher import KeywordMatcher, keyword_matcher
+
+def test_canonical_names_offsets_and_boundaries():
+    text = "Built APIs in Python and JS on k8s, backed by SQL Server. Pythonic, C++ and Machine\n  Learning."
+    matches = keyword_matcher.find_all(text)
+    for match in matches:
+        print(match)
+        assert text[match.start:match.end] == match.term
+
+    skills = [match.canonical for match in matches]
+    assert skills == ["Python", "JavaScript", "Kubernetes", "SQL Server", "C++", "Machine Learning"]
+    # "Pythonic" is not Python; "SQL Server" wins over the shorter "SQL"
+    assert "SQL" not in skills
+    print("✅ PASS")
+
+def test_custom_terms():
+    matcher = KeywordMatcher([("he", "HE"), ("she", "SHE"), ("hers", "HERS")])
+    print(matcher.find_all("ushers she hers"))
+    assert [m.canonical for m in matcher.find_all("ushers she hers")] == ["SHE", "HERS"]
+    assert matcher.find_skills("HE said he") == ["HE"]
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_canonical_names_offsets_and_boundaries()
+    test_custom_terms()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the pdflatex compile pool (with a stand-in for pdflatex)
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import latex
+from app.latex import CompileQueueFull, LatexCompilePool
+
+DOCUMENT = "\\documentclass{article}\n\\usepackage{hyperref}\n\\begin{document}\nJane Doe\n\\end{document}\n"
+
+class FakePdflatex:
+    """Records pdflatex invocations and writes the PDF of a successful compile"""
+
+    def __init__(self, delay: float = 0.0, build_formats: bool = True, format_compiles_work: bool = True):
+        self.delay = delay
+        self.build_formats = build_formats
+        self.format_compiles_work = format_compiles_work
+        self.calls = []
+
+    async def __call__(self, *args, timeout, cwd=None, env=None):
+        self.calls.append(args)
+        await asyncio.sleep(self.delay)
+        if "-ini" in args:
+            if not self.build_formats:
+                return 1, "", "! LaTeX Error: File `mylatexformat.ltx' not found."
+            name = next(arg.split("=", 1)[1] for arg in args if arg.startswith("-jobname="))
+            open(os.path.join(cwd, f"{name}.fmt"), "w").close()
+            return 0, "", ""
+        if any(arg.startswith("-fmt=") for arg in args) and not self.format_compiles_work:
+            return 1, "! Fatal format file error; I'm stymied", ""
+        output_dir = args[args.index("-output-directory") + 1]
+        jobname = next(arg.split("=", 1)[1] for arg in args if arg.startswith("-jobname="))
+        open(os.path.join(output_dir, f"{jobname}.pdf"), "wb").close()
+        return 0, "Output written", ""
+
+def _with_fake(fake, coroutine):
+    previous = latex.run_pdflatex
+    latex.run_pdflatex = fake
+    try:
+        return asyncio.run(coroutine)
+    finally:
+        latex.run_pdflatex = previous
+
+def test_full_queue_rejects_compiles():
+    fake = FakePdflatex(delay=0.1)
+
+    async def burst():
+        pool = LatexCompilePool(max_concurrency=1, max_queue=1, use_formats=False)
+        tasks = [asyncio.ensure_future(pool.compile(DOCUMENT, tempfile.mkdtemp())) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        stats = pool.stats()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return stats, results, pool.stats()
+
+    during, results, after = _with_fake(fake, burst())
+    print(f"During the burst: {during}; outcomes: {[type(r).__name__ for r in results]}")
+    assert during["active"] == 1 and during["waiting"] == 1
+    assert sum(isinstance(r, CompileQueueFull) for r in results) == 1
+    assert sum(getattr(r, "returncode", None) == 0 for r in results) == 2
+    assert after["active"] == 0 and after["waiting"] == 0
+    print("✅ PASS")
+
+def test_compiles_without_unavailable_format():
+    async def compile_three(pool):
+        return [await pool.compile(DOCUMENT, tempfile.mkdtemp()) for _ in range(3)]
+
+    # mylatexformat missing: the format build fails once and is not retried
+    fake = FakePdflatex(build_formats=False)
+    pool = LatexCompilePool(max_concurrency=1, format_dir=tempfile.mkdtemp())
+    results = _with_fake(fake, compile_three(pool))
+    assert all(r.returncode == 0 and os.path.exists(r.pdf_path) and not r.used_format for r in results)
+    assert sum("-ini" in call for call in fake.calls) == 1
+
+    # A format that loads but breaks the compile is dropped and the compile re-run without it
+    fake = FakePdflatex(format_compiles_work=False)
+    pool = LatexCompilePool(max_concurrency=1, format_dir=tempfile.mkdtemp())
+    results = _with_fake(fake, compile_three(pool))
+    print(f"Compile calls: {[[a for a in call if a.startswith(('-fmt', '-ini'))] for call in fake.calls]}")
+    assert all(r.returncode == 0 and not r.used_format for r in results)
+    assert sum(any(a.startswith("-fmt=") for a in call) for call in fake.calls) == 1
+    assert pool.stats()["cached_formats"] == 1
+
+    # Per-preamble bookkeeping stays bounded however many distinct preambles clients send
+    fake = FakePdflatex(build_formats=False)
+    pool = LatexCompilePool(max_concurrency=4, format_dir=tempfile.mkdtemp())
+    pool._preamble_uses.max_entries = pool._failed_formats.max_entries = 5
+
+    async def many_preambles():
+        for i in range(20):
+            document = DOCUMENT.replace("\\usepackage{hyperref}", f"\\usepackage{{hyperref}}% {i}")
+            await asyncio.gather(*(pool.compile(document, tempfile.mkdtemp()) for _ in range(3)))
+
+    _with_fake(fake, many_preambles())
+    print(f"Tracked preambles: {len(pool._preamble_uses)}, failed formats: {len(pool._failed_formats)}")
+    assert len(pool._preamble_uses) <= 5 and len(pool._failed_formats) <= 5
+    assert pool._format_locks == {}
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_full_queue_rejects_compiles()
+    test_compiles_without_unavailable_format()
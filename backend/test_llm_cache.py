@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM response cache tiers
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.cache import LRUCache, SQLiteCache, LLMResponseCache
+
+def test_lru_eviction_and_ttl():
+    """Least recently used entries are evicted first and expired entries miss"""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts "b", the least recently used
+
+    print(f"Stats: {cache.stats()}")
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("short", "value", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    print("✅ PASS")
+
+def test_disk_tier_shared_between_instances():
+    """A second cache on the same file (e.g. another worker) sees the entry"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "llm_cache.sqlite")
+        first = LLMResponseCache(LRUCache(), SQLiteCache(path, max_entries=10))
+        first.set("gpt-3.5-turbo", "skills/1", "prompt text", "Python, Docker")
+
+        second = LLMResponseCache(LRUCache(), SQLiteCache(path, max_entries=10))
+        print(f"Second worker lookup: {second.get('gpt-3.5-turbo', 'skills/1', 'prompt text')}")
+        assert second.get("gpt-3.5-turbo", "skills/1", "prompt text") == "Python, Docker"
+        # A different template version is a different entry
+        assert second.get("gpt-3.5-turbo", "skills/2", "prompt text") is None
+        # So is a reply from another backend sharing the file
+        fake = LLMResponseCache(LRUCache(), SQLiteCache(path, max_entries=10),
+                                backend="fake:http://127.0.0.1:8765/v1")
+        assert fake.get("gpt-3.5-turbo", "skills/1", "prompt text") is None
+
+        stats = second.stats()
+        print(f"Stats: {stats}")
+        assert stats["disk"]["hits"] == 1 and stats["memory"]["hits"] == 1
+    print("✅ PASS")
+
+def test_disk_size_eviction():
+    """The disk tier is kept to max_entries by periodic sweeps"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        disk = SQLiteCache(os.path.join(tmpdir, "cache.sqlite"), max_entries=3)
+        for i in range(5):
+            disk.set(f"key{i}", {"n": i})
+        print(f"Stats: {disk.stats()}")
+        assert len(disk) == 3
+        assert disk.get("key0") is None
+        assert disk.get("key4") == {"n": 4}
+
+        # A bigger cache only counts its rows every evict_every writes, and sweeps back down to max_entries
+        disk = SQLiteCache(os.path.join(tmpdir, "big.sqlite"), max_entries=1000)
+        counts = []
+        disk._conn.set_trace_callback(lambda sql: counts.append(sql) if "COUNT(*)" in sql else None)
+        for i in range(1100):
+            disk.set(f"key{i}", i)
+        print(f"Row counts for 1100 writes: {len(counts)}, evictions: {disk.evictions}")
+        assert len(counts) == 1100 // disk.evict_every == 110
+        assert len(disk) == 1000 and disk.get("key99") is None and disk.get("key100") == 100
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_lru_eviction_and_ttl()
+    test_disk_tier_shared_between_instances()
+    test_disk_size_eviction()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test script for LLM call retries, hedging and the circuit breaker
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import openai
+from app import llm_resilience, metrics, utils
+from app.llm_resilience import CircuitBreaker, RetryPolicy, call_with_retries, call_with_retries_async
+from app.rate_limit import RateLimitTimeout
+
+def _rate_limit_error(retry_after_ms: str):
+    response = SimpleNamespace(request=None, status_code=429, headers={"retry-after-ms": retry_after_ms})
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+def test_retries_honor_retry_after_and_breaker_opens():
+    llm_resilience.RETRY_POLICIES["resilience_test"] = RetryPolicy(timeout=1, deadline=2, max_attempts=3)
+    timeouts = []
+
+    def flaky(timeout):
+        timeouts.append(timeout)
+        if len(timeouts) == 1:
+            raise _rate_limit_error("200")
+        return "ok"
+
+    started = time.perf_counter()
+    assert call_with_retries("resilience_test", flaky) == "ok"
+    waited = time.perf_counter() - started
+    print(f"Retried after {waited:.3f}s with timeouts {timeouts}")
+    assert waited >= 0.2 and timeouts[0] == 1
+    assert metrics.LLM_RETRIES.value(stage="resilience_test", error="RateLimitError") == 1
+
+    # A Retry-After past the deadline is not waited for
+    def throttled(timeout):
+        raise _rate_limit_error("5000")
+    started = time.perf_counter()
+    try:
+        call_with_retries("resilience_test", throttled)
+        assert False, "expected RateLimitError"
+    except openai.RateLimitError:
+        pass
+    assert time.perf_counter() - started < 0.5
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    error = openai.APIConnectionError(request=None)
+    breaker.record_failure(error)
+    assert breaker.allow()
+    breaker.record_failure(error)
+    assert breaker.state == "open" and not breaker.allow() and not breaker.available()
+    time.sleep(0.25)
+    # One probe at a time once the cool-down is over
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+    print("✅ PASS")
+
+def test_hedging_and_open_circuit_fallback():
+    previous = (llm_resilience.LLM_HEDGE_STAGES, llm_resilience.LLM_HEDGE_DELAY)
+    llm_resilience.LLM_HEDGE_STAGES = {"hedge_test"}
+    llm_resilience.LLM_HEDGE_DELAY = 0.05
+    calls = []
+    lock = threading.Lock()
+
+    def slow_then_fast(timeout):
+        with lock:
+            calls.append(timeout)
+            first = len(calls) == 1
+        time.sleep(0.5 if first else 0.01)
+        return "primary" if first else "hedge"
+
+    async def slow_then_fast_async(timeout):
+        first = not calls
+        calls.append(timeout)
+        await asyncio.sleep(0.5 if first else 0.01)
+        return "primary" if first else "hedge"
+
+    try:
+        started = time.perf_counter()
+        assert call_with_retries("hedge_test", slow_then_fast) == "hedge"
+        assert time.perf_counter() - started < 0.3
+        calls.clear()
+        assert asyncio.run(call_with_retries_async("hedge_test", slow_then_fast_async)) == "hedge"
+        calls.clear()
+        assert asyncio.run(call_with_retries_async("hedge_test", slow_then_fast_async, hedge=False)) == "primary"
+    finally:
+        llm_resilience.LLM_HEDGE_STAGES, llm_resilience.LLM_HEDGE_DELAY = previous
+    assert metrics.LLM_HEDGES.value(stage="hedge_test", winner="hedge") == 2
+
+    from app.tailoring import extract_basic_keywords, extract_skills_with_gpt, extract_job_requirements
+    breaker = llm_resilience.llm_breaker
+    previous_client, previous_cache = utils._client, utils.LLM_CACHE_ENABLED
+    utils._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda **kwargs: calls.append("api") or 1 / 0)))
+    utils.LLM_CACHE_ENABLED = False
+    calls.clear()
+    breaker.trip(openai.APIConnectionError(request=None))
+    try:
+        text = "Senior engineer with Python, Docker and Kubernetes"
+        assert not utils.llm_available()
+        assert extract_skills_with_gpt(text) == extract_basic_keywords(text)
+        requirements = extract_job_requirements("5+ years with Python and AWS.\nNice to have: React")
+        print(f"Local requirements while the circuit is open: {requirements}")
+        assert requirements["required_years"] == 5 and requirements["preferred_skills"] == ["React"]
+        assert calls == []
+    finally:
+        breaker.record_success()
+        utils._client, utils.LLM_CACHE_ENABLED = previous_client, previous_cache
+    assert metrics.LLM_SHORT_CIRCUITS.value(stage="skills") >= 1
+    print("✅ PASS")
+
+def test_half_open_probe_is_always_settled():
+    """A probe failing with a non-outage error, or cancelled, does not leave the breaker stuck half-open"""
+    previous = llm_resilience.llm_breaker
+    breaker = llm_resilience.llm_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+
+    def wait_for_probe():
+        breaker.trip(openai.APIConnectionError(request=None))
+        time.sleep(0.06)
+
+    def fail(error):
+        def attempt(timeout):
+            raise error
+        return attempt
+
+    try:
+        for error in (ValueError("reply did not parse"), RateLimitTimeout("No LLM rate limit capacity")):
+            wait_for_probe()
+            try:
+                call_with_retries("probe_test", fail(error))
+                assert False, f"expected {type(error).__name__}"
+            except type(error):
+                pass
+            print(f"After a probe failing with {type(error).__name__}: {breaker.state}")
+            assert breaker.state == "closed" and breaker.allow()
+
+        # An outage error re-opens it
+        wait_for_probe()
+        try:
+            call_with_retries("probe_test", fail(openai.APIConnectionError(request=None)))
+        except openai.APIConnectionError:
+            pass
+        assert breaker.state == "open" and not breaker.allow()
+
+        # A cancelled probe frees its slot for the next call
+        time.sleep(0.06)
+
+        async def cancelled_probe():
+            task = asyncio.ensure_future(call_with_retries_async("probe_test", lambda timeout: asyncio.sleep(5)))
+            await asyncio.sleep(0.01)
+            assert breaker.state == "half_open" and not breaker.allow()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(cancelled_probe())
+        assert breaker.allow()
+    finally:
+        llm_resilience.llm_breaker = previous
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_retries_honor_retry_after_and_breaker_opens()
+    test_hedging_and_open_circuit_fallback()
+    test_half_open_probe_is_always_settled()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM-free local tailoring mode
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import local_pipeline
+from app.local_pipeline import extract_resume_fields_locally, analyze_job_description_locally
+from app.tailoring import process_resume
+
+RESUME = """Jane Doe
+jane.doe@example.com | +1 (555) 123-4567 | Austin, TX
+
+EXPERIENCE
+Senior Software Engineer at Acme Corp
+Jan 2020 - Present
+- Built Python microservices on k8s with PostgreSQL
+Software Developer | Globex, 2016 - 2019
+- Wrote JS frontends in React
+
+EDUCATION
+B.S. Computer Science, University of Texas, 2016
+
+SKILLS
+Python, JS, Docker
+"""
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+Requirements:
+- 5+ years of experience with Python and Kubernetes
+Nice to have:
+- React, Go
+"""
+
+def test_local_resume_fields():
+    fields = extract_resume_fields_locally(RESUME)
+    print(f"Fields: {fields}")
+    assert fields["name"] == "Jane Doe"
+    assert fields["email"] == "jane.doe@example.com"
+    assert [job["company"] for job in fields["experience"]] == ["Acme Corp", "Globex"]
+    assert fields["experience"][0]["start"] == "Jan 2020"
+    assert fields["education"][0]["institution"] == "University of Texas"
+    assert {"Python", "Kubernetes", "JavaScript", "Docker"} <= set(fields["skills"])
+    print("✅ PASS")
+
+def test_local_job_analysis():
+    analysis = analyze_job_description_locally(JOB_DESCRIPTION)
+    print(f"Analysis: {analysis}")
+    assert analysis["requirements"]["required_years"] == 5
+    assert analysis["requirements"]["required_skills"] == ["Python", "Kubernetes"]
+    assert analysis["requirements"]["preferred_skills"] == ["React", "Go"]
+    assert analysis["requirements"]["experience_level"] == "senior"
+    print("✅ PASS")
+
+def test_local_mode_end_to_end():
+    started = time.perf_counter()
+    result = process_resume(RESUME, JOB_DESCRIPTION, mode="local")
+    elapsed = time.perf_counter() - started
+    print(f"Local result in {elapsed:.3f}s: {result['match_analysis']['overall_score']}")
+    assert result["mode"] == "local"
+    assert "error" not in result
+    assert result["missing_skills"] == ["Go"]
+    assert result["latex_content"].startswith("\\documentclass")
+    assert elapsed < 1.0
+    print("✅ PASS")
+
+def test_fields_without_spacy():
+    """A missing spaCy model or a failing NER pass leaves the pattern extractors in charge"""
+    def broken_nlp(text):
+        raise ValueError("NER exploded")
+
+    previous = (local_pipeline._nlp, local_pipeline._nlp_unavailable, local_pipeline.SPACY_MODEL)
+    try:
+        for nlp, model in ((None, "no_such_spacy_model"), (broken_nlp, previous[2])):
+            local_pipeline._nlp, local_pipeline._nlp_unavailable, local_pipeline.SPACY_MODEL = nlp, False, model
+            fields = extract_resume_fields_locally(RESUME)
+            print(f"Fields ({model}, {nlp}): {fields['name']}, {fields['location']}")
+            assert fields["name"] == "Jane Doe" and fields["location"] == "Austin, TX"
+            assert fields["email"] == "jane.doe@example.com"
+            assert [job["company"] for job in fields["experience"]] == ["Acme Corp", "Globex"]
+            assert "Python" in fields["skills"]
+    finally:
+        local_pipeline._nlp, local_pipeline._nlp_unavailable, local_pipeline.SPACY_MODEL = previous
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_local_resume_fields()
+    test_local_job_analysis()
+    test_local_mode_end_to_end()
+    test_fields_without_spacy()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the Prometheus metrics
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import metrics, utils
+from app.metrics import Counter, Histogram, Registry, llm_cost
+
+def test_text_format():
+    registry = Registry()
+    requests = registry.register(Counter("demo_requests_total", "Demo requests", ["stage"]))
+    latency = registry.register(Histogram("demo_seconds", "Demo latency", ["stage"], buckets=(0.1, 1.0)))
+    requests.inc(stage='say "hi"')
+    latency.observe(0.05, stage="a")
+    latency.observe(0.5, stage="a")
+    latency.observe(5, stage="a")
+    text = registry.render()
+    print(text)
+    assert '# TYPE demo_requests_total counter' in text
+    assert 'demo_requests_total{stage="say \\"hi\\""} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="a"} 3' in text and 'demo_seconds_sum{stage="a"} 5.55' in text
+    print("✅ PASS")
+
+def test_call_gpt_records_usage_cost_and_errors():
+    class FakeCompletions:
+        def __init__(self):
+            self.fail = False
+
+        def create(self, **kwargs):
+            if self.fail:
+                raise TimeoutError("slow upstream")
+            message = SimpleNamespace(content="Python, Docker")
+            usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=200)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    completions = FakeCompletions()
+    previous_client, previous_cache = utils._client, utils.LLM_CACHE_ENABLED
+    utils._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    utils.LLM_CACHE_ENABLED = False
+    try:
+        assert utils.call_gpt("List skills: Python", "metrics_test/1") == "Python, Docker"
+        completions.fail = True
+        try:
+            utils.call_gpt("List skills: Go", "metrics_test/1")
+            assert False, "expected TimeoutError"
+        except TimeoutError:
+            pass
+    finally:
+        utils._client, utils.LLM_CACHE_ENABLED = previous_client, previous_cache
+
+    labels = {"stage": "metrics_test", "model": utils.GPT_MODEL}
+    assert metrics.LLM_REQUESTS.value(cache="disabled", result="ok", **labels) == 1
+    assert metrics.LLM_ERRORS.value(error="TimeoutError", **labels) == 1
+    assert metrics.LLM_PROMPT_TOKENS.value(**labels) == 1000
+    assert metrics.LLM_COST.value(**labels) == llm_cost(utils.GPT_MODEL, 1000, 200) > 0
+    assert metrics.LLM_LATENCY.count(**labels) == 2
+    assert 'llm_completion_tokens_total{stage="metrics_test"' in metrics.registry.render()
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_text_format()
+    test_call_gpt_records_usage_cost_and_errors()
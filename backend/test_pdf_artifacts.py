@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled PDF artifact store and its endpoints
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the app's stores out of the default .cache directory
+_state_dir = tempfile.mkdtemp(prefix="test_pdf_artifacts_")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(_state_dir, "jobs.sqlite"))
+os.environ.setdefault("JD_STORE_PATH", os.path.join(_state_dir, "jd_analysis.sqlite"))
+
+from fastapi.testclient import TestClient
+from app import main
+from app.artifacts import PDFArtifactStore, latex_source_hash
+
+LATEX = "\\documentclass{article}\n\\begin{document}\nJane Doe\n\\end{document}\n"
+PDF_BYTES = b"%PDF-1.5\n% stored test document\n"
+
+def _pdf_file(size: int = 0) -> str:
+    path = os.path.join(tempfile.mkdtemp(), "resume.pdf")
+    with open(path, "wb") as f:
+        f.write(PDF_BYTES + b" " * size)
+    return path
+
+def test_store_eviction_and_compile_lock():
+    store = PDFArtifactStore(tempfile.mkdtemp(), max_bytes=2 * (len(PDF_BYTES) + 100))
+    for key in ("a", "b", "c"):
+        store.put(key, _pdf_file(100))
+    print(f"Stats: {store.stats()}")
+    # The oldest file went to stay under max_bytes
+    assert store.get("a") is None and store.get("c") is not None
+    assert store.stats()["files"] == 2
+
+    # The directory only appears on the first put, and the store is listed
+    # once to seed its byte count, then again only when that passes max_bytes
+    directory = os.path.join(tempfile.mkdtemp(), "artifacts")
+    roomy = PDFArtifactStore(directory, max_bytes=3 * (len(PDF_BYTES) + 100))
+    assert not os.path.exists(directory) and roomy.stats()["files"] == 0
+    scans = []
+    evict = roomy._evict
+    roomy._evict = lambda: (scans.append(1), evict())
+    for key in ("a", "b", "c", "d"):
+        roomy.put(key, _pdf_file(100))
+    print(f"Directory scans for 4 puts: {len(scans)}")
+    assert len(scans) == 2 and roomy.get("a") is None and roomy.stats()["files"] == 3
+
+    running, overlaps = [], []
+
+    async def compile_once(key):
+        async with store.compile_lock(key):
+            overlaps.append(len(running))
+            running.append(key)
+            await asyncio.sleep(0.01)
+            running.remove(key)
+
+    async def burst():
+        await asyncio.gather(*(compile_once("same") for _ in range(3)))
+
+    asyncio.run(burst())
+    # Each request waited for the previous one, and the lock is gone once nobody needs it
+    assert overlaps == [0, 0, 0]
+    assert store._compile_locks == {}
+    print("✅ PASS")
+
+def test_stored_pdf_served_with_etag():
+    source_hash = latex_source_hash(LATEX)
+    store = PDFArtifactStore(tempfile.mkdtemp())
+    store.put(source_hash, _pdf_file())
+    previous = main.pdf_artifacts
+    main.pdf_artifacts = store
+    try:
+        client = TestClient(main.app)
+        response = client.post("/latex-to-pdf", data={"latex_code": LATEX})
+        print(f"POST headers: {dict(response.headers)}")
+        assert response.status_code == 200 and response.content == PDF_BYTES
+        assert response.headers["etag"] == f'"{source_hash}"'
+        assert response.headers["content-location"] == f"/pdf/{source_hash}"
+
+        # Conditional POSTs are not revalidations (RFC 7232)
+        conditional = client.post("/latex-to-pdf", data={"latex_code": LATEX},
+                                  headers={"If-None-Match": response.headers["etag"]})
+        assert conditional.status_code == 412
+
+        stored = client.get(response.headers["content-location"])
+        assert stored.status_code == 200 and stored.content == PDF_BYTES
+        revalidated = client.get(f"/pdf/{source_hash}", headers={"If-None-Match": stored.headers["etag"]})
+        assert revalidated.status_code == 304 and revalidated.content == b""
+        assert client.get(f"/pdf/{'0' * 64}").status_code == 404
+        assert client.get("/pdf/..%2F..%2Fsecret").status_code == 404
+    finally:
+        main.pdf_artifacts = previous
+    assert store.stats()["hits"] >= 3
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_store_eviction_and_compile_lock()
+    test_stored_pdf_served_with_etag()
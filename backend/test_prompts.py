@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test script for the token-aware prompt builder
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.prompts import (PromptTemplate, build_prompt, count_tokens, TEMPLATES, ATS_RESUME, LATEX_RESUME,
+                         MIN_FIELD_TOKENS, TRUNCATION_MARKER)
+
+RESUME_FIELDS = {"name": "Jane Doe", "skills": ["Python", "AWS"],
+                 "experience": [{"company": "Acme", "title": "Engineer", "bullets": ["Built APIs"]}]}
+
+def test_context_is_sent_once_as_compact_json():
+    job_description = "Backend engineer with Python and AWS. " * 20
+    prompt = build_prompt(ATS_RESUME, resume_fields=RESUME_FIELDS, job_description=job_description)
+    print(f"{prompt.template_id}: {prompt.input_tokens} input tokens")
+    assert prompt.template_id == "ats_resume/2"
+    assert prompt.text.count(job_description) == 1
+    assert prompt.text.count(json.dumps(RESUME_FIELDS, separators=(",", ":"))) == 1
+    assert prompt.input_tokens == count_tokens(prompt.text)
+
+    latex = build_prompt(LATEX_RESUME, ats_resume_fields=RESUME_FIELDS)
+    assert '"name":"Jane Doe"' in latex.text and "{ats_resume_fields}" not in latex.text
+    assert all(template.id == f"{name}/{template.version}" for name, template in TEMPLATES.items())
+    print("✅ PASS")
+
+def test_budget_truncates_largest_free_text_field():
+    template = PromptTemplate("example", 1, "Instructions.\nA: {a}\nB: {b}\nData: {data}", truncatable=("a", "b"))
+    long_text = "\n".join(f"line {i} of a long resume" for i in range(2000))
+    prompt = build_prompt(template, budget=1000, a=long_text, b="short", data={"keep": "all of this"})
+    print(f"Truncated {prompt.truncated} to {prompt.input_tokens} tokens")
+    assert prompt.input_tokens <= 1000
+    assert prompt.truncated == ["a"]
+    assert TRUNCATION_MARKER in prompt.text and 'B: short' in prompt.text
+    assert '{"keep":"all of this"}' in prompt.text
+
+    # Fields are never cut below MIN_FIELD_TOKENS; the prompt is then sent over budget
+    tiny = build_prompt(template, budget=10, a=long_text, b="short", data=[])
+    assert tiny.input_tokens > 10 and count_tokens(tiny.text.split("\nB:")[0]) >= MIN_FIELD_TOKENS
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_context_is_sent_once_as_compact_json()
+    test_budget_truncates_largest_free_text_field()
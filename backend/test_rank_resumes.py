@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for recruiter screening: ranking many resumes against one posting
+"""
+
+import sys
+import os
+import re
+import json
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the app's stores out of the default .cache directory
+_state_dir = tempfile.mkdtemp(prefix="test_rank_resumes_")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(_state_dir, "jobs.sqlite"))
+os.environ.setdefault("JD_STORE_PATH", os.path.join(_state_dir, "jd_analysis.sqlite"))
+
+from fastapi.testclient import TestClient
+from app import main, tailoring
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+We need 5+ years of experience with Python, AWS and Kubernetes.
+"""
+
+def _resume(name: str, score: str) -> str:
+    return f"{name}\nSoftware Engineer working with Python and AWS.\nScore: {score}\n"
+
+def fake_match_score(resume_text, job_description, resume_skills, job_skills, **kwargs):
+    """Scores each resume by the 'Score:' line it carries; 'boom' makes scoring fail"""
+    score = re.search(r"Score: (\w+)", resume_text).group(1)
+    if score == "boom":
+        raise RuntimeError("scorer crashed")
+    return {"overall_score": int(score)}
+
+def _with_fake_score(func, *args):
+    previous = tailoring.calculate_match_score
+    tailoring.calculate_match_score = fake_match_score
+    try:
+        return func(*args)
+    finally:
+        tailoring.calculate_match_score = previous
+
+def test_ranking_orders_by_score_with_errors_last():
+    resumes = [
+        {"filename": "low.tex", "resume_text": _resume("Low Match", 20), "resume_hash": "a"},
+        {"filename": "unreadable.pdf", "error": "Could not extract text from PDF"},
+        {"filename": "high.tex", "resume_text": _resume("High Match", 95), "resume_hash": "b"},
+        {"filename": "crash.tex", "resume_text": _resume("Crash Case", "boom"), "resume_hash": "c"},
+        {"filename": "mid.tex", "resume_text": _resume("Mid Match", 60), "resume_hash": "d"},
+    ]
+
+    async def collect():
+        return [event async for event in tailoring.rank_resumes_events(resumes, JOB_DESCRIPTION,
+                                                                        max_concurrency=2, mode="local")]
+
+    events = _with_fake_score(asyncio.run, collect())
+    names = [event for event, _ in events]
+    assert names == ["job_analysis"] + ["resume"] * len(resumes) + ["ranking"]
+
+    ranking = events[-1][1]["resumes"]
+    print(f"Ranking: {[(entry['filename'], entry.get('rank')) for entry in ranking]}")
+    assert [entry["filename"] for entry in ranking[:3]] == ["high.tex", "mid.tex", "low.tex"]
+    assert [entry["rank"] for entry in ranking[:3]] == [1, 2, 3]
+    # Failed uploads and failed scoring come last, unranked
+    assert {entry["filename"] for entry in ranking[3:]} == {"unreadable.pdf", "crash.tex"}
+    assert all("error" in entry and "rank" not in entry for entry in ranking[3:])
+    assert next(e for e in ranking if e["filename"] == "unreadable.pdf")["error"] == "Could not extract text from PDF"
+    print("✅ PASS")
+
+def test_rank_resumes_endpoint_streams_ranking():
+    def upload(name, score):
+        return ("resume_files", (f"{name}.tex", ("\\documentclass{article}\n\\begin{document}\n"
+                                                 + _resume(name, score) + "\\end{document}\n").encode()))
+
+    files = [upload("second", 50), ("resume_files", ("notes.txt", b"plain text")), upload("first", 80)]
+    response = _with_fake_score(lambda: TestClient(main.app).post(
+        "/rank-resumes", files=files, data={"job_description": JOB_DESCRIPTION, "mode": "local"}))
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+
+    assert events[0][0] == "job_analysis" and events[0][1]["mode"] == "local"
+    assert events[-1][0] == "ranking"
+    ranking = events[-1][1]["resumes"]
+    print(f"Ranking: {[(entry['filename'], entry.get('rank'), entry.get('error')) for entry in ranking]}")
+    assert [entry["filename"] for entry in ranking] == ["first.tex", "second.tex", "notes.txt"]
+    assert ranking[0]["match_analysis"]["overall_score"] == 80
+    assert "error" in ranking[-1] and ranking[-1]["resume_hash"]
+
+    # An unknown mode is refused up front, like the other endpoints, instead of as a streamed event
+    rejected = TestClient(main.app).post(
+        "/rank-resumes", files=files, data={"job_description": JOB_DESCRIPTION, "mode": "psychic"})
+    assert rejected.status_code == 400
+    assert rejected.json() == {"error": "Unknown mode 'psychic'. Use one of: auto, llm, local."}
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_ranking_orders_by_score_with_errors_last()
+    test_rank_resumes_endpoint_streams_ranking()
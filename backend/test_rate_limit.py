@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared LLM rate limiter and its priority queue
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import metrics
+from app.llm_resilience import call_with_retries, remaining_deadline, retry_policy
+from app.rate_limit import (BACKGROUND, BATCH, INTERACTIVE, LLMRateLimiter, RateLimitTimeout,
+                            SharedTokenBuckets, priority)
+
+def test_buckets_are_shared_and_refunded():
+    path = os.path.join(tempfile.mkdtemp(), "buckets.sqlite")
+    # 60 requests and 600 tokens per minute: one request and 10 tokens a second, bursts of 2 and 20
+    first = SharedTokenBuckets(path, rpm=60, tpm=600, headroom=1.0, burst_seconds=2)
+    second = SharedTokenBuckets(path, rpm=60, tpm=600, headroom=1.0, burst_seconds=2)
+
+    assert first.try_acquire(15) == 0.0
+    # The other "process" sees the drained token bucket
+    wait = second.try_acquire(15)
+    print(f"Second process waits {wait:.2f}s for 15 tokens")
+    assert 0.9 < wait <= 1.1
+    # The reply used 5 tokens, not 15: the refund makes room without waiting
+    first.refund(10)
+    assert second.try_acquire(15) == 0.0
+    # Now the request bucket is the one that is empty
+    assert 0.9 < first.try_acquire(1) <= 1.1
+    print("✅ PASS")
+
+def test_interactive_calls_go_first():
+    path = os.path.join(tempfile.mkdtemp(), "buckets.sqlite")
+    limiter = LLMRateLimiter(lambda: SharedTokenBuckets(path, rpm=600, tpm=0, headroom=1.0, burst_seconds=0.1),
+                             max_wait=5)
+    # Take the single burst request so everyone below has to queue (one request per 0.1s)
+    limiter.acquire(100)
+    served = []
+
+    def call(level, name):
+        with priority(level):
+            limiter.acquire(100)
+        served.append(name)
+
+    threads = []
+    for level, name in ((BACKGROUND, "background"), (BATCH, "batch"), (INTERACTIVE, "interactive")):
+        threads.append(threading.Thread(target=call, args=(level, name)))
+        threads[-1].start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    print(f"Served in order {served}")
+    # The background call queued first and may have been the head briefly, but the rest are in priority order
+    assert served.index("interactive") < served.index("batch")
+    assert limiter.stats()["queued"] == {"interactive": 0, "batch": 0, "background": 0}
+    assert metrics.LLM_RATE_LIMIT_QUEUE_DEPTH.value(priority="batch") == 0
+    assert "llm_rate_limit_wait_seconds_count{priority=\"batch\"}" in metrics.registry.render()
+
+    # The last call above emptied the bucket again; the next request is 0.1s away
+    limiter.max_wait = 0.05
+    try:
+        with priority(BACKGROUND):
+            limiter.acquire(100)
+        assert False, "expected RateLimitTimeout"
+    except RateLimitTimeout:
+        pass
+    assert metrics.LLM_RATE_LIMIT_TIMEOUTS.value(priority="background") >= 1
+
+    # Usage reported by the API corrects an estimate; no usage leaves it as charged
+    limiter.settle(500, SimpleNamespace(total_tokens=200))
+    limiter.settle(500, None)
+    print("✅ PASS")
+
+def test_cancelled_acquire_leaves_once_and_waits_within_deadline():
+    path = os.path.join(tempfile.mkdtemp(), "buckets.sqlite")
+    limiter = LLMRateLimiter(lambda: SharedTokenBuckets(path, rpm=60, tpm=0, headroom=1.0, burst_seconds=1),
+                             max_wait=5)
+
+    # Cancelled just after _attempt took capacity and dequeued the waiter: it must not leave twice
+    attempt = limiter._attempt
+
+    def acquire_then_cancel(waiter):
+        attempt(waiter)
+        raise asyncio.CancelledError()
+
+    limiter._attempt = acquire_then_cancel
+    try:
+        asyncio.run(limiter.acquire_async(100))
+        assert False, "expected CancelledError"
+    except asyncio.CancelledError:
+        pass
+    limiter._attempt = attempt
+    assert limiter.stats()["queued"]["interactive"] == 0
+    assert metrics.LLM_RATE_LIMIT_QUEUE_DEPTH.value(priority="interactive") == 0
+
+    # The bucket is empty for the next second; a call with 0.05s left of its deadline gives up at once
+    started = time.perf_counter()
+    for acquire in (lambda: limiter.acquire(100, max_wait=0.05),
+                    lambda: asyncio.run(limiter.acquire_async(100, max_wait=0.05))):
+        try:
+            acquire()
+            assert False, "expected RateLimitTimeout"
+        except RateLimitTimeout as e:
+            print(f"Timed out: {e}")
+    assert time.perf_counter() - started < 0.5
+
+    # Attempts see what is left of their call's retry deadline
+    assert remaining_deadline() is None
+    remaining = call_with_retries("job_analysis", lambda timeout: remaining_deadline())
+    print(f"Remaining deadline inside the call: {remaining:.2f}s")
+    assert 0 < remaining <= retry_policy("job_analysis").deadline
+    assert remaining_deadline() is None
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_buckets_are_shared_and_refunded()
+    test_interactive_calls_go_first()
+    test_cancelled_acquire_leaves_once_and_waits_within_deadline()
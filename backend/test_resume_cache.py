@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the parsed resume cache
+"""
+
+import sys
+import os
+import asyncio
+import io
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the app's stores out of the default .cache directory
+_state_dir = tempfile.mkdtemp(prefix="test_resume_cache_")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(_state_dir, "jobs.sqlite"))
+os.environ.setdefault("JD_STORE_PATH", os.path.join(_state_dir, "jd_analysis.sqlite"))
+
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from app import main, tailoring
+from app.resume_cache import ParsedResumeCache, resume_cache, resume_file_hash
+
+RESUME_TEX = rb"""\documentclass{article}
+\begin{document}
+\section*{Jane Doe}
+Senior Software Engineer at Example Corp, building REST APIs in Python and AWS since 2018.
+\end{document}
+"""
+
+def _upload():
+    return UploadFile(file=io.BytesIO(RESUME_TEX), filename="resume.tex")
+
+def test_repeat_upload_skips_parsing_and_field_extraction():
+    """The same file is parsed once and its fields are extracted once"""
+    resume_cache.clear()
+    text, resume_hash, error = asyncio.run(main.parse_resume_upload(_upload()))
+    assert error is None and "Jane Doe" in text
+    assert resume_hash == resume_file_hash(RESUME_TEX)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached resume was parsed again")
+
+    previous = (main.extract_text_from_latex, tailoring.extract_resume_fields_with_llm)
+    main.extract_text_from_latex = fail
+    tailoring.extract_resume_fields_with_llm = fail
+    try:
+        assert asyncio.run(main.parse_resume_upload(_upload())) == (text, resume_hash, None)
+        fields = {"name": "Jane Doe", "skills": ["Python", "AWS"]}
+        resume_cache.put_fields(resume_hash, fields)
+        assert tailoring.get_resume_fields(text, resume_hash) == fields
+    finally:
+        main.extract_text_from_latex, tailoring.extract_resume_fields_with_llm = previous
+    # Text and fields are kept side by side in one entry
+    assert resume_cache.get_text(resume_hash) == text
+    print(f"Stats: {resume_cache.stats()}")
+    print("✅ PASS")
+
+def test_invalidation_and_expiry():
+    """DELETE /resume-cache/{hash} drops an entry, and entries expire after the TTL"""
+    resume_cache.put_text("abc123", "Jane Doe resume text")
+    client = TestClient(main.app)
+    assert client.delete("/resume-cache/abc123").json() == {"invalidated": True}
+    assert resume_cache.get_text("abc123") is None
+    assert client.delete("/resume-cache/abc123").json() == {"invalidated": False}
+
+    resume_cache.put_fields("def456", {"name": "Jane Doe"})
+    client.delete("/resume-cache")
+    assert resume_cache.get_fields("def456") is None
+
+    short_lived = ParsedResumeCache(max_entries=2, ttl=0.05)
+    short_lived.put_text("ghi789", "text")
+    assert short_lived.get_text("ghi789") == "text"
+    time.sleep(0.1)
+    assert short_lived.get_text("ghi789") is None
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_repeat_upload_skips_parsing_and_field_extraction()
+    test_invalidation_and_expiry()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized skill-match scoring engine
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.skill_matrix import SkillMatchMatrix
+from app.tailoring import calculate_match_score, calculate_match_scores_batch, calculate_skill_match_score
+
+SKILLS = ["Python", "python", "Java", "AWS", "Docker", "Kubernetes", "React", "SQL", "Go", "Agile"]
+
+def random_job(rng):
+    requirements = {
+        "required_years": rng.choice([None, 0, 1, 3, 5, 8]),
+        "required_skills": rng.sample(SKILLS, rng.randint(0, 4)) + rng.sample(SKILLS, rng.randint(0, 1)),
+        "preferred_skills": rng.sample(SKILLS, rng.randint(0, 3)),
+        "experience_level": rng.choice(["entry", "senior"]),
+    }
+    return {"skills": rng.sample(SKILLS, rng.randint(0, 5)), "requirements": requirements}
+
+def test_batch_scores_match_pairwise_scores():
+    """Every pair in the batch equals calculate_match_score, including duplicate required skills"""
+    rng = random.Random(7)
+    resumes = [rng.sample(SKILLS, rng.randint(0, 6)) for _ in range(25)]
+    years = [rng.choice([0, 2, 4, 10]) for _ in resumes]
+    jobs = [random_job(rng) for _ in range(15)]
+
+    batch = calculate_match_scores_batch(resumes, years, jobs)
+    for r, resume_skills in enumerate(resumes):
+        for j, job in enumerate(jobs):
+            expected = calculate_match_score("", "", resume_skills, job["skills"],
+                                             resume_years=years[r], job_requirements=job["requirements"])
+            assert batch[r][j] == expected, (r, j, batch[r][j], expected)
+    print(f"✅ PASS ({len(resumes) * len(jobs)} pairs)")
+
+def test_skill_scores_and_missing_counts():
+    matrix = SkillMatchMatrix([["python", "AWS"], []], [
+        {"job_skills": ["Python", "AWS", "Go"], "required_skills": ["Python", "Go", "Go"], "preferred_skills": ["AWS"]},
+    ])
+    scores = matrix.skill_scores()
+    print(f"Skill scores: {scores.tolist()}")
+    assert scores[0, 0] == calculate_skill_match_score(["python", "AWS"], ["Python", "AWS", "Go"],
+                                                       ["Python", "Go", "Go"], ["AWS"])
+    assert scores[1, 0] == 0.0
+    assert matrix.missing_counts("required").tolist() == [[2], [3]]
+    assert matrix.missing_skills(0, 0) == ["Go", "Go"]
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_batch_scores_match_pairwise_scores()
+    test_skill_scores_and_missing_counts()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for fuzzy skill matching with character n-gram vectors
+"""
+
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.skill_similarity import SkillSimilarityIndex, similarity_form
+from app import skill_taxonomy as taxonomy_module
+from app.skill_taxonomy import skill_taxonomy, SkillTaxonomy
+from app.tailoring import calculate_skill_match_score
+
+def test_near_variants_resolve_to_canonical_skills():
+    pairs = [("React.js", "React"), ("ReactJS", "React"), ("scikit learn", "Scikit-learn"),
+             ("CI/CD pipelines", "CI/CD"), ("Kubernetes clusters", "Kubernetes"), ("Tensorflow 2", "TensorFlow")]
+    for variant, expected in pairs:
+        print(f"{variant!r} -> {skill_taxonomy.canonical(variant)!r}")
+        assert skill_taxonomy.canonical(variant) == expected
+    # Unrelated or merely similar-looking skills stay unmatched
+    for unrelated in ["Excel", "Javas", "Reactive programming", "Salesforce"]:
+        assert skill_taxonomy.canonical(unrelated) == unrelated, unrelated
+    assert similarity_form("CI/CD pipelines") == similarity_form("cicd") == "^cicd$"
+
+    score = calculate_skill_match_score(["ReactJS", "CI/CD pipelines"], ["React", "CI/CD"], ["React", "CI/CD"], [])
+    assert score == 0.7
+    print("✅ PASS")
+
+def test_batched_nearest_and_threshold():
+    index = SkillSimilarityIndex([("PostgreSQL", "PostgreSQL"), ("Postgres", "PostgreSQL"), ("Python", "Python")],
+                                 threshold=0.9)
+    results = index.nearest(["postgre sql", "Pythn", "Rust"])
+    print(f"Nearest: {results}")
+    assert results[0][0] == "PostgreSQL"
+    assert results[1][0] is None and 0 < results[1][1] < 0.9
+    assert results[2][0] is None
+    assert index.similarities(["Python"]).shape == (1, 3)
+
+    exact_only = SkillTaxonomy(skill_taxonomy.skills, fuzzy=False)
+    assert exact_only.canonical("ReactJS") == "React"  # exact alias
+    assert exact_only.canonical("CI/CD pipelines") == "CI/CD pipelines"
+    print("✅ PASS")
+
+class _ClearedByAnotherThread(dict):
+    """Fuzzy memo that another worker thread empties right after every read"""
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        self.clear()
+        return value
+
+    def __contains__(self, key):
+        found = super().__contains__(key)
+        self.clear()
+        return found
+
+def test_lookup_while_memo_is_cleared():
+    """A lookup racing with lookup_many() clearing the full memo still gets its answer"""
+    variants = ["ReactJS", "Pythn", "postgre sql", "Kubernete"]
+    expected = [skill_taxonomy.canonical(v) for v in variants]
+    taxonomy = SkillTaxonomy(skill_taxonomy.skills)
+    taxonomy.lookup_many(variants)
+    taxonomy._fuzzy_matches = _ClearedByAnotherThread(taxonomy._fuzzy_matches)
+    assert [taxonomy.canonical(v) for v in variants] == expected
+
+    # And many threads sharing one small memo agree with the single-threaded answers
+    previous = taxonomy_module.SKILL_FUZZY_CACHE_SIZE
+    taxonomy_module.SKILL_FUZZY_CACHE_SIZE = 3
+    taxonomy = SkillTaxonomy(skill_taxonomy.skills)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: [taxonomy.canonical(v) for v in variants[i % 4:] + variants[:i % 4]],
+                                    range(100)))
+    finally:
+        taxonomy_module.SKILL_FUZZY_CACHE_SIZE = previous
+    print(f"Expected: {expected}")
+    assert all(sorted(result) == sorted(expected) for result in results)
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_near_variants_resolve_to_canonical_skills()
+    test_batched_nearest_and_threshold()
+    test_lookup_while_memo_is_cleared()
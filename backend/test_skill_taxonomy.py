@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Test script for skill alias canonicalization
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.skill_taxonomy import skill_taxonomy
+from app.tailoring import normalize_skills, calculate_skill_match_score
+
+def test_aliases_map_to_canonical_names():
+    pairs = [("JS", "JavaScript"), ("k8s", "Kubernetes"), ("Postgres", "PostgreSQL"),
+             ("  node.js ", "Node.js"), ("Some Niche Tool", "Some Niche Tool")]
+    for alias, expected in pairs:
+        print(f"{alias!r} -> {skill_taxonomy.canonical(alias)!r}")
+        assert skill_taxonomy.canonical(alias) == expected
+    assert skill_taxonomy.key("JS") == skill_taxonomy.key("javascript")
+    print("✅ PASS")
+
+def test_normalize_and_score_with_aliases():
+    resume_skills = normalize_skills(["JS", "javascript", "k8s", "Postgres"])
+    print(f"Normalized: {resume_skills}")
+    assert resume_skills == ["JavaScript", "Kubernetes", "PostgreSQL"]
+
+    score = calculate_skill_match_score(["js", "k8s"], ["JavaScript", "Kubernetes"],
+                                        ["JavaScript", "Kubernetes"], [])
+    assert score == 0.7
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_aliases_map_to_canonical_names()
+    test_normalize_and_score_with_aliases()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for the concurrent pipeline stage executor
+"""
+
+import sys
+import os
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.pipeline import Stage, StageError, run_stages, run_stages_async
+
+def test_independent_stages_run_concurrently():
+    """Independent stages should take about as long as the slowest one"""
+
+    def slow(value, delay):
+        def run():
+            time.sleep(delay)
+            return value
+        return run
+
+    stages = [
+        Stage("a", slow("A", 0.3)),
+        Stage("b", slow("B", 0.3)),
+        Stage("c", slow("C", 0.3)),
+        Stage("merged", lambda a, b, c: a + b + c, deps=["a", "b", "c"]),
+    ]
+
+    started = time.perf_counter()
+    results = run_stages(stages)
+    elapsed = time.perf_counter() - started
+
+    print(f"Results: {results}")
+    print(f"Elapsed: {elapsed:.2f}s (serial would be ~0.9s)")
+
+    assert results["merged"] == "ABC"
+    assert elapsed < 0.6
+    print("✅ PASS")
+
+def test_timeout_and_failure_fallbacks():
+    """Stages that time out or raise should use their fallback"""
+
+    def fail():
+        raise RuntimeError("upstream error")
+
+    stages = [
+        Stage("slow", lambda: time.sleep(2) or "late", timeout=0.2, fallback=lambda: "fallback"),
+        Stage("broken", fail, fallback=dict),
+        Stage("after", lambda slow, broken: (slow, broken), deps=["slow", "broken"]),
+    ]
+
+    started = time.perf_counter()
+    results = run_stages(stages)
+    elapsed = time.perf_counter() - started
+
+    print(f"Results: {results}")
+    assert results["after"] == ("fallback", {})
+    assert elapsed < 1.0
+    print("✅ PASS")
+
+def test_stage_without_fallback_aborts():
+    """A failing stage without a fallback aborts the run"""
+
+    def fail():
+        raise RuntimeError("boom")
+
+    try:
+        run_stages([Stage("broken", fail), Stage("after", lambda broken: broken, deps=["broken"])])
+    except StageError as e:
+        print(f"Raised: {e}")
+        assert e.stage == "broken"
+        print("✅ PASS")
+    else:
+        raise AssertionError("StageError was not raised")
+
+def test_invalid_graphs():
+    """Unknown dependencies and cycles are rejected before anything runs"""
+
+    for stages in (
+        [Stage("a", lambda missing: 1, deps=["missing"])],
+        [Stage("a", lambda b: 1, deps=["b"]), Stage("b", lambda a: 1, deps=["a"])],
+    ):
+        try:
+            run_stages(stages)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+        else:
+            raise AssertionError("Invalid graph was accepted")
+    print("✅ PASS")
+
+def test_async_stages():
+    """Coroutine stages run on the event loop and are cancelled on timeout"""
+
+    async def fetch():
+        await asyncio.sleep(0.2)
+        return "async"
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    stages = [
+        Stage("a", lambda: "sync"),
+        Stage("b", fetch),
+        Stage("c", hang, timeout=0.2, fallback=lambda: None),
+        Stage("merged", lambda a, b, c: (a, b, c), deps=["a", "b", "c"]),
+    ]
+
+    started = time.perf_counter()
+    results = asyncio.run(run_stages_async(stages))
+    elapsed = time.perf_counter() - started
+
+    print(f"Results: {results}")
+    print(f"Elapsed: {elapsed:.2f}s")
+    assert results["merged"] == ("sync", "async", None)
+    assert elapsed < 0.6
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_independent_stages_run_concurrently()
+    test_timeout_and_failure_fallbacks()
+    test_stage_without_fallback_aborts()
+    test_invalid_graphs()
+    test_async_stages()
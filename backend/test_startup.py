@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test script for lazy imports and warm-up
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def test_import_is_lazy_and_needs_no_api_key():
+    """
+    Importing the app loads neither spaCy nor openai, opens no SQLite
+    database (so it is safe to fork after), and works without OPENAI_API_KEY
+    """
+    code = ("import sys, app.main; "
+            "print(sorted(m for m in ('spacy', 'openai', 'pypdf') if m in sys.modules))")
+    state_dir = tempfile.mkdtemp(prefix="test_startup_")
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    env.update(WARMUP="off", OPENAI_API_KEY="", JOB_QUEUE_PATH=os.path.join(state_dir, "jobs.sqlite"),
+               LLM_CACHE_PATH=os.path.join(state_dir, "llm_cache.sqlite"),
+               PDF_ARTIFACT_DIR=os.path.join(state_dir, "pdf_artifacts"))
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    print(result.stdout.strip().splitlines()[-1] if result.stdout.strip() else result.stderr)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+    assert os.listdir(state_dir) == []
+
+    from app.utils import llm_available
+    import app.utils
+    if not app.utils.api_key:
+        assert not llm_available()
+    print("✅ PASS")
+
+def test_warm_up_runs_every_step_once():
+    from app.warmup import warm_up, readiness, WARMUP_STEPS
+    state = warm_up(freeze=False)
+    print(f"Warm-up: {state['warmup_seconds']}s, components: {state['components']}")
+    assert state["warmed"]
+    assert set(state["components"]) == {name for name, _ in WARMUP_STEPS}
+    assert state["components"]["keyword_matcher"]["status"] == "ok"
+    assert state["components"]["scoring"]["status"] == "ok"
+    # A second call is a no-op
+    assert warm_up()["warmup_seconds"] == state["warmup_seconds"]
+    assert readiness()["ready"] is False
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_import_is_lazy_and_needs_no_api_key()
+    test_warm_up_runs_every_step_once()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the /tailor/stream Server-Sent Events endpoint
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the app's stores out of the default .cache directory
+_state_dir = tempfile.mkdtemp(prefix="test_tailor_stream_")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(_state_dir, "jobs.sqlite"))
+os.environ.setdefault("JD_STORE_PATH", os.path.join(_state_dir, "jd_analysis.sqlite"))
+os.environ.setdefault("LLM_RATE_LIMIT_PATH", os.path.join(_state_dir, "llm_rate_limit.sqlite"))
+
+import httpx
+import openai
+from fastapi.testclient import TestClient
+from app import jd_store, main, utils
+from app.fake_llm import FakeLLMConfig, create_app
+from app.jd_store import JDAnalysisStore
+from app.resume_cache import resume_cache
+
+RESUME_TEX = rb"""\documentclass{article}
+\begin{document}
+\section*{Jane Doe}
+Senior Software Engineer at Example Corp, building REST APIs in Python and AWS.
+Jan 2018 -- Present
+\end{document}
+"""
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+We need 5+ years of experience with Python, AWS and Kubernetes.
+"""
+
+def _events(mode: str, job_description: str = JOB_DESCRIPTION):
+    """(event, data) pairs of one /tailor/stream response"""
+    response = TestClient(main.app).post(
+        "/tailor/stream", files={"resume_file": ("resume.tex", RESUME_TEX)},
+        data={"job_description": job_description, "mode": mode})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_llm_stream_event_order_and_result():
+    fake = create_app(FakeLLMConfig(latency="constant", latency_ms=1, token_delay_ms=0))
+    previous = (utils._async_client, utils.LLM_CACHE_ENABLED, jd_store._store)
+    utils._async_client = openai.AsyncOpenAI(
+        api_key="fake", base_url="http://testserver/v1", max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake)))
+    utils.LLM_CACHE_ENABLED = False
+    # An empty store, so the posting is analyzed by the fake server and its canned analysis stays out of .cache
+    jd_store._store = JDAnalysisStore(os.path.join(_state_dir, "jd_stream.sqlite"))
+    resume_cache.clear()
+    try:
+        events = _events("llm")
+    finally:
+        utils._async_client, utils.LLM_CACHE_ENABLED, jd_store._store = previous
+    names = [event for event, _ in events]
+    print(f"Events: {[name for i, name in enumerate(names) if i == 0 or names[i - 1] != name]}")
+
+    assert names[-1] == "result" and "error" not in names
+    assert names.index("skills") < names.index("match_analysis")
+    assert names.index("ats_resume") < names.index("latex_token")
+    tokens = [data["text"] for event, data in events if event == "latex_token"]
+    assert len(tokens) > 1
+
+    result = events[-1][1]
+    assert result["latex_content"] == "".join(tokens)
+    assert result["mode"] == "llm" and result["resume_hash"]
+    assert result["match_analysis"] == dict(events)["match_analysis"]
+    assert {"matched_skills", "missing_skills", "latex_filename"} <= set(result)
+    print("✅ PASS")
+
+def test_local_stream_and_errors():
+    events = _events("local")
+    names = [event for event, _ in events]
+    print(f"Local events: {names}")
+    # Local LaTeX arrives whole with the result
+    assert names[-1] == "result" and "latex_token" not in names
+    assert names.index("skills") < names.index("match_analysis") < names.index("result")
+    assert "\\begin{document}" in events[-1][1]["latex_content"]
+
+    assert _events("psychic") == [("error", {"error": "Unknown mode 'psychic'. Use one of: auto, llm, local."})]
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_llm_stream_event_order_and_result()
+    test_local_stream_and_errors()
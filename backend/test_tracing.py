@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for request tracing and structured logging
+"""
+
+import sys
+import os
+import contextvars
+import json
+import logging
+import subprocess
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import tracing
+from app.pipeline import Stage, run_stages
+from app.tracing import JsonFormatter, RequestContextFilter, get_trace, span, start_trace
+
+def _traced_pipeline():
+    start_trace("trace-test", "POST /tailor")
+    with span("extract_text", file_type="pdf"):
+        time.sleep(0.01)
+
+    def fields():
+        with span("parse"):
+            time.sleep(0.01)
+        return {"name": "Jane"}
+
+    def skills(fields):
+        return ["Python"]
+
+    run_stages([Stage("fields", fields), Stage("skills", skills, deps=("fields",))])
+
+def test_spans_follow_request_into_stage_threads():
+    contextvars.copy_context().run(_traced_pipeline)
+    trace = get_trace("trace-test")
+    spans = {s["name"]: s for s in trace["spans"]}
+    print([(s["name"], s["duration_ms"], s["thread"]) for s in trace["spans"]])
+    assert trace["name"] == "POST /tailor"
+    assert {"extract_text", "pipeline", "stage.fields", "stage.skills", "parse"} <= set(spans)
+    assert spans["extract_text"]["attributes"] == {"file_type": "pdf"}
+    # The span opened in a worker thread still belongs to this request, under the pipeline
+    assert spans["parse"]["thread"].startswith("pipeline")
+    assert spans["parse"]["parent_id"] == spans["pipeline"]["span_id"]
+    assert spans["stage.fields"]["status"] == "ok" and spans["stage.fields"]["duration_ms"] >= 10
+    assert tracing.request_id_var.get() is None
+    print("✅ PASS")
+
+def test_json_records_and_sampling():
+    def emit(level):
+        record = logging.LogRecord("app.test", level, __file__, 1, "Extracted %s skills", (3,), None)
+        record.fields = {"stage": "skills"}
+        return record if RequestContextFilter().filter(record) else None
+
+    previous_rate = tracing.LOG_SAMPLE_RATE
+    tracing.LOG_SAMPLE_RATE = 0.5
+    try:
+        request_ids = [f"request-{i}" for i in range(200)]
+        sampled = [request_id for request_id in request_ids if tracing.is_sampled(request_id)]
+        assert 50 < len(sampled) < 150
+        assert sampled == [request_id for request_id in request_ids if tracing.is_sampled(request_id)]
+
+        dropped = next(request_id for request_id in request_ids if request_id not in sampled)
+        context = contextvars.copy_context()
+        context.run(tracing.request_id_var.set, dropped)
+        assert context.run(emit, logging.DEBUG) is None
+        assert context.run(emit, logging.ERROR) is not None
+
+        context.run(tracing.request_id_var.set, sampled[0])
+        entry = json.loads(JsonFormatter().format(context.run(emit, logging.INFO)))
+    finally:
+        tracing.LOG_SAMPLE_RATE = previous_rate
+    print(entry)
+    assert entry["message"] == "Extracted 3 skills" and entry["level"] == "INFO"
+    assert entry["request_id"] == sampled[0] and entry["stage"] == "skills"
+    print("✅ PASS")
+
+def test_forked_worker_keeps_logging():
+    """A worker forked after app.main was imported (gunicorn --preload) still writes its records"""
+    code = """
+import logging, os, app.main
+from app import tracing
+pid = os.fork()
+if pid == 0:
+    logging.getLogger("app.worker").warning("logged from the forked worker")
+    alive = tracing._listener._thread.is_alive()
+    tracing.stop_logging()
+    os._exit(0 if alive else 1)
+_, status = os.waitpid(pid, 0)
+logging.getLogger("app.worker").warning("logged from the parent")
+print(os.waitstatus_to_exitcode(status))
+"""
+    env = dict(os.environ, WARMUP="off", LOG_FORMAT="json")
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True, timeout=60)
+    messages = [json.loads(line)["message"] for line in result.stderr.splitlines() if line.startswith("{")]
+    print(f"Exit codes: {result.stdout.split()}, messages: {messages}")
+    assert result.returncode == 0 and result.stdout.split()[-1] == "0", result.stderr
+    assert "logged from the forked worker" in messages and "logged from the parent" in messages
+    print("✅ PASS")
+
+if __name__ == "__main__":
+    test_spans_follow_request_into_stage_threads()
+    test_json_records_and_sampling()
+    test_forked_worker_keeps_logging()